@@ -1,10 +1,33 @@
+from pathlib import Path
+import sys
+
+# 仓库的 src 目录（共享的 student.dash_metrics 等模块）
+sys.path.append(str(Path(__file__).parent.parent.parent / 'src'))
+
+# 启动耗时统计；STARTUP_PROFILE=1 时还会统计每个模块（包括页面模块）的导入耗时
+from student.startup_profile import StartupProfile
+startup = StartupProfile("coursework1 startup")
+
 import dash
 from dash import html
 import dash_bootstrap_components as dbc
-from pathlib import Path
+import logging
 import os
 
-print("\n=== Initializing Dash App ===")
+from student.dash_metrics import instrument_app, note_cache, phase
+from student.logging_config import configure_logging
+from utils import set_phase_hook
+from utils.cache import add_lookup_listener
+from utils.client_data import data_store_component
+from utils.geometry import install_geometry_route
+from utils.http_cache import install_http_caching
+from utils.warmup import start_warmup
+
+# 日志级别：LOG_LEVEL（默认 INFO），按模块设置用 LOG_LEVELS，例如 "pages.recycling.comparison=DEBUG"
+configure_logging()
+logger = logging.getLogger(__name__)
+logger.info("Initializing Dash app")
+startup.mark("imports")
 
 # 设置页面文件夹路径
 PAGES_FOLDER = os.path.join(os.path.dirname(__file__), "pages")
@@ -21,10 +44,11 @@ app = dash.Dash(
     suppress_callback_exceptions=True
 )
 
+startup.mark("app and pages")
+
 # 验证页面注册
-print("\n=== Registered Pages ===")
 for page in dash.page_registry.values():
-    print(f"Page: {page['name']}, Path: {page['path']}")
+    logger.debug("Registered page: %s, path: %s", page['name'], page['path'])
 
 # 创建导航栏
 navbar = dbc.NavbarSimple(
@@ -55,14 +79,35 @@ navbar = dbc.NavbarSimple(
     dark=True,
 )
 
-# 应用布局
-app.layout = html.Div([
-    navbar,
-    html.Div(dash.page_container, id='page-content')
-])
+# 应用布局（函数：每次加载页面时读取当前数据版本）
+def serve_layout():
+    return html.Div([
+        navbar,
+        data_store_component(),  # 每个会话发送一次的紧凑数据集，供客户端回调使用
+        html.Div(dash.page_container, id='page-content')
+    ])
+
+
+app.layout = serve_layout
+
+logger.info("App layout created (%d pages)", len(dash.page_registry))
+
+# 响应压缩（gzip/brotli）、ETag 和 Cache-Control
+install_http_caching(app)
+install_geometry_route(app)  # 伦敦各区边界 GeoJSON（简化后长期缓存）
+
+# 回调耗时、响应大小和缓存命中统计（设置 DASH_METRICS=1 开启，访问 /metrics 查看）
+if instrument_app(app) is not None:
+    add_lookup_listener(note_cache)
+    set_phase_hook(phase)
+
+startup.mark("layout and server hooks")
 
-print("\n=== App Layout Created ===")
+# 在后台线程中预先计算常用页面状态，不阻塞服务器启动；
+# 直接运行 app.py 时带重载器，只在处理请求的子进程中预热
+warmup_job = start_warmup(use_reloader=__name__ == "__main__")
+startup.finish(dash.page_registry)
 
 if __name__ == "__main__":
-    print("\n=== Starting Server ===")
+    logger.info("Starting server")
     app.run(debug=True) 
\ No newline at end of file
@@ -0,0 +1,208 @@
+/*
+ * 回收数据页面的客户端回调
+ *
+ * 数据由 utils/client_data.py 每个会话发送一次（dcc.Store，sessionStorage）：
+ *   {version, years, areas, statuses, metrics: {名称: {dtype, shape, bdata}}, templates}
+ * 矩阵按 (区域, 年份) 行优先存储，缺失值为 NaN。这里的计算与服务器端
+ * （聚合立方体、Area × Year 索引）保持一致，滑块拖动不再需要请求服务器。
+ * 图表和卡片使用服务器端函数生成的模板（templates），这里只填入数据。
+ */
+(function () {
+    // 区域类型分组；"London Overall" 由 Core London 和 Outer London 派生（与 aggregates.GROUP_MEMBERS 一致）
+    var GROUP_MEMBERS = {
+        'Core London': ['Core London'],
+        'Outer London': ['Outer London'],
+        'Non-London': ['Non-London'],
+        'London Overall': ['Core London', 'Outer London']
+    };
+
+    var TYPED_ARRAYS = {float32: Float32Array, float64: Float64Array, int32: Int32Array};
+
+    var decoded = {version: null, value: null};
+
+    function decodeArray(encoded) {
+        var binary = atob(encoded.bdata);
+        var bytes = new Uint8Array(binary.length);
+        for (var i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        return new TYPED_ARRAYS[encoded.dtype](bytes.buffer);
+    }
+
+    // 解码结果按数据版本缓存，同一会话只解码一次
+    function getDataset(data) {
+        if (decoded.version !== data.version || decoded.value === null) {
+            var metrics = {};
+            Object.keys(data.metrics).forEach(function (name) {
+                metrics[name] = decodeArray(data.metrics[name]);
+            });
+            decoded = {
+                version: data.version,
+                value: {
+                    years: data.years,
+                    areas: data.areas,
+                    statuses: data.statuses,
+                    metrics: metrics,
+                    nYears: data.years.length
+                }
+            };
+        }
+        return decoded.value;
+    }
+
+    // 年份范围 -> 年份位置 [lo, hi)
+    function yearBounds(dataset, yearRange) {
+        var lo = 0;
+        var hi = 0;
+        dataset.years.forEach(function (year) {
+            if (year < yearRange[0]) { lo += 1; }
+            if (year <= yearRange[1]) { hi += 1; }
+        });
+        return [lo, Math.max(lo, hi)];
+    }
+
+    // 对满足条件的区域在年份位置 [lo, hi) 内的有效值调用 visit(值, 区域位置)
+    function eachValue(dataset, metric, bounds, statuses, visit) {
+        var matrix = dataset.metrics[metric];
+        for (var i = 0; i < dataset.areas.length; i++) {
+            if (statuses && statuses.indexOf(dataset.statuses[i]) < 0) { continue; }
+            for (var j = bounds[0]; j < bounds[1]; j++) {
+                var value = matrix[i * dataset.nYears + j];
+                if (!isNaN(value)) { visit(value, i); }
+            }
+        }
+    }
+
+    function summarise(dataset, metric, bounds, statuses) {
+        var stats = {sum: 0, count: 0, min: Infinity, max: -Infinity};
+        eachValue(dataset, metric, bounds, statuses, function (value) {
+            stats.sum += value;
+            stats.count += 1;
+            stats.min = Math.min(stats.min, value);
+            stats.max = Math.max(stats.max, value);
+        });
+        stats.avg = stats.count ? stats.sum / stats.count : NaN;
+        return stats;
+    }
+
+    function percent(value) {
+        return isNaN(value) ? 'N/A' : value.toFixed(1) + '%';
+    }
+
+    function signedPercent(value) {
+        return isNaN(value) ? 'N/A' : (value >= 0 ? '+' : '') + value.toFixed(1) + '%';
+    }
+
+    function clone(value) {
+        return JSON.parse(JSON.stringify(value));
+    }
+
+    // 模板来自 overview.create_stats_card，只填入三个数值
+    function statsCard(template, stats) {
+        if (stats.count === 0) {
+            stats = {avg: 0, max: 0, min: 0};
+        }
+        var card = clone(template);
+        var rows = card.props.children;
+        rows[0].props.children = percent(stats.avg);
+        rows[1].props.children[1] = percent(stats.max);
+        rows[2].props.children[1] = percent(stats.min);
+        return card;
+    }
+
+    // 模板来自 overview.update_trend（单一年份为柱状图，时间范围为折线图），
+    // 每条轨迹按名称（区域类型）填入平均值，另外更新标题中的年份和坐标轴范围
+    function trendFigure(dataset, templates, yearRange) {
+        var bounds = yearBounds(dataset, yearRange);
+        var figure;
+
+        if (yearRange[0] === yearRange[1]) {
+            figure = clone(templates.trend_bar);
+            var highest = 0;
+            figure.data.forEach(function (trace) {
+                var mean = summarise(dataset, 'Recycling_Rates', bounds, GROUP_MEMBERS[trace.name]).avg;
+                if (!isNaN(mean)) { highest = Math.max(highest, mean); }
+                trace.y = [mean];
+                trace.text = [mean];
+            });
+            figure.layout.title.text = figure.layout.title.text.replace('{year}', yearRange[0]);
+            figure.layout.yaxis.range = [0, highest * 1.1];
+        } else {
+            figure = clone(templates.trend_line);
+            figure.data.forEach(function (trace) {
+                trace.x = [];
+                trace.y = [];
+                for (var j = bounds[0]; j < bounds[1]; j++) {
+                    var mean = summarise(dataset, 'Recycling_Rates', [j, j + 1], GROUP_MEMBERS[trace.name]).avg;
+                    if (!isNaN(mean)) {
+                        trace.x.push(dataset.years[j]);
+                        trace.y.push(mean);
+                    }
+                }
+            });
+            figure.layout.xaxis.range = [yearRange[0] - 0.5, yearRange[1] + 0.5];
+        }
+        return figure;
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        dataStore: {
+            // 会话中的数据与布局中的版本一致时不请求服务器；否则把已有版本发给 fill_data_store
+            requestDataset: function (timestamp, data, version) {
+                if (data && data.version === version && data.templates) {
+                    throw window.dash_clientside.PreventUpdate;
+                }
+                return {have: data && data.templates ? data.version : null, at: Date.now()};
+            }
+        },
+
+        recycling: {
+            // /recycling：统计卡片、趋势图和年份显示
+            overviewSummary: function (yearRange, data) {
+                if (!data) { throw window.dash_clientside.PreventUpdate; }
+                yearRange = yearRange || [2022, 2022];
+                var dataset = getDataset(data);
+                var bounds = yearBounds(dataset, yearRange);
+                return [
+                    statsCard(data.templates.stats_card,
+                              summarise(dataset, 'Recycling_Rates', bounds, ['Core London'])),
+                    statsCard(data.templates.stats_card,
+                              summarise(dataset, 'Recycling_Rates', bounds, ['Outer London'])),
+                    statsCard(data.templates.stats_card,
+                              summarise(dataset, 'Recycling_Rates', bounds, ['Non-London'])),
+                    trendFigure(dataset, data.templates, yearRange),
+                    '(' + yearRange[0] + '-' + yearRange[1] + ')'
+                ];
+            },
+
+            // /recycling/area：关键指标卡片
+            areaKpis: function (yearRange, data) {
+                if (!data || !yearRange) { throw window.dash_clientside.PreventUpdate; }
+                var dataset = getDataset(data);
+                var bounds = yearBounds(dataset, yearRange);
+                var selectedYear = yearRange[0];
+
+                var period = summarise(dataset, 'Recycling_Rates', bounds, null);
+
+                var top = null;
+                eachValue(dataset, 'Recycling_Rates', bounds, null, function (value, i) {
+                    if (top === null || value > top.value) {
+                        top = {area: dataset.areas[i], value: value};
+                    }
+                });
+
+                var previous = summarise(dataset, 'Recycling_Rates',
+                                         yearBounds(dataset, [selectedYear - 1, selectedYear - 1]), null);
+                var core = summarise(dataset, 'Recycling_Rates', bounds, ['Core London']);
+                var outer = summarise(dataset, 'Recycling_Rates', bounds, ['Outer London']);
+
+                return [
+                    percent(period.avg),
+                    top === null ? 'N/A' : top.area + ' (' + percent(top.value) + ')',
+                    previous.count ? signedPercent(period.avg - previous.avg) : 'N/A',
+                    signedPercent(core.avg - outer.avg)
+                ];
+            }
+        }
+    });
+}());
@@ -1,6 +1,6 @@
-from dash import register_page, html, dcc, callback, Input, Output
+import logging
+from dash import register_page, html, dcc, callback, clientside_callback, ClientsideFunction, Input, Output, Patch
 import dash_bootstrap_components as dbc
-import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
@@ -12,15 +12,24 @@ import dash
 # 添加父目录到 Python 路径
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from utils import load_data
+from utils.area_index import get_area_index
+from utils.cache import cached_callback
+from utils.client_data import CLIENTSIDE_ENABLED, STORE_ID
+from utils.education import get_education_matrices
+from utils.geometry import geometry_version
+from utils.recycling_figures import london_map_figure
+from utils.warmup import register_warmup, year_ranges
+
+logger = logging.getLogger(__name__)
 
 # 首先定义辅助函数
 def get_year_range():
-    df = load_data()
-    min_year = df['Year'].min()
-    max_year = df['Year'].max()
-    return min_year, max_year
+    """数据中的年份范围（来自共享的 Area × Year 索引）"""
+    years = get_area_index().years
+    return int(years.min()), int(years.max())
 
 # 然后定义常量
+# 地图标记坐标（按背景图片 london_map.png 校准；分级统计图模式下改用边界质心）
 LONDON_COORDS = {
     # --- Core London ---
     "City of London":         [-0.1221, 51.53562],
@@ -100,201 +109,193 @@ LONDON_POSTCODES = {
     "Hillingdon": "UB"
 }
 
-# 修改教育程度数据生成方式
-EDUCATION_DATA = {
-    area: {
-        'Higher Education': round(30 + (45 - 30) * np.random.random(), 1),  # 30-45%
-        'A-Level or Equivalent': round(25 + (35 - 25) * np.random.random(), 1),  # 25-35%
-        'GCSE or Equivalent': round(20 + (25 - 20) * np.random.random(), 1),  # 20-25%
-        'Other Qualifications': round(5 + (10 - 5) * np.random.random(), 1),  # 5-10%
-        'No Qualifications': round(5 + (10 - 5) * np.random.random(), 1)  # 5-10%
-    }
-    for area in LONDON_COORDS.keys()
-}
-
 # 注册页面
 register_page(__name__, path='/recycling/area', name='Area Analysis')
 
-# 获取年份范围
-min_year, max_year = get_year_range()
-
-layout = dbc.Container([
-    # 标题行
-    dbc.Row([
-        dbc.Col([
-            html.H1("Area Analysis", className="text-center mb-4"),
-            html.P("Explore recycling patterns across London boroughs", 
-                   className="text-center mb-4")
-        ])
-    ]),
+def layout(**kwargs):
+    """页面布局；年份范围在访问页面时才从共享数据中获取"""
+    # 获取年份范围
+    min_year, max_year = get_year_range()
     
-    # 控制面板
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.Label("Select Time Period:", className="mb-2"),
-                    dcc.RangeSlider(
-                        id='year-range-selector',
-                        min=min_year,
-                        max=max_year,
-                        value=[max_year, max_year],  # 默认选择最新年份
-                        marks={str(year): str(year) for year in range(min_year, max_year + 1)},
-                        step=1,
-                        className="mb-4",
-                        allowCross=True,  # 允许两个滑块交叉，以实现单年份选择
-                        tooltip={"placement": "bottom", "always_visible": True}
-                    ),
-                ])
+    return dbc.Container([
+        # 标题行
+        dbc.Row([
+            dbc.Col([
+                html.H1("Area Analysis", className="text-center mb-4"),
+                html.P("Explore recycling patterns across London boroughs", 
+                       className="text-center mb-4")
             ])
-        ], width=12)
-    ], className="mb-4"),
+        ]),
     
-    # 第一行：地图和统计信息
-    dbc.Row([
-        # 地图部分
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader("London Recycling Map"),
-                dbc.CardBody([
-                    dcc.Graph(
-                        id="area-analysis-map",
-                        style={
-                            'height': '600px',  # 固定高度
-                            'width': '100%',    # 宽度适应容器
-                            'max-height': '600px',  # 最大高度限制
-                            'overflow': 'hidden'  # 超出部分隐藏
-                        }
-                    )
-                ], className="p-0")
-            ])
-        ], width=9),
-        
-        # 右侧统计信息保持不变
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader("Area Statistics"),
-                dbc.CardBody([
-                    html.Div(id="area-stats")
+        # 控制面板
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.Label("Select Time Period:", className="mb-2"),
+                        dcc.RangeSlider(
+                            id='year-range-selector',
+                            min=min_year,
+                            max=max_year,
+                            value=[max_year, max_year],  # 默认选择最新年份
+                            marks={str(year): str(year) for year in range(min_year, max_year + 1)},
+                            step=1,
+                            className="mb-4",
+                            allowCross=True,  # 允许两个滑块交叉，以实现单年份选择
+                            tooltip={"placement": "bottom", "always_visible": True}
+                        ),
+                    ])
                 ])
-            ], className="mb-3"),
+            ], width=12)
+        ], className="mb-4"),
+    
+        # 第一行：地图和统计信息
+        dbc.Row([
+            # 地图部分
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("London Recycling Map"),
+                    dbc.CardBody([
+                        dcc.Graph(
+                            id="area-analysis-map",
+                            style={
+                                'height': '600px',  # 固定高度
+                                'width': '100%',    # 宽度适应容器
+                                'max-height': '600px',  # 最大高度限制
+                                'overflow': 'hidden'  # 超出部分隐藏
+                            }
+                        )
+                    ], className="p-0")
+                ])
+            ], width=9),
+        
+            # 右侧统计信息保持不变
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Area Statistics"),
+                    dbc.CardBody([
+                        html.Div(id="area-stats")
+                    ])
+                ], className="mb-3"),
             
-            dbc.Card([
-                dbc.CardHeader("Area Trend"),
-                dbc.CardBody([
-                    dcc.Graph(
-                        id="area-trend-chart",
-                        style={'height': '300px'}
-                    )
+                dbc.Card([
+                    dbc.CardHeader("Area Trend"),
+                    dbc.CardBody([
+                        dcc.Graph(
+                            id="area-trend-chart",
+                            style={'height': '300px'}
+                        )
+                    ])
                 ])
-            ])
-        ], width=3)
-    ], className="mb-4"),
+            ], width=3)
+        ], className="mb-4"),
     
-    # 新增第二行：额外分析图表
-    dbc.Row([
-        # 回收率分布图
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader("Recycling Rate Distribution"),
-                dbc.CardBody([
-                    dcc.Graph(id="recycling-distribution")
+        # 新增第二行：额外分析图表
+        dbc.Row([
+            # 回收率分布图
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Recycling Rate Distribution"),
+                    dbc.CardBody([
+                        dcc.Graph(id="recycling-distribution")
+                    ])
                 ])
-            ])
-        ], width=6),
+            ], width=6),
         
-        # 人口密度与回收率关系图
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader("Population Density vs Recycling Rate"),
-                dbc.CardBody([
-                    dcc.Graph(id="density-recycling-correlation")
+            # 人口密度与回收率关系图
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Population Density vs Recycling Rate"),
+                    dbc.CardBody([
+                        dcc.Graph(id="density-recycling-correlation")
+                    ])
                 ])
-            ])
-        ], width=6)
-    ], className="mb-4"),
+            ], width=6)
+        ], className="mb-4"),
     
-    # 新增第三行：关键指标
-    dbc.Row([
-        # 平均回收率
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4(id="avg-recycling-rate", className="text-center"),
-                    html.P("Average Recycling Rate", className="text-center text-muted")
+        # 新增第三行：关键指标
+        dbc.Row([
+            # 平均回收率
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4(id="avg-recycling-rate", className="text-center"),
+                        html.P("Average Recycling Rate", className="text-center text-muted")
+                    ])
                 ])
-            ])
-        ], width=3),
+            ], width=3),
         
-        # 最佳表现区域
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4(id="top-performer", className="text-center"),
-                    html.P("Top Performing Borough", className="text-center text-muted")
+            # 最佳表现区域
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4(id="top-performer", className="text-center"),
+                        html.P("Top Performing Borough", className="text-center text-muted")
+                    ])
                 ])
-            ])
-        ], width=3),
+            ], width=3),
         
-        # 同比变化
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4(id="year-on-year", className="text-center"),
-                    html.P("Year-on-Year Change", className="text-center text-muted")
+            # 同比变化
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4(id="year-on-year", className="text-center"),
+                        html.P("Year-on-Year Change", className="text-center text-muted")
+                    ])
                 ])
-            ])
-        ], width=3),
+            ], width=3),
         
-        # 回收率差距
-        dbc.Col([
-            dbc.Card([
-                dbc.CardBody([
-                    html.H4(id="recycling-gap", className="text-center"),
-                    html.P("Core-Outer Gap", className="text-center text-muted")
+            # 回收率差距
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardBody([
+                        html.H4(id="recycling-gap", className="text-center"),
+                        html.P("Core-Outer Gap", className="text-center text-muted")
+                    ])
                 ])
-            ])
-        ], width=3)
-    ]),
+            ], width=3)
+        ]),
     
-    # 添加新的行用于教育程度分析
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader("Education Level Distribution"),
-                dbc.CardBody([
-                    dcc.Graph(id="education-distribution")
+        # 添加新的行用于教育程度分析
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Education Level Distribution"),
+                    dbc.CardBody([
+                        dcc.Graph(id="education-distribution")
+                    ])
                 ])
-            ])
-        ], width=6),
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader("Education Level vs Recycling Rate"),
-                dbc.CardBody([
-                    dcc.Graph(id="education-recycling-correlation")
+            ], width=6),
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Education Level vs Recycling Rate"),
+                    dbc.CardBody([
+                        dcc.Graph(id="education-recycling-correlation")
+                    ])
                 ])
-            ])
-        ], width=6)
-    ], className="mb-4"),
-])
+            ], width=6)
+        ], className="mb-4"),
+    ])
 
-# 合并回调函数
+def clicked_area(click_data):
+    """从地图点击数据中取出区域名称"""
+    if not click_data:
+        return None
+    point_data = click_data['points'][0]
+    if 'customdata' in point_data:
+        return point_data['customdata']
+    return point_data['text'].split('<br>')[0].replace('<b>', '').replace('</b>', '')
+
+# 只依赖年份范围的组件：点击地图不会触发这里的重新计算
 @callback(
     [Output("area-analysis-map", "figure"),
-     Output("area-stats", "children"),
-     Output("area-trend-chart", "figure"),
      Output("recycling-distribution", "figure"),
      Output("density-recycling-correlation", "figure"),
-     Output("avg-recycling-rate", "children"),
-     Output("top-performer", "children"),
-     Output("year-on-year", "children"),
-     Output("recycling-gap", "children"),
-     Output("education-distribution", "figure"),
      Output("education-recycling-correlation", "figure")],
-    [Input("year-range-selector", "value"),
-     Input("area-analysis-map", "clickData")]
+    [Input("year-range-selector", "value")]
 )
-def update_all_components(year_range, click_data):
+@cached_callback(key=lambda year_range: (year_range, geometry_version()))  # 地图引用带边界摘要的 URL
+def update_year_components(year_range):
     df = load_data()
     
     # 检查是否是单一年份
@@ -310,223 +311,8 @@ def update_all_components(year_range, click_data):
         year_data = df[(df['Year'] >= year_range[0]) & (df['Year'] <= year_range[1])]
         title_text = f"London Recycling Rates ({year_range[0]}-{year_range[1]})"
     
-    # 1. 创建地图
-    map_fig = go.Figure()
-
-    # 添加背景地图图片
-    map_fig.add_layout_image(
-        dict(
-            source="/assets/london_map.png",
-            xref="x",
-            yref="y",
-            x=-0.52,
-            y=51.72,
-            sizex=0.82,
-            sizey=0.42,
-            sizing="contain",
-            opacity=1,
-            layer="below"
-        )
-    )
-    
-    # 为每个区域添加标记点
-    for area in LONDON_COORDS:
-        area_data = year_data[year_data['Area'] == area]
-        if not area_data.empty:
-            recycling_rate = area_data.iloc[0]['Recycling_Rates']
-            london_status = area_data.iloc[0]['London_Status']
-            
-            # 根据区域类型设置颜色
-            color = '#4e79a7' if london_status == 'Core London' else '#f28e2b'
-            
-            map_fig.add_trace(go.Scatter(
-                x=[LONDON_COORDS[area][0]],
-                y=[LONDON_COORDS[area][1]],
-                mode='markers',
-                marker=dict(
-                    size=15,
-                    color=color,
-                    line=dict(
-                        color='white',
-                        width=1.5
-                    )
-                ),
-                name=london_status,
-                text=f"<b>{area}</b><br>Recycling Rate: {recycling_rate:.1f}%<br>{london_status}",
-                customdata=[area],  # 添加区域名称作为自定义数据
-                hoverinfo='text',
-                hovertemplate="%{text}<extra></extra>",
-                showlegend=london_status not in [t.name for t in map_fig.data]
-            ))
-    
-    # 更新地图布局
-    map_fig.update_layout(
-        title=dict(
-            text=title_text,
-            x=0.5,
-            y=0.98,
-            xanchor='center',
-            yanchor='top',
-            font=dict(size=20)
-        ),
-        xaxis=dict(
-            range=[-0.52, 0.30],
-            showgrid=False,
-            zeroline=False,
-            visible=False,
-            fixedrange=True,  # 锁定X轴
-            constrain='domain'  # 确保比例固定
-        ),
-        yaxis=dict(
-            range=[51.30, 51.72],
-            showgrid=False,
-            zeroline=False,
-            visible=False,
-            fixedrange=True,  # 锁定Y轴
-            scaleanchor="x",
-            scaleratio=1.2,
-            constrain='domain'  # 确保比例固定
-        ),
-        height=600,
-        margin=dict(l=0, r=0, t=40, b=0),
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        dragmode=False,  # 禁用拖动
-        hovermode='closest',
-        showlegend=True,
-        legend=dict(
-            yanchor="top",
-            y=0.99,
-            xanchor="left",
-            x=0.01,
-            bgcolor='rgba(255,255,255,0.8)',
-            bordercolor='rgba(0,0,0,0.1)',
-            borderwidth=1,
-            itemsizing='constant'
-        ),
-        modebar=dict(
-            remove=[
-                "zoom",
-                "pan",
-                "select",
-                "lasso",
-                "zoomIn",
-                "zoomOut",
-                "autoScale",
-                "resetScale",
-                "toImage",
-                "resetViews",
-                "toggleSpikelines"
-            ],
-            orientation='v'
-        ),
-        clickmode='event'  # 只允许点击事件
-    )
-    
-    # 2. 创建区域统计信息
-    stats_content = html.Div("Click an area to see details")
-    if click_data:
-        try:
-            point_data = click_data['points'][0]
-            area_name = point_data['customdata'] if 'customdata' in point_data else point_data['text'].split('<br>')[0].replace('<b>', '').replace('</b>', '')
-            
-            area_data = df[df['Area'] == area_name]
-            
-            if not area_data.empty:
-                # 获取选定时间范围内的数据
-                period_data = area_data[
-                    (area_data['Year'] >= year_range[0]) & 
-                    (area_data['Year'] <= year_range[1])
-                ]
-                
-                # 计算变化
-                if len(period_data) > 1:  # 如果有多个年份的数据
-                    start_rate = period_data[period_data['Year'] == year_range[0]]['Recycling_Rates'].values[0]
-                    end_rate = period_data[period_data['Year'] == year_range[1]]['Recycling_Rates'].values[0]
-                    change = end_rate - start_rate
-                    # 根据变化值设置颜色
-                    change_color = "red" if change > 0 else "green" if change < 0 else "black"
-                    change_text = html.Span(
-                        f"{change:+.1f}%",
-                        style={'color': change_color, 'font-weight': 'bold'}
-                    )
-                else:
-                    change_text = "N/A"
-                
-                # 获取最新年份的数据用于显示当前回收率
-                current_data = period_data[period_data['Year'] == year_range[1]].iloc[0]
-                
-                stats_content = html.Div([
-                    html.H4(area_name, className="mb-3"),
-                    html.Div([
-                        html.P([
-                            html.Strong("Postcode: "),
-                            LONDON_POSTCODES.get(area_name, "N/A")
-                        ]),
-                        html.P([
-                            html.Strong("Region Type: "),
-                            current_data['London_Status']
-                        ]),
-                        html.P([
-                            html.Strong("Recycling Rate: "),
-                            f"{current_data['Recycling_Rates']:.1f}%"
-                        ]),
-                        html.P([
-                            html.Strong("Change over period: "),
-                            change_text
-                        ])
-                    ], className="area-stats")
-                ])
-        except Exception as e:
-            print(f"Error processing click data: {e}")
-            stats_content = html.Div("Error loading area details")
-
-    # 3. 创建趋势图表，添加选定时间范围的高亮
-    trend_fig = go.Figure()
-    if click_data:
-        try:
-            point_data = click_data['points'][0]
-            area_name = point_data['customdata'] if 'customdata' in point_data else point_data['text'].split('<br>')[0].replace('<b>', '').replace('</b>', '')
-            area_trend = df[df['Area'] == area_name]
-            
-            if not area_trend.empty:
-                # 添加灰色背景来显示选定的时间范围
-                trend_fig.add_vrect(
-                    x0=year_range[0],
-                    x1=year_range[1],
-                    fillcolor="rgba(128, 128, 128, 0.2)",
-                    layer="below",
-                    line_width=0,
-                    annotation_text="Selected Period" if year_range[0] != year_range[1] else "Selected Year",
-                    annotation_position="top left"
-                )
-
-                # 添加趋势线
-                trend_fig.add_trace(go.Scatter(
-                    x=area_trend['Year'],
-                    y=area_trend['Recycling_Rates'],
-                    mode='lines+markers',
-                    name=area_name,
-                    line=dict(color='#4e79a7' if area_trend.iloc[0]['London_Status'] == 'Core London' else '#f28e2b')
-                ))
-                
-                trend_fig.update_layout(
-                    title=f"Recycling Rate Trend for {area_name}",
-                    xaxis_title="Year",
-                    yaxis_title="Recycling Rate (%)",
-                    height=300,
-                    margin=dict(l=40, r=20, t=40, b=30),
-                    hovermode='x unified',
-                    yaxis=dict(range=[0, max(area_trend['Recycling_Rates']) * 1.1]),
-                    showlegend=False
-                )
-        except Exception as e:
-            print(f"Error creating trend chart: {e}")
-            trend_fig.update_layout(
-                title="Error loading trend data",
-                height=300,
-                margin=dict(l=40, r=20, t=40, b=30)
-            )
+    # 1. 创建地图：边界数据完整时画分级统计图，否则使用背景图片
+    map_fig = london_map_figure(year_range[0], title_text, LONDON_COORDS)
     
     # 创建额外的图表和指标
     # 1. 创建回收率分布箱线图
@@ -600,7 +386,52 @@ def update_all_components(year_range, click_data):
         height=400
     )
     
-    # 3. 计算关键指标
+    # 创建教育程度与回收率的相关性散点图
+    edu_corr_fig = go.Figure()
+    
+    # 各区域在所选时间段第一年的高等教育比例与回收率（与地图使用相同的区域和年份）
+    index = get_area_index()
+    map_areas = np.array([area for area in LONDON_COORDS if index.position(area) is not None],
+                         dtype=object)
+    positions = index.positions(map_areas)
+    map_rates = index.cross_section('Recycling_Rates', year_range[0])[positions]
+    map_statuses = index.attributes['London_Status'][positions]
+    education = get_education_matrices()
+    first_year = index.year_pos.get(int(year_range[0]))
+    higher_edu_rates = (education['Higher Education'][positions, first_year]
+                        if first_year is not None else np.full(len(positions), np.nan))
+    
+    for status in ['Core London', 'Outer London']:
+        selected = map_statuses == status
+        edu_corr_fig.add_trace(go.Scatter(
+            x=higher_edu_rates[selected],
+            y=map_rates[selected],
+            mode='markers',
+            name=status,
+            text=map_areas[selected],
+            marker=dict(size=10),
+            hovertemplate="<b>%{text}</b><br>" +
+                        "Higher Education: %{x:.1f}%<br>" +
+                        "Recycling Rate: %{y:.1f}%<br>" +
+                        "<extra></extra>"
+        ))
+    
+    edu_corr_fig.update_layout(
+        title=f"Higher Education vs Recycling Rate ({selected_year})",
+        xaxis_title="Population with Higher Education (%)",
+        yaxis_title="Recycling Rate (%)",
+        height=400
+    )
+    
+    return map_fig, dist_fig, corr_fig, edu_corr_fig
+
+
+# 关键指标卡片：默认在浏览器中计算（assets/clientside.js），关闭客户端模式时由服务器计算
+def update_kpis(year_range):
+    df = load_data()
+    selected_year = year_range[0]
+    year_data = df[(df['Year'] >= year_range[0]) & (df['Year'] <= year_range[1])]
+
     avg_rate = f"{year_data['Recycling_Rates'].mean():.1f}%"
     top_area = year_data.loc[year_data['Recycling_Rates'].idxmax()]
     top_performer = f"{top_area['Area']} ({top_area['Recycling_Rates']:.1f}%)"
@@ -619,26 +450,130 @@ def update_all_components(year_range, click_data):
     gap = core_rate - outer_rate
     gap_text = f"{gap:+.1f}%"
 
+    return avg_rate, top_performer, yoy_text, gap_text
+
+KPI_OUTPUTS = [Output("avg-recycling-rate", "children"),
+               Output("top-performer", "children"),
+               Output("year-on-year", "children"),
+               Output("recycling-gap", "children")]
+
+if CLIENTSIDE_ENABLED:
+    clientside_callback(
+        ClientsideFunction(namespace='recycling', function_name='areaKpis'),
+        KPI_OUTPUTS,
+        [Input("year-range-selector", "value"),
+         Input(STORE_ID, "data")]
+    )
+else:
+    update_kpis = callback(KPI_OUTPUTS, [Input("year-range-selector", "value")])(
+        cached_callback(update_kpis))
+    register_warmup(update_kpis, lambda: [(r,) for r in year_ranges()])
+
+
+def triggered_by(component_id):
+    """当前回调是否由指定组件触发（在回调之外调用时返回 False）"""
+    try:
+        return dash.ctx.triggered_id == component_id
+    except Exception:
+        return False
+
+
+def period_highlight(year_range):
+    """趋势图中表示所选时间段的灰色背景及其标注"""
+    fig = go.Figure()
+    fig.add_vrect(
+        x0=year_range[0],
+        x1=year_range[1],
+        fillcolor="rgba(128, 128, 128, 0.2)",
+        layer="below",
+        line_width=0,
+        annotation_text="Selected Period" if year_range[0] != year_range[1] else "Selected Year",
+        annotation_position="top left"
+    )
+    return fig.layout.shapes[0].to_plotly_json(), fig.layout.annotations[0].to_plotly_json()
+
+
+# 依赖所点击区域的组件（统计信息、教育程度分布）
+@callback(
+    [Output("area-stats", "children"),
+     Output("education-distribution", "figure")],
+    [Input("year-range-selector", "value"),
+     Input("area-analysis-map", "clickData")]
+)
+@cached_callback(key=lambda year_range, click_data: (year_range, clicked_area(click_data)))
+def update_area_details(year_range, click_data):
+    index = get_area_index()
+
+    # 创建区域统计信息
+    stats_content = html.Div("Click an area to see details")
+    if click_data:
+        try:
+            area_name = clicked_area(click_data)
+            
+            if index.position(area_name) is not None:
+                # 获取选定时间范围内的数据
+                period_years, period_rates = index.series(area_name, 'Recycling_Rates', year_range)
+                
+                # 计算变化
+                if np.count_nonzero(~np.isnan(period_rates)) > 1:  # 如果有多个年份的数据
+                    start_rate = index.value(area_name, 'Recycling_Rates', year_range[0])
+                    end_rate = index.value(area_name, 'Recycling_Rates', year_range[1])
+                    change = end_rate - start_rate
+                    # 根据变化值设置颜色
+                    change_color = "red" if change > 0 else "green" if change < 0 else "black"
+                    change_text = html.Span(
+                        f"{change:+.1f}%",
+                        style={'color': change_color, 'font-weight': 'bold'}
+                    )
+                else:
+                    change_text = "N/A"
+                
+                # 获取最新年份的数据用于显示当前回收率
+                current_rate = index.value(area_name, 'Recycling_Rates', year_range[1])
+                
+                stats_content = html.Div([
+                    html.H4(area_name, className="mb-3"),
+                    html.Div([
+                        html.P([
+                            html.Strong("Postcode: "),
+                            LONDON_POSTCODES.get(area_name, "N/A")
+                        ]),
+                        html.P([
+                            html.Strong("Region Type: "),
+                            index.attribute(area_name, 'London_Status')
+                        ]),
+                        html.P([
+                            html.Strong("Recycling Rate: "),
+                            f"{current_rate:.1f}%"
+                        ]),
+                        html.P([
+                            html.Strong("Change over period: "),
+                            change_text
+                        ])
+                    ], className="area-stats")
+                ])
+        except Exception as e:
+            logger.error("Error processing click data: %s", e)
+            stats_content = html.Div("Error loading area details")
+
     # 创建教育程度分布柱状图
     edu_dist_fig = go.Figure()
     if click_data:
-        point_data = click_data['points'][0]
-        area_name = point_data['customdata'] if 'customdata' in point_data else point_data['text'].split('<br>')[0].replace('<b>', '').replace('</b>', '')
+        area_name = clicked_area(click_data)
+        
+        area_pos = index.position(area_name)
         
-        if area_name in EDUCATION_DATA:
-            edu_data = EDUCATION_DATA[area_name]
-            education_levels = ['Higher Education', 'A-Level or Equivalent', 'GCSE or Equivalent', 
-                              'Other Qualifications', 'No Qualifications']
-            colors = ['#4e79a7', '#f28e2b', '#e15759', '#76b7b2', '#59a14f']
+        if area_pos is not None:
+            education = get_education_matrices()
+            colors = ['#4e79a7', '#f28e2b', '#e15759']
             
-            # 生成年度数据
-            years = list(range(year_range[0], year_range[1] + 1))
+            # 所选时间段内的年度数据
+            year_slice = index.year_slice(year_range)
+            years = index.years[year_slice]
             
             # 为每个教育水平创建柱状图
-            for level, color in zip(education_levels, colors):
-                base_value = edu_data[level]
-                # 生成略微波动的年度数据
-                values = [base_value * (1 + np.random.uniform(-0.05, 0.05)) for _ in years]
+            for (level, values), color in zip(education.items(), colors):
+                values = values[area_pos, year_slice]
                 
                 edu_dist_fig.add_trace(go.Bar(
                     name=level,
@@ -686,47 +621,74 @@ def update_all_components(year_range, click_data):
             height=400
         )
     
-    # 创建教育程度与回收率的相关性散点图
-    edu_corr_fig = go.Figure()
-    
-    # 计算每个地区的高等教育比例与回收率的关系
-    higher_edu_rates = []
-    recycling_rates = []
-    areas = []
-    area_types = []
-    
-    for area in year_data['Area']:
-        if area in EDUCATION_DATA:
-            higher_edu_rates.append(EDUCATION_DATA[area]['Higher Education'])
-            recycling_rates.append(float(year_data[year_data['Area'] == area]['Recycling_Rates'].values[0]))
-            areas.append(area)
-            area_types.append(year_data[year_data['Area'] == area]['London_Status'].values[0])
-    
-    for status in ['Core London', 'Outer London']:
-        mask = [t == status for t in area_types]
-        edu_corr_fig.add_trace(go.Scatter(
-            x=[higher_edu_rates[i] for i in range(len(mask)) if mask[i]],
-            y=[recycling_rates[i] for i in range(len(mask)) if mask[i]],
-            mode='markers',
-            name=status,
-            text=[areas[i] for i in range(len(mask)) if mask[i]],
-            marker=dict(size=10),
-            hovertemplate="<b>%{text}</b><br>" +
-                        "Higher Education: %{x:.1f}%<br>" +
-                        "Recycling Rate: %{y:.1f}%<br>" +
-                        "<extra></extra>"
-        ))
-    
-    edu_corr_fig.update_layout(
-        title=f"Higher Education vs Recycling Rate ({selected_year})",
-        xaxis_title="Population with Higher Education (%)",
-        yaxis_title="Recycling Rate (%)",
-        height=400
-    )
+    return stats_content, edu_dist_fig
+
+
+# 区域趋势图：点击区域时重新绘制；只改变年份范围时用 Patch 仅更新高亮区域
+@callback(
+    Output("area-trend-chart", "figure"),
+    [Input("year-range-selector", "value"),
+     Input("area-analysis-map", "clickData")]
+)
+def update_area_trend(year_range, click_data):
+    area_name = clicked_area(click_data)
+    if area_name is not None and triggered_by("year-range-selector"):
+        trend_years, _ = get_area_index().series(area_name, 'Recycling_Rates')
+        if trend_years.size:
+            # 趋势线本身与年份范围无关，只替换灰色背景和标注
+            shape, annotation = period_highlight(year_range)
+            patched = Patch()
+            patched['layout']['shapes'] = [shape]
+            patched['layout']['annotations'] = [annotation]
+            return patched
+    return area_trend_figure(year_range, area_name)
+
+
+@cached_callback
+def area_trend_figure(year_range, area_name):
+    """完整的区域趋势图，添加选定时间范围的高亮"""
+    index = get_area_index()
+    trend_fig = go.Figure()
+    if area_name is not None:
+        try:
+            trend_years, trend_rates = index.series(area_name, 'Recycling_Rates')
+            
+            if trend_years.size:
+                # 添加灰色背景来显示选定的时间范围
+                shape, annotation = period_highlight(year_range)
+                trend_fig.update_layout(shapes=[shape], annotations=[annotation])
+
+                # 添加趋势线
+                trend_fig.add_trace(go.Scatter(
+                    x=trend_years,
+                    y=trend_rates,
+                    mode='lines+markers',
+                    name=area_name,
+                    line=dict(color='#4e79a7' if index.attribute(area_name, 'London_Status') == 'Core London' else '#f28e2b')
+                ))
+                
+                trend_fig.update_layout(
+                    title=f"Recycling Rate Trend for {area_name}",
+                    xaxis_title="Year",
+                    yaxis_title="Recycling Rate (%)",
+                    height=300,
+                    margin=dict(l=40, r=20, t=40, b=30),
+                    hovermode='x unified',
+                    yaxis=dict(range=[0, np.nanmax(trend_rates) * 1.1]),
+                    showlegend=False
+                )
+        except Exception as e:
+            logger.error("Error creating trend chart: %s", e)
+            trend_fig.update_layout(
+                title="Error loading trend data",
+                height=300,
+                margin=dict(l=40, r=20, t=40, b=30)
+            )
     
-    return (map_fig, stats_content, trend_fig, dist_fig, corr_fig, 
-            avg_rate, top_performer, yoy_text, gap_text, 
-            edu_dist_fig, edu_corr_fig)
+    return trend_fig
+
+# 启动预热：每个单独年份以及完整范围
+register_warmup(update_year_components, lambda: [(r,) for r in year_ranges()])
 
 @callback(
     Output('year-range-selector', 'value'),
@@ -735,10 +697,3 @@ def update_all_components(year_range, click_data):
 def update_time_selector(value):
     return value
 
-# 其他回调函数将在后续实现... 
-
-def get_year_range():
-    df = load_data()
-    min_year = df['Year'].min()
-    max_year = df['Year'].max()
-    return min_year, max_year 
\ No newline at end of file
@@ -11,22 +11,19 @@ from utils.recycling_figures import (
     recycling_bar_chart,
     recycling_scatter_plot
 )
-from utils import load_data
-import plotly.express as px
+from utils.area_index import get_area_index
+from utils.aggregates import get_cube
+from utils.cache import FigureCache, cached_callback, normalise
+from utils.data_store import get_store
+from utils.groups import get_area_groups
+from utils.warmup import register_warmup, year_ranges
 import pandas as pd
 import dash
+import logging
 import numpy as np
+import threading
 
-# 添加数据验证
-print("\n=== Data Validation ===")
-test_df = load_data()
-if test_df is not None and not test_df.empty:
-    print(f"Data loaded successfully. Shape: {test_df.shape}")
-    print("Columns:", test_df.columns.tolist())
-    print("Sample data:")
-    print(test_df.head())
-else:
-    print("Error: Failed to load data")
+logger = logging.getLogger(__name__)
 
 # 注册页面
 register_page(
@@ -37,15 +34,9 @@ register_page(
     location="recycling"
 )
 
-# 在布局开始前添加打印
-print("Initializing comparison page layout...")
-
-# 在布局之前加载数据
-df = load_data()
-
 def get_area_options():
-    """获取区域选项"""
-    df = load_data()
+    """获取区域选项（来自分组索引）"""
+    groups = get_area_groups()
     return [
         {'label': '--- Overview Groups ---', 'value': 'group_header', 'disabled': True},
         {'label': 'All Areas', 'value': 'all'},
@@ -60,130 +51,129 @@ def get_area_options():
         {'label': 'Top 5 Non-London', 'value': 'top_5_non_london'},
         {'label': 'Bottom 5 Non-London', 'value': 'bottom_5_non_london'},
         {'label': '--- London Boroughs ---', 'value': 'london_boroughs_header', 'disabled': True},
-    ] + [
-        {'label': area, 'value': area} 
-        for area in sorted(df[df['London_Status'].isin(['Core London', 'Outer London'])]['Area'].unique())
-    ] + [
+    ] + groups.area_options('london_all') + [
         {'label': '--- Non-London Areas ---', 'value': 'non_london_header', 'disabled': True},
-    ] + [
-        {'label': area, 'value': area}
-        for area in sorted(df[df['London_Status'] == 'Non-London']['Area'].unique())
-    ]
+    ] + groups.area_options('non_london')
 
 # 定义布局
-layout = dbc.Container([
-    # 标题
-    dbc.Row([
-        dbc.Col(
-            html.H1("Regional Comparison", className="text-center mb-4")
-        )
-    ]),
-    
-    # 区域选择
-    dbc.Row([
-        dbc.Col([
-            html.Label('Select Areas:', className='mb-2'),
-            dcc.Dropdown(
-                id='comparison-area-selector',
-                options=get_area_options(),
-                value=['london_all'],
-                multi=True
+def layout(**kwargs):
+    """页面布局；区域选项在访问页面时才生成"""
+    container = dbc.Container([
+        # 标题
+        dbc.Row([
+            dbc.Col(
+                html.H1("Regional Comparison", className="text-center mb-4")
             )
-        ])
-    ], className='mb-4'),
+        ]),
     
-    # 时间选择
-    dbc.Row([
-        dbc.Col([
-            html.Label('Select Time Range:', className='mb-2'),
-            dcc.RangeSlider(
-                id='comparison-year-range',
-                min=2003,
-                max=2022,
-                value=[2003, 2022],
-                marks={year: str(year) for year in range(2003, 2023, 2)},
-                tooltip={'placement': 'bottom', 'always_visible': True}
-            )
-        ])
-    ], className='mb-4'),
-    
-    # 图表类型选择
-    dbc.Row([
-        dbc.Col([
-            html.Label("Chart Type:", className="mb-2"),
-            dbc.RadioItems(
-                id='comparison-chart-type',
-                options=[
-                    {'label': 'Line Chart', 'value': 'line'},
-                    {'label': 'Bar Chart', 'value': 'bar'},
-                    {'label': 'Area Chart', 'value': 'area'}
-                ],
-                value='line',
-                inline=True,
-                className="mb-3"
-            )
-        ])
-    ], className='mb-4'),
-    
-    # 主要趋势图
-    dbc.Row([
-        dbc.Col(
-            dbc.Card([
-                dbc.CardHeader("Recycling Rate Trends"),
-                dbc.CardBody(
-                    dcc.Graph(id='comparison-trend-chart')
+        # 区域选择
+        dbc.Row([
+            dbc.Col([
+                html.Label('Select Areas:', className='mb-2'),
+                dcc.Dropdown(
+                    id='comparison-area-selector',
+                    options=get_area_options(),
+                    value=['london_all'],
+                    multi=True
                 )
             ])
-        )
-    ], className='mb-4'),
+        ], className='mb-4'),
     
-    # 下方的统计图表
-    dbc.Row([
-        dbc.Col(
-            dbc.Card([
-                dbc.CardHeader("Population Trends"),
-                dbc.CardBody(
-                    dcc.Graph(id='comparison-population-chart')
+        # 时间选择
+        dbc.Row([
+            dbc.Col([
+                html.Label('Select Time Range:', className='mb-2'),
+                dcc.RangeSlider(
+                    id='comparison-year-range',
+                    min=2003,
+                    max=2022,
+                    value=[2003, 2022],
+                    marks={year: str(year) for year in range(2003, 2023, 2)},
+                    tooltip={'placement': 'bottom', 'always_visible': True}
                 )
-            ]),
-            width=6
-        ),
-        dbc.Col(
-            dbc.Card([
-                dbc.CardHeader("Population Density"),
-                dbc.CardBody(
-                    dcc.Graph(id='comparison-density-chart')
-                )
-            ]),
-            width=6
-        )
-    ], className='mb-4'),
+            ])
+        ], className='mb-4'),
     
-    # 统计信息
-    dbc.Row([
-        dbc.Col(
-            dbc.Card([
-                dbc.CardHeader("Statistics"),
-                dbc.CardBody(id='comparison-trend-stats')
+        # 图表类型选择
+        dbc.Row([
+            dbc.Col([
+                html.Label("Chart Type:", className="mb-2"),
+                dbc.RadioItems(
+                    id='comparison-chart-type',
+                    options=[
+                        {'label': 'Line Chart', 'value': 'line'},
+                        {'label': 'Bar Chart', 'value': 'bar'},
+                        {'label': 'Area Chart', 'value': 'area'}
+                    ],
+                    value='line',
+                    inline=True,
+                    className="mb-3"
+                )
             ])
-        )
-    ])
-], fluid=True)
+        ], className='mb-4'),
+    
+        # 主要趋势图
+        dbc.Row([
+            dbc.Col(
+                dbc.Card([
+                    dbc.CardHeader("Recycling Rate Trends"),
+                    dbc.CardBody(
+                        dcc.Graph(id='comparison-trend-chart')
+                    )
+                ])
+            )
+        ], className='mb-4'),
+    
+        # 下方的统计图表
+        dbc.Row([
+            dbc.Col(
+                dbc.Card([
+                    dbc.CardHeader("Population Trends"),
+                    dbc.CardBody(
+                        dcc.Graph(id='comparison-population-chart')
+                    )
+                ]),
+                width=6
+            ),
+            dbc.Col(
+                dbc.Card([
+                    dbc.CardHeader("Population Density"),
+                    dbc.CardBody(
+                        dcc.Graph(id='comparison-density-chart')
+                    )
+                ]),
+                width=6
+            )
+        ], className='mb-4'),
+    
+        # 统计信息
+        dbc.Row([
+            dbc.Col(
+                dbc.Card([
+                    dbc.CardHeader("Statistics"),
+                    dbc.CardBody(id='comparison-trend-stats')
+                ])
+            )
+        ])
+    ], fluid=True)
+
+    # 验证布局组件（只在 DEBUG 级别遍历）
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Layout components: %s", layout_component_ids(container))
+    return container
+
 
-# 验证布局组件
-print("\n=== Layout Validation ===")
-if layout is not None:
+def layout_component_ids(container):
+    """布局中 行 -> 列 -> 组件 这一层带 id 的组件"""
     components = []
-    for row in layout.children:
+    for row in container.children:
         if hasattr(row, 'children'):
             for col in row.children:
                 if hasattr(col, 'children'):
                     for component in col.children:
                         if hasattr(component, 'id'):
                             components.append(component.id)
-    print(f"Layout components: {components}")
-else:
-    print("Error: Layout is None")
+    return components
 
 # 回调部分修改
 @callback(
@@ -192,21 +182,20 @@ else:
      Input('comparison-year-range', 'value'),
      Input('comparison-chart-type', 'value')]
 )
+@cached_callback
 def update_trend_chart(selected_areas, year_range, chart_type):
     """更新趋势图"""
-    print("\n=== Callback Triggered ===")
-    print(f"Selected areas: {selected_areas}")
-    print(f"Year range: {year_range}")
-    print(f"Chart type: {chart_type}")
+    logger.debug("Trend chart: areas=%s, years=%s, chart=%s",
+                 selected_areas, year_range, chart_type)
 
     if not selected_areas or not year_range or not chart_type:
-        print("Missing required inputs")
+        logger.debug("Missing required inputs")
         return {}
 
     df_filtered = get_filtered_data(selected_areas, year_range)
     
     if df_filtered.empty:
-        print("No data returned from get_filtered_data")
+        logger.debug("No data returned from get_filtered_data")
         return {
             'data': [],
             'layout': {
@@ -223,10 +212,8 @@ def update_trend_chart(selected_areas, year_range, chart_type):
             }
         }
 
-    print(f"Data filtered successfully. Shape: {df_filtered.shape}")
-    print("Areas in filtered data:", df_filtered['Area'].unique())
-    print("Sample of filtered data:")
-    print(df_filtered.head())
+    logger.debug("Filtered data shape: %s, areas: %s", df_filtered.shape, df_filtered['Area'].unique())
+    logger.debug("Sample of filtered data:\n%s", df_filtered.head())
 
     fig = create_trend_chart(df_filtered, chart_type)
     return fig
@@ -236,12 +223,14 @@ def update_trend_chart(selected_areas, year_range, chart_type):
     [Input('comparison-area-selector', 'value'),
      Input('comparison-year-range', 'value')]
 )
+@cached_callback
 def update_population_chart(selected_areas, year_range):
     """更新人口趋势图"""
     if not selected_areas or not year_range:  # 添加输入验证
         return {}
         
-    df_filtered = get_filtered_data(selected_areas, year_range)
+    # 与趋势图、统计信息共用同一次过滤结果
+    df_filtered = get_area_records(selected_areas, year_range, ['Area', 'Year', 'Population'])
     return create_population_chart(df_filtered)
 
 @callback(
@@ -249,12 +238,13 @@ def update_population_chart(selected_areas, year_range):
     [Input('comparison-area-selector', 'value'),
      Input('comparison-year-range', 'value')]
 )
+@cached_callback
 def update_density_chart(selected_areas, year_range):
     """更新密度趋势图"""
     if not selected_areas or not year_range:  # 添加输入验证
         return {}
         
-    df_filtered = get_filtered_data(selected_areas, year_range)
+    df_filtered = get_area_records(selected_areas, year_range, ['Area', 'Year', 'Population_Density'])
     return create_density_chart(df_filtered)
 
 @callback(
@@ -262,6 +252,7 @@ def update_density_chart(selected_areas, year_range):
     [Input('comparison-area-selector', 'value'),
      Input('comparison-year-range', 'value')]
 )
+@cached_callback
 def update_stats(selected_areas, year_range):
     """更新统计信息"""
     if not selected_areas or not year_range:  # 添加输入验证
@@ -270,188 +261,120 @@ def update_stats(selected_areas, year_range):
     df_filtered = get_filtered_data(selected_areas, year_range)
     return create_stats_cards(df_filtered)
 
+# 启动预热：默认区域选择下的完整范围
+register_warmup(update_trend_chart, lambda: [
+    (['london_all'], r, chart_type)
+    for r in year_ranges(single_years=False)
+    for chart_type in ['line', 'bar', 'area']
+])
+for _func in (update_population_chart, update_density_chart, update_stats):
+    register_warmup(_func, lambda: [(['london_all'], r) for r in year_ranges(single_years=False)])
+
 # 辅助函数
-def get_filtered_data(selected_areas, year_range):
-    """获取过滤后的数据"""
-    df = load_data()
-    print("\n" + "="*50)
-    print("DEBUG OUTPUT START")
-    print("="*50)
-    print(f"Selected areas: {selected_areas}")
-    print(f"Year range: {year_range}")
-    print(f"Original data shape: {df.shape}")
-    
-    # 检查数据
-    print("\nUnique London statuses:", df['London_Status'].unique())
-    print("\nSample of Recycling Rates:")
-    print(df[['Area', 'London_Status', 'Year', 'Recycling_Rates']].head(10))
+# 同一次交互中四个回调的 (区域选择, 年份范围) 相同：过滤结果按输入和数据版本短暂缓存，
+# 只计算一次，其余回调直接复用
+_filtered_cache = FigureCache(max_entries=32, max_bytes=32 * 1024 * 1024)
+# 正在构建的键 -> 锁：相同输入的并发回调等待同一次构建，不同输入互不阻塞
+_building = {}
+_building_lock = threading.Lock()
 
-    # 如果没有选择任何区域，返回空数据框
-    if not selected_areas:
-        print("No areas selected")
-        return pd.DataFrame()
+# 均值类选择 -> [(聚合立方体中的分组, 显示名称)]
+AVERAGE_SELECTIONS = {
+    'london_vs_non': [('London Overall', 'London Average'), ('Non-London', 'Non-London Average')],
+}
 
-    # 创建基础年份过滤
-    df = df[(df['Year'] >= year_range[0]) & (df['Year'] <= year_range[1])]
-    print(f"Data after year filtering: {df.shape}")
+def filter_selection(selected_areas, year_range):
+    """返回 (区域记录, 区域记录 + 均值行)，同一输入只过滤一次"""
+    key = (get_store().version, normalise(selected_areas), normalise(year_range))
+    found, value = _filtered_cache.get(key)
+    if found:
+        return value
+    with _building_lock:
+        key_lock = _building.setdefault(key, threading.Lock())
+    try:
+        with key_lock:
+            # 并发到达的同一输入的其他回调可能已经算好
+            found, value = _filtered_cache.get(key)
+            if not found:
+                value = build_filtered_data(selected_areas, year_range)
+                size = sum(int(frame.memory_usage(index=False).sum()) for frame in value)
+                _filtered_cache.put(key, value, size=size)
+    finally:
+        with _building_lock:
+            _building.pop(key, None)
+    return value
 
-    # 存储所有过滤后的数据
-    filtered_dfs = []
+def build_filtered_data(selected_areas, year_range):
+    """按区域选择和年份范围过滤，记录按选择顺序排列
 
-    for area in selected_areas:
-        print(f"\nProcessing area: {area}")
-        
-        if area == 'bottom_5_london':
-            try:
-                # 获取最新年份的伦敦数据
-                latest_year = df['Year'].max()
-                print(f"Processing bottom 5 London for year {latest_year}")
-                
-                # 获取最新年份的伦敦数据
-                latest_london_data = df[
-                    (df['Year'] == latest_year) & 
-                    df['London_Status'].isin(['Core London', 'Outer London'])
-                ]
-                
-                # 确保数据已排序
-                latest_london_data = latest_london_data.sort_values('Recycling_Rates')
-                print("\nRecycling rates for all London areas:")
-                print(latest_london_data[['Area', 'Recycling_Rates']].to_string())
-                
-                # 获取底部5个区域
-                bottom_areas = latest_london_data['Area'].head(5).tolist()
-                print(f"\nSelected bottom 5 areas: {bottom_areas}")
-                
-                # 获取这些区域的所有年份数据
-                bottom_data = df[df['Area'].isin(bottom_areas)]
-                print(f"Found {len(bottom_data)} records for these areas")
-                
-                if not bottom_data.empty:
-                    filtered_dfs.append(bottom_data)
-                    print("Data added successfully")
-                
-            except Exception as e:
-                print(f"Error in bottom_5_london: {str(e)}")
-                import traceback
-                print(traceback.format_exc())
-
-        elif area == 'bottom_5_non_london':
-            try:
-                # 获取最新年份的非伦敦数据
-                latest_year = df['Year'].max()
-                print(f"Latest year: {latest_year}")
-                
-                # 获取非伦敦数据
-                non_london_mask = df['London_Status'] == 'Non-London'
-                non_london_data = df[non_london_mask]
-                print(f"Total Non-London data records: {len(non_london_data)}")
-                
-                # 获取最新年份的数据
-                latest_non_london_data = non_london_data[non_london_data['Year'] == latest_year]
-                print(f"Latest year Non-London data records: {len(latest_non_london_data)}")
-                print("Available areas:", latest_non_london_data['Area'].unique())
-                print("Recycling rates:", latest_non_london_data[['Area', 'Recycling_Rates']].to_string())
-                
-                # 获取后5名区域
-                bottom_areas = latest_non_london_data.sort_values('Recycling_Rates')['Area'].head(5).unique()
-                print(f"Bottom 5 Non-London areas: {bottom_areas}")
-                
-                # 获取这些区域的所有年份数据
-                bottom_data = df[df['Area'].isin(bottom_areas)]
-                print(f"Found {len(bottom_data)} records for bottom 5 areas")
-                
-                if not bottom_data.empty:
-                    filtered_dfs.append(bottom_data)
-                    print("Successfully added bottom 5 Non-London data")
-                else:
-                    print("Warning: No data found for bottom 5 Non-London areas")
-                    
-            except Exception as e:
-                print(f"Error processing bottom 5 Non-London: {str(e)}")
-        
-        elif area == 'all':
-            filtered_dfs.append(df.copy())
-            print("Added all data")
-            
-        elif area == 'london_vs_non':
-            # 计算伦敦平均值
-            london_data = df[df['London_Status'].isin(['Core London', 'Outer London'])]
-            london_avg = london_data.groupby('Year')['Recycling_Rates'].mean().reset_index()
-            london_avg['Area'] = 'London Average'
-            
-            # 计算非伦敦平均值
-            non_london_data = df[df['London_Status'] == 'Non-London']
-            non_london_avg = non_london_data.groupby('Year')['Recycling_Rates'].mean().reset_index()
-            non_london_avg['Area'] = 'Non-London Average'
-            
-            filtered_dfs.extend([london_avg, non_london_avg])
-            print("Added London vs Non-London averages")
-            
-        elif area == 'london_all':
-            london_data = df[df['London_Status'].isin(['Core London', 'Outer London'])]
-            filtered_dfs.append(london_data)
-            print(f"Added all London data: {len(london_data)} records")
-            
-        elif area == 'core_london':
-            core_data = df[df['London_Status'] == 'Core London']
-            filtered_dfs.append(core_data)
-            print(f"Added Core London data: {len(core_data)} records")
-            
-        elif area == 'outer_london':
-            outer_data = df[df['London_Status'] == 'Outer London']
-            filtered_dfs.append(outer_data)
-            print(f"Added Outer London data: {len(outer_data)} records")
-            
-        elif area == 'top_5_london':
-            # 获取最新年份的伦敦数据
-            latest_year = df['Year'].max()
-            print(f"Latest year for Top 5: {latest_year}")
-            
-            london_data = df[df['London_Status'].isin(['Core London', 'Outer London'])]
-            latest_london_data = london_data[london_data['Year'] == latest_year]
-            print(f"Latest London data shape: {latest_london_data.shape}")
-            
-            # 获取前5名区域
-            top_areas = latest_london_data.nlargest(5, 'Recycling_Rates')['Area'].unique()
-            print(f"Top 5 London areas identified: {top_areas}")
-            
-            # 获取这些区域的所有年份数据
-            top_data = df[df['Area'].isin(top_areas)]
-            print(f"Found {len(top_data)} records for top 5 areas")
-            if not top_data.empty:
-                filtered_dfs.append(top_data)
-            
-        else:
-            # 处理单个区域选择
-            print(f"Looking for area: {area}")
-            area_data = df[df['Area'] == area]
-            print(f"Found {len(area_data)} records")
-            if not area_data.empty:
-                filtered_dfs.append(area_data)
-                print(f"Added data for area: {area}")
-            else:
-                print(f"Warning: No data found for area: {area}")
-                print(f"Available areas: {df['Area'].unique()}")
-    
-    # 合并所有过滤后的数据
-    if filtered_dfs:
-        result = pd.concat(filtered_dfs, ignore_index=True)
-        print("\n=== Final Results ===")
-        print(f"Shape: {result.shape}")
-        print("Areas included:", result['Area'].unique())
-        print("Sample data:")
-        print(result.head())
-        return result
+    每个区域类选择只取之前的选择中没有出现过的区域（重叠的选择不重复），
+    所有区域位置合并后一次切片取出；均值类选择的行插在它在选择列表中的位置。
+    """
+    logger.debug("Filtering data: areas=%s, years=%s", selected_areas, year_range)
+    index = get_area_index()
+    groups = get_area_groups()
+
+    seen = np.zeros(len(index.areas), dtype=bool)
+    chunks = []   # 每个区域类选择新增的区域位置
+    inserts = []  # (插入点之前的区域数, 均值行)
+    cube = None
+    for selection in selected_areas or []:
+        if selection in AVERAGE_SELECTIONS:
+            cube = cube or get_cube()
+            averages = []
+            for group, label in AVERAGE_SELECTIONS[selection]:
+                years, means = cube.series('Recycling_Rates', group, year_range=year_range)
+                valid = ~np.isnan(means)
+                averages.append(pd.DataFrame({'Year': years[valid],
+                                              'Recycling_Rates': means[valid],
+                                              'Area': label}))
+            inserts.append((sum(len(chunk) for chunk in chunks), averages))
+            continue
+        if (selection not in groups and not selection.endswith('_header')
+                and index.position(selection) is None):
+            logger.warning("No data found for area: %s", selection)
+            continue
+        positions = groups.resolve([selection], year_range)
+        positions = positions[~seen[positions]]
+        seen[positions] = True
+        chunks.append(positions)
+
+    positions = np.concatenate(chunks) if chunks else np.empty(0, dtype=int)
+    rows = index.take(positions, year_range).reset_index(drop=True)
+
+    if inserts:
+        # 区域记录按区域、年份排列：用每个区域的记录数找到均值行的插入点
+        offsets = np.concatenate([[0], np.cumsum(index.row_counts(positions, year_range))])
+        frames, start = [], 0
+        for n_areas, averages in inserts:
+            frames.append(rows.iloc[start:offsets[n_areas]])
+            frames.extend(averages)
+            start = offsets[n_areas]
+        frames.append(rows.iloc[start:])
+        result = pd.concat([frame for frame in frames if not frame.empty], ignore_index=True)
     else:
-        print("\nNo data to return")
+        result = rows if not rows.empty else pd.DataFrame()
+    logger.debug("Filtered data: %d area records, %d rows in total", len(rows), len(result))
+    return rows, result
+
+def get_filtered_data(selected_areas, year_range):
+    """获取过滤后的数据（区域记录和均值行）"""
+    if not selected_areas:
+        logger.debug("No areas selected")
         return pd.DataFrame()
+    # 返回浅拷贝：图表函数会改写列，不影响缓存中的结果
+    return filter_selection(selected_areas, year_range)[1].copy(deep=False)
+
+def get_area_records(selected_areas, year_range, columns=None):
+    """选中区域的记录（不含均值行），与 get_filtered_data 共用同一次过滤"""
+    rows = filter_selection(selected_areas, year_range)[0]
+    return rows[columns] if columns is not None else rows.copy(deep=False)
 
 def create_trend_chart(df_filtered, chart_type):
     """创建趋势图"""
-    print("\n=== Creating Trend Chart ===")
-    print(f"Chart type: {chart_type}")
-    print(f"Data shape: {df_filtered.shape}")
-    print("Unique areas:", df_filtered['Area'].unique())
+    # 延迟导入：plotly.express 导入较慢，只在第一次生成图表时加载
+    import plotly.express as px
+    logger.debug("Creating %s trend chart: shape=%s", chart_type, df_filtered.shape)
     
     if df_filtered.empty:
         return {}
@@ -511,6 +434,7 @@ def create_trend_chart(df_filtered, chart_type):
 
 def create_population_chart(df_filtered):
     """创建人口趋势图"""
+    import plotly.express as px
     population_fig = px.line(
         df_filtered,
         x='Year',
@@ -536,6 +460,7 @@ def create_population_chart(df_filtered):
 
 def create_density_chart(df_filtered):
     """创建密度趋势图"""
+    import plotly.express as px
     density_fig = px.line(
         df_filtered,
         x='Year',
@@ -562,8 +487,9 @@ def create_density_chart(df_filtered):
 def create_stats_cards(df_filtered):
     """创建统计信息卡片"""
     stats = []
-    for area in df_filtered['Area'].unique():
-        area_data = df_filtered[df_filtered['Area'] == area]
+    if df_filtered.empty:
+        return stats
+    for area, area_data in df_filtered.groupby('Area', sort=False):
         if not area_data.empty:
             stats.append(
                 dbc.Card([
@@ -1,16 +1,26 @@
-from dash import register_page, html, dcc, callback, Input, Output, State, ALL
+import logging
+from dash import register_page, html, dcc, callback, clientside_callback, ClientsideFunction, Input, Output, State, ALL
 import dash_bootstrap_components as dbc
-import plotly.express as px
 import plotly.graph_objects as go
 import dash
 from pathlib import Path
 import sys
 import pandas as pd
+import numpy as np
 from datetime import date
 
 # 添加父目录到 Python 路径
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from utils import load_data
+from utils.data_store import get_store
+from utils.aggregates import get_cube
+from utils.area_index import get_area_index
+from utils.rankings import get_rankings
+from utils.cache import cached_callback
+from utils.client_data import CLIENTSIDE_ENABLED, STORE_ID, register_client_template
+from utils.warmup import register_warmup, year_ranges
+
+logger = logging.getLogger(__name__)
 
 # 注册页面
 register_page(__name__, path='/recycling', name='Recycling Overview')
@@ -157,46 +167,83 @@ layout = dbc.Container([
     ])
 ], fluid=True)
 
+# 统计卡片和趋势图只是对小数据集的年份筛选：默认在浏览器中计算（assets/clientside.js），
+# 关闭客户端模式时由下面的服务器回调计算
+def update_overview_summary(year_range):
+    if year_range is None:
+        year_range = [2022, 2022]  # 提供默认值
+
+    # 1. 计算统计信息（来自预计算的聚合立方体）
+    cube = get_cube()
+
+    def get_stats(status):
+        stats = cube.range_stats('Recycling_Rates', status, year_range)
+        if stats['count'] == 0:
+            return {'avg': 0, 'max': 0, 'min': 0}
+        return stats
+
+    try:
+        # 2. 统计卡片和趋势图
+        return (
+            create_stats_card(get_stats('Core London')),
+            create_stats_card(get_stats('Outer London')),
+            create_stats_card(get_stats('Non-London')),
+            update_trend(year_range),
+            f"({year_range[0]}-{year_range[1]})"
+        )
+    except Exception as e:
+        logger.error("Error in update_overview_summary: %s", e)
+        return ["N/A"] * 5
+
+SUMMARY_OUTPUTS = [Output("core-london-stats", "children"),
+                   Output("outer-london-stats", "children"),
+                   Output("non-london-stats", "children"),
+                   Output("trend-chart", "figure"),
+                   Output("year-display", "children")]
+
+# 客户端模板：由服务器端的 update_trend / create_stats_card 生成，浏览器只填入数值、
+# 标题中的年份和坐标轴范围
+def trend_bar_template():
+    year = int(get_area_index().years[-1])
+    fig = update_trend([year, year])
+    fig.update_layout(title_text=fig.layout.title.text.replace(str(year), '{year}'))
+    return fig
+
+
+def trend_line_template():
+    years = get_area_index().years
+    return update_trend([int(years[0]), int(years[-1])])
+
+
+if CLIENTSIDE_ENABLED:
+    register_client_template('trend_bar', trend_bar_template)
+    register_client_template('trend_line', trend_line_template)
+    register_client_template('stats_card', lambda: create_stats_card({'avg': 0, 'max': 0, 'min': 0}))
+    clientside_callback(
+        ClientsideFunction(namespace='recycling', function_name='overviewSummary'),
+        SUMMARY_OUTPUTS,
+        [Input("year-slider", "value"),
+         Input(STORE_ID, "data")]
+    )
+else:
+    update_overview_summary = callback(SUMMARY_OUTPUTS, [Input("year-slider", "value")])(
+        cached_callback(update_overview_summary))
+    register_warmup(update_overview_summary, lambda: [(r,) for r in year_ranges()])
+
 @callback(
-    [Output("core-london-stats", "children"),
-     Output("outer-london-stats", "children"),
-     Output("non-london-stats", "children"),
-     Output("trend-chart", "figure"),
-     Output("heatmap", "figure"),
-     Output("year-display", "children"),
+    [Output("heatmap", "figure"),
      Output("rankings-table", "children"),
      Output("ranking-period-display", "children")],
     [Input("year-slider", "value")]
 )
+@cached_callback
 def update_overview(year_range):
     if year_range is None:
         year_range = [2022, 2022]  # 提供默认值
         
     df = load_data()
     
-    # 1. 计算统计信息
-    def get_stats(status):
-        if year_range[0] == year_range[1]:
-            data = df[(df['Year'] == year_range[0]) & (df['London_Status'] == status)]
-        else:
-            data = df[
-                (df['Year'].between(year_range[0], year_range[1])) & 
-                (df['London_Status'] == status)
-            ]
-        return {
-            'avg': data['Recycling_Rates'].mean() if not data.empty else 0,
-            'max': data['Recycling_Rates'].max() if not data.empty else 0,
-            'min': data['Recycling_Rates'].min() if not data.empty else 0
-        }
-    
     try:
-        core_stats = get_stats('Core London')
-        outer_stats = get_stats('Outer London')
-        non_london_stats = get_stats('Non-London')
-        
-        # 2. 创建趋势图
-        trend_fig = update_trend(year_range)
-        
         # 3. 创建热力图
         heatmap_fig = create_heatmap(df, year_range)
         
@@ -209,41 +256,26 @@ def update_overview(year_range):
             period_display = f"(Average {year_range[0]}-{year_range[1]})"
         
         return (
-            create_stats_card(core_stats),
-            create_stats_card(outer_stats),
-            create_stats_card(non_london_stats),
-            trend_fig,
             heatmap_fig,
-            f"({year_range[0]}-{year_range[1]})",
             table,
             period_display
         )
     except Exception as e:
-        print(f"Error in update_overview: {e}")
+        logger.error("Error in update_overview: %s", e)
         # 返回空值或默认值
-        return ["N/A"] * 7
+        return ["N/A"] * 3
+
+# 启动预热：每个单独年份以及完整范围
+register_warmup(update_overview, lambda: [(r,) for r in year_ranges()])
 
 def update_trend(year_range):
+    # 延迟导入：plotly.express 导入较慢，只在第一次生成图表时加载
+    import plotly.express as px
     if year_range is None:
         year_range = [2022, 2022]
         
-    df = load_data()
-    
-    # 创建趋势数据
-    trend_data = df.groupby(['Year', 'London_Status'])['Recycling_Rates'].mean().reset_index()
-    
-    # 添加伦敦整体平均值
-    london_overall = df[df['London_Status'].isin(['Core London', 'Outer London'])].groupby('Year')['Recycling_Rates'].mean().reset_index()
-    london_overall['London_Status'] = 'London Overall'
-    
-    # 合并数据
-    trend_data = pd.concat([trend_data, london_overall])
-    
-    # 根据选择的年份范围筛选数据
-    trend_data = trend_data[
-        (trend_data['Year'] >= year_range[0]) & 
-        (trend_data['Year'] <= year_range[1])
-    ]
+    # 从聚合立方体读取各区域类型的年度平均值（含派生的 London Overall）
+    trend_data = get_cube().to_frame('Recycling_Rates', year_range=year_range)
     
     # 设置颜色映射
     color_map = {
@@ -325,30 +357,27 @@ def update_trend(year_range):
     
     return fig
 
+def build_heatmap_cells(index):
+    """整个 Area × Year 回收率矩阵（保留一位小数）及显示文本，每个数据版本只计算一次"""
+    z = np.round(index.matrices['Recycling_Rates'], 1)
+    text = np.where(np.isnan(z), '', np.char.add(np.char.mod('%.1f', z), '%')).astype(object)
+    return z, text
+
 def create_heatmap(df, year_range):
-    # 筛选数据
-    df_filtered = df[
-        (df['Year'] >= year_range[0]) & 
-        (df['Year'] <= year_range[1])
-    ]
-    
-    # 创建热力图数据
-    heatmap_data = df_filtered.pivot_table(
-        values='Recycling_Rates',
-        index='Area',
-        columns='Year',
-        aggfunc='mean'
-    ).round(1)
-    
-    # 按平均回收率排序区域
-    area_means = heatmap_data.mean(axis=1).sort_values(ascending=False)
-    heatmap_data = heatmap_data.reindex(area_means.index)
+    # 年份范围是矩阵的列切片；区域按范围均值排序（前缀和，预计算排名），没有数据的区域不显示
+    index = get_area_index()
+    z_all, text_all = get_store().derived('heatmap_cells',
+                                          lambda df: build_heatmap_cells(get_area_index()))
+    order = get_rankings().range_order(year_range)
+    year_slice = index.year_slice(year_range)
+    z = z_all[:, year_slice][order]
+    text = text_all[:, year_slice][order]
     
     # 创建热力图
     fig = go.Figure(data=go.Heatmap(
-        z=heatmap_data.values,
-        x=heatmap_data.columns,
-        y=heatmap_data.index,
+        z=z,
+        x=index.years[year_slice],
+        y=index.areas[order],
         colorscale=[
             [0, 'rgb(255,255,255)'],      # 最低值为白色
             [0.2, 'rgb(220,230,242)'],    # 浅蓝色
@@ -357,8 +386,8 @@ def create_heatmap(df, year_range):
             [0.8, 'rgb(54,122,227)'],     # 深蓝色
             [1, 'rgb(39,73,142)']         # 最深蓝色
         ],
-        text=heatmap_data.values.round(1),
-        texttemplate='%{text}%',
+        text=text,
+        texttemplate='%{text}',
         textfont={"size": 10, "color": "black"},
         hoverongaps=False,
         hovertemplate='Area: %{y}<br>Year: %{x}<br>Rate: %{z:.1f}%<extra></extra>'
@@ -385,21 +414,21 @@ def create_heatmap(df, year_range):
     
     return fig
 
-def create_rankings_table(df, year, ranking_type='year'):
-    """创建排名表格，支持单年或时间范围"""
+def create_rankings_table(df, year, ranking_type='year', top_n=10):
+    """创建排名表格，支持单年或时间范围（排名顺序来自预计算的排名）"""
+    rankings = get_rankings()
+    index = rankings.index
     if ranking_type == 'year':
-        rankings_data = (df[df['Year'] == year]
-                        .sort_values('Recycling_Rates', ascending=False)
-                        .reset_index(drop=True))
+        positions = rankings.top(top_n, year=year)
+        rates = rankings.values(year=year)[positions]
     else:
-        # 时间范围模式
-        year_range = year
-        rankings_data = (df[df['Year'].between(year_range[0], year_range[1])]
-                        .groupby(['Area', 'London_Status', 'Postcode'])['Recycling_Rates']
-                        .mean()
-                        .reset_index()
-                        .sort_values('Recycling_Rates', ascending=False)
-                        .reset_index(drop=True))
+        # 时间范围模式：各区域的范围均值来自前缀和，与范围宽度无关
+        positions = rankings.top(top_n, year_range=year)
+        rates = rankings.values(year_range=year)[positions]
+    
+    areas = index.areas[positions]
+    postcodes = index.attributes['Postcode'][positions]
+    statuses = index.attributes['London_Status'][positions]
     
     # 创建表格
     table = dbc.Table([
@@ -415,32 +444,33 @@ def create_rankings_table(df, year, ranking_type='year'):
         html.Tbody([
             html.Tr([
                 html.Td(
-                    html.Span(f"#{i+1}", 
+                    html.Span(f"#{rank}", 
                              className="badge bg-primary rounded-pill",
                              style={'min-width': '35px'}),
                     className="align-middle"
                 ),
-                html.Td(row['Area'], className="align-middle"),
+                html.Td(area, className="align-middle"),
                 html.Td(
                     html.Span(
-                        row['Postcode'] if pd.notna(row['Postcode']) else 'Non',
+                        postcode if pd.notna(postcode) else 'Non',
                         className="badge bg-light text-dark"
                     ),
                     className="align-middle"
                 ),
                 html.Td(
                     html.Span(
-                        row['London_Status'],
-                        className=f"badge {'bg-success' if 'London' in row['London_Status'] else 'bg-secondary'}"
+                        status,
+                        className=f"badge {'bg-success' if 'London' in status else 'bg-secondary'}"
                     ),
                     className="align-middle"
                 ),
                 html.Td(
-                    html.Strong(f"{row['Recycling_Rates']:.1f}%"),
+                    html.Strong(f"{rate:.1f}%"),
                     className="align-middle text-end"
                 )
             ], className="align-middle") 
-            for i, row in rankings_data.head(10).iterrows()
+            for rank, area, postcode, status, rate
+            in zip(range(1, len(positions) + 1), areas, postcodes, statuses, rates)
         ])
     ], bordered=False, hover=True, responsive=True,
        className="table align-middle mb-0")
@@ -7,7 +7,10 @@ from pathlib import Path
 # 添加父目录到 Python 路径
 sys.path.append(str(Path(__file__).parent.parent.parent))
 from utils.recycling_figures import recycling_line_chart
-from utils import load_data
+from utils.area_index import get_area_index
+from utils.queries import query_recycling
+from utils.cache import cached_callback
+from utils.warmup import register_warmup, year_ranges
 
 register_page(__name__, path='/reuse', name='Reuse Overview')
 
@@ -112,18 +115,25 @@ layout = dbc.Container([
      Output('reuse-map', 'figure')],
     [Input('reuse-year-selector', 'value')]
 )
+@cached_callback
 def update_reuse_overview(year_range):
-    df = load_data()
     selected_year = year_range[1]
-    df_latest = df[df['Year'] == selected_year]
+    # 只查询需要的列，年份筛选在 SQLite 中完成
+    df = query_recycling(columns=['Area', 'Year', 'London_Status', 'Reuse_Coverage'],
+                         year_range=(int(get_area_index().years[0]), selected_year))
+    # 再利用数据只在调查年份有值：每个区域取所选年份及之前最近一次的覆盖率
+    df_latest = (df[df['Reuse_Coverage'].notna()]
+                 .sort_values('Year')
+                 .drop_duplicates('Area', keep='last'))
+    data_years = sorted(df_latest['Year'].unique())
     
     # 计算各区域统计数据
     def get_stats(status):
         data = df_latest[df_latest['London_Status'] == status]
         return {
-            'avg': data['Reuse_Rates'].mean(),
-            'max': data['Reuse_Rates'].max(),
-            'min': data['Reuse_Rates'].min(),
+            'avg': data['Reuse_Coverage'].mean(),
+            'max': data['Reuse_Coverage'].max(),
+            'min': data['Reuse_Coverage'].min(),
             'count': len(data)
         }
     
@@ -133,6 +143,8 @@ def update_reuse_overview(year_range):
     
     # 创建统计卡片内容
     def create_stats_card(stats):
+        if stats['count'] == 0:
+            return html.Div([html.P(f"No reuse data up to {selected_year}")])
         return html.Div([
             html.H3(f"{stats['avg']:.1f}%", className="text-primary"),
             html.P(f"Highest: {stats['max']:.1f}%"),
@@ -143,29 +155,29 @@ def update_reuse_overview(year_range):
     # 创建地图
     map_fig = go.Figure()
     
-    # 为每个区域添加标记
-    for area in df_latest['Area'].unique():
-        if area in LONDON_COORDS:  # 只显示有坐标的区域
-            area_data = df_latest[df_latest['Area'] == area].iloc[0]
-            lon, lat = LONDON_COORDS[area]
-            
-            map_fig.add_trace(go.Scattergeo(
-                lon=[lon],
-                lat=[lat],
-                text=f"{area}<br>Reuse Rate: {area_data['Reuse_Rates']:.1f}%",
-                mode='markers',
-                marker=dict(
-                    size=10,
-                    color=area_data['Reuse_Rates'],
-                    colorscale='Viridis',
-                    showscale=True,
-                    colorbar_title="Reuse Rate (%)"
-                ),
-                name=area
-            ))
+    # 所有区域合并为一条轨迹，共用一个颜色条
+    map_data = df_latest[df_latest['Area'].isin(list(LONDON_COORDS))].drop_duplicates('Area')  # 只显示有坐标的区域
+    map_areas = map_data['Area'].tolist()
+    map_rates = map_data['Reuse_Coverage']
+    
+    map_fig.add_trace(go.Scattergeo(
+        lon=[LONDON_COORDS[area][0] for area in map_areas],
+        lat=[LONDON_COORDS[area][1] for area in map_areas],
+        text=[f"{area}<br>Reuse Coverage: {rate:.1f}%" for area, rate in zip(map_areas, map_rates)],
+        customdata=map_areas,
+        mode='markers',
+        marker=dict(
+            size=10,
+            color=map_rates,
+            colorscale='Viridis',
+            showscale=True,
+            colorbar_title="Reuse Coverage (%)"
+        ),
+        name="Reuse Coverage"
+    ))
     
     map_fig.update_layout(
-        title=f"London Reuse Rates ({selected_year})",
+        title=f"London Reuse Coverage ({', '.join(map(str, data_years)) or 'no data'})",
         geo=dict(
             scope='europe',
             center=dict(lon=-0.1276, lat=51.5072),  # 伦敦中心
@@ -185,4 +197,7 @@ def update_reuse_overview(year_range):
         create_stats_card(outer_stats),
         create_stats_card(non_london_stats),
         map_fig
-    ) 
\ No newline at end of file
+    ) 
+
+# 启动预热：每个单独年份以及完整范围
+register_warmup(update_reuse_overview, lambda: [(r,) for r in year_ranges()])
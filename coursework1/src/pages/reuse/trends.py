@@ -1,19 +1,20 @@
 from dash import register_page, html, dcc, callback, Input, Output
 import dash_bootstrap_components as dbc
-import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
+import numpy as np
 import sys
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent.parent.parent))
-from utils import load_data
+from utils.area_index import get_area_index
+from utils.groups import get_area_groups
+from utils.queries import query_recycling
 
 register_page(__name__, path='/reuse/trends', name='Reuse Trends')
 
 def get_area_options():
-    """获取所有区域选项"""
-    df = load_data()
+    """获取所有区域选项（来自分组索引）"""
     options = [
         {'label': '--- Region Groups ---', 'value': 'group_header', 'disabled': True},
         {'label': 'All Areas', 'value': 'all'},
@@ -22,76 +23,76 @@ def get_area_options():
         {'label': '--- London Boroughs ---', 'value': 'london_header', 'disabled': True}
     ]
     
-    london_areas = sorted(df[df['London_Status'].isin(['Core London', 'Outer London'])]['Area'].unique())
-    for area in london_areas:
-        options.append({'label': f"  • {area}", 'value': area})
+    options += get_area_groups().area_options('london_all', label="  • {}")
     
     return options
 
-layout = dbc.Container([
-    dbc.Row([
-        dbc.Col([
-            html.H1("Reuse Trends Analysis", className="text-center mb-4")
-        ])
-    ]),
+def layout(**kwargs):
+    """页面布局；区域选项在访问页面时才生成"""
+    return dbc.Container([
+        dbc.Row([
+            dbc.Col([
+                html.H1("Reuse Trends Analysis", className="text-center mb-4")
+            ])
+        ]),
     
-    # 控制面板
-    dbc.Row([
-        dbc.Col([
-            html.Label("Select Areas:", className="mb-2"),
-            dcc.Dropdown(
-                id='reuse-area-selector',  # 修改ID
-                options=get_area_options(),
-                value=['london_all'],
-                multi=True,
-                className="mb-3"
-            ),
-            html.Label("Select Time Range:", className="mb-2"),
-            dcc.RangeSlider(
-                id='reuse-year-selector',  # 修改ID
-                min=2003,
-                max=2022,
-                value=[2003, 2022],
-                marks={year: str(year) for year in range(2003, 2023, 2)},
-                tooltip={'placement': 'bottom', 'always_visible': True}
-            ),
-            html.Label("Chart Type:", className="mt-3 mb-2"),
-            dbc.RadioItems(
-                id='reuse-chart-type',  # 修改ID
-                options=[
-                    {'label': 'Line Chart', 'value': 'line'},
-                    {'label': 'Bar Chart', 'value': 'bar'},
-                    {'label': 'Area Chart', 'value': 'area'}
-                ],
-                value='line',
-                inline=True,
-                className="mb-3"
-            )
-        ], width=12)
-    ], className="mb-4"),
+        # 控制面板
+        dbc.Row([
+            dbc.Col([
+                html.Label("Select Areas:", className="mb-2"),
+                dcc.Dropdown(
+                    id='reuse-area-selector',  # 修改ID
+                    options=get_area_options(),
+                    value=['london_all'],
+                    multi=True,
+                    className="mb-3"
+                ),
+                html.Label("Select Time Range:", className="mb-2"),
+                dcc.RangeSlider(
+                    id='reuse-year-selector',  # 修改ID
+                    min=2003,
+                    max=2022,
+                    value=[2003, 2022],
+                    marks={year: str(year) for year in range(2003, 2023, 2)},
+                    tooltip={'placement': 'bottom', 'always_visible': True}
+                ),
+                html.Label("Chart Type:", className="mt-3 mb-2"),
+                dbc.RadioItems(
+                    id='reuse-chart-type',  # 修改ID
+                    options=[
+                        {'label': 'Line Chart', 'value': 'line'},
+                        {'label': 'Bar Chart', 'value': 'bar'},
+                        {'label': 'Area Chart', 'value': 'area'}
+                    ],
+                    value='line',
+                    inline=True,
+                    className="mb-3"
+                )
+            ], width=12)
+        ], className="mb-4"),
     
-    # 趋势图
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader("Reuse Rate Trends"),
-                dbc.CardBody([
-                    dcc.Graph(id='reuse-trend-chart')  # 修改ID
+        # 趋势图
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Reuse Rate Trends"),
+                    dbc.CardBody([
+                        dcc.Graph(id='reuse-trend-chart')  # 修改ID
+                    ])
                 ])
-            ])
-        ], width=12)
-    ], className="mb-4"),
+            ], width=12)
+        ], className="mb-4"),
     
-    # 统计信息
-    dbc.Row([
-        dbc.Col([
-            dbc.Card([
-                dbc.CardHeader("Trend Statistics"),
-                dbc.CardBody(id='reuse-trend-stats')  # 修改ID
-            ])
-        ], width=12)
-    ])
-], fluid=True)
+        # 统计信息
+        dbc.Row([
+            dbc.Col([
+                dbc.Card([
+                    dbc.CardHeader("Trend Statistics"),
+                    dbc.CardBody(id='reuse-trend-stats')  # 修改ID
+                ])
+            ], width=12)
+        ])
+    ], fluid=True)
 
 @callback(
     [Output('reuse-trend-chart', 'figure'),
@@ -101,43 +102,40 @@ layout = dbc.Container([
      Input('reuse-chart-type', 'value')]
 )
 def update_reuse_trend_analysis(selected_areas, year_range, chart_type):
-    df = load_data()
-    
-    # 过滤时间范围
-    df = df[(df['Year'] >= year_range[0]) & (df['Year'] <= year_range[1])]
-    
-    # 处理区域选择
-    if 'all' in selected_areas:
-        filtered_df = df
-    else:
-        mask = pd.Series(False, index=df.index)
-        for area in selected_areas:
-            if area == 'london_all':
-                mask |= df['London_Status'].isin(['Core London', 'Outer London'])
-            elif area == 'non_london':
-                mask |= df['London_Status'] == 'Non-London'
-            else:
-                mask |= df['Area'] == area
-        filtered_df = df[mask]
+    # 延迟导入：plotly.express 导入较慢，只在第一次生成图表时加载
+    import plotly.express as px
+    # 区域选择通过分组索引解析，再由查询层读取再利用覆盖率（Reuse_Coverage）
+    areas = get_area_index().areas[get_area_groups().resolve(selected_areas, year_range)]
+    if not len(areas):
+        return {}, "Please select at least one area to display"
+    df = query_recycling(columns=['Area', 'Year', 'Reuse_Coverage'], year_range=year_range,
+                         areas=list(areas))
+    # 再利用数据只在调查年份有值；图例保持选择顺序
+    df = df[df['Reuse_Coverage'].notna()]
+    order = {area: i for i, area in enumerate(areas)}
+    filtered_df = df.iloc[np.argsort(df['Area'].map(order).to_numpy(), kind='stable')]
+    if filtered_df.empty:
+        return {}, "No reuse data for the selected areas and years"
     
     # 创建图表
     if chart_type == 'line':
         fig = px.line(filtered_df, 
                      x='Year', 
-                     y='Reuse_Rates',  # 修改为Reuse数据
+                     y='Reuse_Coverage',
                      color='Area',
+                     markers=True,  # 只有一个调查年份时折线不可见
                      title='Reuse Rate Trends')
     elif chart_type == 'bar':
         fig = px.bar(filtered_df,
                     x='Year',
-                    y='Reuse_Rates',  # 修改为Reuse数据
+                    y='Reuse_Coverage',
                     color='Area',
                     title='Reuse Rate Trends',
                     barmode='group')
     else:  # area chart
         fig = px.area(filtered_df,
                      x='Year',
-                     y='Reuse_Rates',  # 修改为Reuse数据
+                     y='Reuse_Coverage',
                      color='Area',
                      title='Reuse Rate Trends')
     
@@ -150,20 +148,18 @@ def update_reuse_trend_analysis(selected_areas, year_range, chart_type):
         template='plotly_white'
     )
     
-    # 计算统计信息
+    # 计算统计信息：起止值取范围内第一个和最后一个有数据的年份
     stats = []
-    for area in filtered_df['Area'].unique():
-        area_data = filtered_df[filtered_df['Area'] == area]
-        start_rate = area_data[area_data['Year'] == year_range[0]]['Reuse_Rates'].iloc[0]
-        end_rate = area_data[area_data['Year'] == year_range[1]]['Reuse_Rates'].iloc[0]
-        change = end_rate - start_rate
+    for area, area_data in filtered_df.groupby('Area', sort=False):
+        start, end = area_data.iloc[0], area_data.iloc[-1]
+        change = end['Reuse_Coverage'] - start['Reuse_Coverage']
         
         stats.append(html.Div([
             html.H5(area),
             html.P([
-                f"Start Rate: {start_rate:.1f}%",
+                f"Start Rate ({start['Year']}): {start['Reuse_Coverage']:.1f}%",
                 html.Br(),
-                f"End Rate: {end_rate:.1f}%",
+                f"End Rate ({end['Year']}): {end['Reuse_Coverage']:.1f}%",
                 html.Br(),
                 f"Change: {change:+.1f}%",
             ])
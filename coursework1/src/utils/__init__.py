@@ -1,32 +1,32 @@
+import logging
+from contextlib import nullcontext
+
 import pandas as pd
-from pathlib import Path
+
+# 标记数据访问阶段的上下文管理器工厂 hook(name)，例如 app.py 中注入的 student.dash_metrics.phase；
+# 没有注入时（例如单独运行 utils 模块）不记录指标
+_phase_hook = nullcontext
+
+
+def set_phase_hook(hook):
+    """设置 phase() 使用的上下文管理器工厂（传入 None 恢复为不记录）"""
+    global _phase_hook
+    _phase_hook = hook or nullcontext
+
+
+def phase(name="data"):
+    """标记回调中的数据访问阶段"""
+    return _phase_hook(name)
+
 
 def load_data():
-    """加载和预处理数据"""
+    """加载和预处理数据（来自共享数据仓库，不会重复读取 CSV）"""
+    # 延迟导入，使 `python -m utils.ingest` 等命令行入口不会被提前加载
+    from .data_store import get_store
+
     try:
-        current_dir = Path(__file__).parent.parent.parent
-        data_path = current_dir / "data" / "newdata.csv"
-        
-        # 读取 CSV 文件
-        df = pd.read_csv(data_path)
-        
-        # 数据类型转换
-        df['Year'] = pd.to_numeric(df['Year'], errors='coerce')
-        df['Recycling_Rates'] = pd.to_numeric(df['Recycling_Rates'], errors='coerce')
-        
-        # 确保所有必要的列存在
-        required_columns = ['Year', 'Area', 'Recycling_Rates', 'London_Status']
-        if not all(col in df.columns for col in required_columns):
-            missing_cols = [col for col in required_columns if col not in df.columns]
-            raise ValueError(f"Missing required columns: {missing_cols}")
-        
-        # 数据验证
-        print(f"Loaded data shape: {df.shape}")
-        print(f"Columns: {df.columns.tolist()}")
-        print(f"Year range: {df['Year'].min()} - {df['Year'].max()}")
-        print(f"Number of unique areas: {df['Area'].nunique()}")
-        
-        return df
+        with phase("data"):
+            return get_store().frame()
     except Exception as e:
-        print(f"Error loading data: {e}")
+        logging.getLogger(__name__).error("Error loading data: %s", e)
         return pd.DataFrame()
@@ -0,0 +1,135 @@
+"""按 Year × 区域类型 × 指标 × 统计量 预先计算的聚合立方体
+
+立方体在数据加载时构建一次（随数据版本缓存），概览页和图表函数中的
+groupby / 布尔筛选都变成数组查找。
+"""
+import numpy as np
+import pandas as pd
+
+from .data_store import get_store
+
+# 区域类型分组；"London Overall" 是由 Core London 和 Outer London 派生的分组
+GROUP_MEMBERS = {
+    'Core London': ['Core London'],
+    'Outer London': ['Outer London'],
+    'Non-London': ['Non-London'],
+    'London Overall': ['Core London', 'Outer London'],
+}
+
+STATISTICS = ['mean', 'min', 'max', 'count', 'sum']
+
+# 默认聚合的指标，新增指标只需加入列表（必须是数值列）
+DEFAULT_METRICS = ['Recycling_Rates', 'Population_Density', 'Per_Capita_Recycling']
+
+
+class AggregateCube:
+    """聚合结果，values 的形状为 (年份, 分组, 指标, 统计量)"""
+
+    def __init__(self, years, groups, metrics, values):
+        self.years = np.asarray(years)
+        self.groups = list(groups)
+        self.metrics = list(metrics)
+        self.stats = list(STATISTICS)
+        self.values = values
+        self._year_pos = {int(y): i for i, y in enumerate(self.years)}
+        self._group_pos = {g: i for i, g in enumerate(self.groups)}
+        self._metric_pos = {m: i for i, m in enumerate(self.metrics)}
+        self._stat_pos = {s: i for i, s in enumerate(self.stats)}
+
+    def _year_slice(self, year_range):
+        if year_range is None:
+            return slice(None)
+        lo = np.searchsorted(self.years, year_range[0], side='left')
+        hi = np.searchsorted(self.years, year_range[1], side='right')
+        return slice(lo, hi)
+
+    def get(self, metric, stat='mean', group=None, year=None):
+        """单个统计量查找；未指定 group/year 时返回对应维度的数组"""
+        m = self._metric_pos[metric]
+        s = self._stat_pos[stat]
+        g = slice(None) if group is None else self._group_pos[group]
+        if year is None:
+            return self.values[:, g, m, s]
+        pos = self._year_pos.get(int(year))
+        if pos is None:
+            return np.nan if group is not None else np.full(len(self.groups), np.nan)
+        return self.values[pos, g, m, s]
+
+    def series(self, metric, group, stat='mean', year_range=None):
+        """返回 (年份数组, 统计值数组)"""
+        ys = self._year_slice(year_range)
+        m = self._metric_pos[metric]
+        return (self.years[ys],
+                self.values[ys, self._group_pos[group], m, self._stat_pos[stat]])
+
+    def range_stats(self, metric, group, year_range=None):
+        """年份范围内所有记录的均值/最值/计数（均值按记录加权）"""
+        ys = self._year_slice(year_range)
+        m = self._metric_pos[metric]
+        block = self.values[ys, self._group_pos[group], m, :]
+        count = np.nansum(block[:, self._stat_pos['count']])
+        if count == 0:
+            return {'avg': np.nan, 'min': np.nan, 'max': np.nan, 'count': 0}
+        return {
+            'avg': np.nansum(block[:, self._stat_pos['sum']]) / count,
+            'min': np.nanmin(block[:, self._stat_pos['min']]),
+            'max': np.nanmax(block[:, self._stat_pos['max']]),
+            'count': int(count),
+        }
+
+    def to_frame(self, metric, stat='mean', groups=None, year_range=None):
+        """长表格式：Year, London_Status, <metric>，用于 plotly express"""
+        groups = groups or self.groups
+        ys = self._year_slice(year_range)
+        years = self.years[ys]
+        m = self._metric_pos[metric]
+        s = self._stat_pos[stat]
+        frames = []
+        for group in groups:
+            values = self.values[ys, self._group_pos[group], m, s]
+            frames.append(pd.DataFrame({
+                'Year': years,
+                'London_Status': group,
+                metric: values,
+            }))
+        result = pd.concat(frames, ignore_index=True)
+        return result[result[metric].notna()].reset_index(drop=True)
+
+
+def build_cube(df, metrics=None):
+    """从数据框构建聚合立方体"""
+    metrics = [m for m in (metrics or DEFAULT_METRICS)
+               if m in df.columns and pd.api.types.is_numeric_dtype(df[m])]
+    years = np.sort(df['Year'].dropna().unique()).astype(int)
+    groups = [g for g in GROUP_MEMBERS
+              if df['London_Status'].isin(GROUP_MEMBERS[g]).any()]
+
+    values = np.full((len(years), len(groups), len(metrics), len(STATISTICS)), np.nan)
+    values[..., STATISTICS.index('count')] = 0
+    values[..., STATISTICS.index('sum')] = 0
+
+    year_index = pd.Index(years)
+    for g, group in enumerate(groups):
+        group_df = df[df['London_Status'].isin(GROUP_MEMBERS[group])]
+        if group_df.empty or not metrics:
+            continue
+        agg = group_df.groupby('Year')[metrics].agg(STATISTICS)
+        rows = year_index.get_indexer(agg.index.astype(int))
+        for m, metric in enumerate(metrics):
+            values[rows, g, m, :] = agg[metric][STATISTICS].to_numpy(dtype=float)
+
+    return AggregateCube(years, groups, metrics, values)
+
+
+def get_cube():
+    """获取当前数据版本对应的共享聚合立方体"""
+    return get_store().derived('aggregate_cube', build_cube)
+
+
+def as_cube(data):
+    """接受数据框或立方体；数据框会即时构建一个立方体"""
+    if data is None:
+        return get_cube()
+    if isinstance(data, AggregateCube):
+        return data
+    return build_cube(data)
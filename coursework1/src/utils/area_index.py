@@ -0,0 +1,145 @@
+"""Area × Year 稠密矩阵索引
+
+把区域名称/代码和年份映射到整数位置，每个数值指标保存为 (区域, 年份) 的二维数组，
+区域的时间序列或某一年的横截面都只是数组切片，不再需要 df[df['Area'] == area] 全表扫描。
+"""
+import numpy as np
+import pandas as pd
+
+from .data_store import get_store
+
+# 每个区域固定不变的属性
+AREA_ATTRIBUTES = ['Code_recycling', 'London_Status', 'Region_and_Borough', 'Postcode']
+
+LONDON_STATUSES = ['Core London', 'Outer London']
+
+
+class AreaYearIndex:
+    """区域 × 年份索引
+
+    areas/years 按排序保存；matrices[metric][i, j] 是第 i 个区域在第 j 年的值（缺失为 NaN），
+    row_positions[i, j] 是对应记录在原数据框中的行号（缺失为 -1）。
+    """
+
+    def __init__(self, frame, areas, years, attributes, matrices, row_positions):
+        self.frame = frame
+        self.areas = np.asarray(areas, dtype=object)
+        self.years = np.asarray(years)
+        self.attributes = attributes
+        self.matrices = matrices
+        self.row_positions = row_positions
+        self.area_pos = {a: i for i, a in enumerate(self.areas)}
+        codes = attributes.get('Code_recycling')
+        if codes is not None:
+            self.area_pos.update({c: i for i, c in enumerate(codes) if isinstance(c, str)})
+        self.year_pos = {int(y): j for j, y in enumerate(self.years)}
+
+    @property
+    def metrics(self):
+        return list(self.matrices)
+
+    def position(self, area):
+        """区域名称或代码 -> 行位置；未知区域返回 None"""
+        return self.area_pos.get(area)
+
+    def positions(self, areas):
+        """批量转换，忽略未知区域"""
+        result = [self.area_pos.get(a) for a in areas]
+        return np.array([p for p in result if p is not None], dtype=int)
+
+    def year_slice(self, year_range=None):
+        if year_range is None:
+            return slice(None)
+        lo = np.searchsorted(self.years, year_range[0], side='left')
+        hi = np.searchsorted(self.years, year_range[1], side='right')
+        return slice(lo, hi)
+
+    def matrix(self, metric, year_range=None):
+        """指标矩阵（年份范围切片为视图）"""
+        return self.matrices[metric][:, self.year_slice(year_range)]
+
+    def series(self, area, metric, year_range=None):
+        """单个区域的 (年份, 值)；未知区域返回空数组"""
+        ys = self.year_slice(year_range)
+        pos = self.position(area)
+        if pos is None:
+            return self.years[ys][:0], np.empty(0)
+        return self.years[ys], self.matrices[metric][pos, ys]
+
+    def value(self, area, metric, year):
+        pos = self.position(area)
+        j = self.year_pos.get(int(year))
+        if pos is None or j is None:
+            return np.nan
+        return self.matrices[metric][pos, j]
+
+    def cross_section(self, metric, year):
+        """某一年所有区域的值（按 areas 顺序）"""
+        j = self.year_pos.get(int(year))
+        if j is None:
+            return np.full(len(self.areas), np.nan)
+        return self.matrices[metric][:, j]
+
+    def attribute(self, area, name):
+        pos = self.position(area)
+        return None if pos is None else self.attributes[name][pos]
+
+    def status_mask(self, statuses):
+        """属于给定 London_Status 的区域掩码"""
+        return np.isin(self.attributes['London_Status'], list(statuses))
+
+    def rows(self, areas=None, year_range=None):
+        """区域集合在年份范围内的记录行号（按区域、年份排序）"""
+        block = self.row_positions[:, self.year_slice(year_range)]
+        if areas is not None:
+            block = block[np.asarray(areas, dtype=int)]
+        flat = block.ravel()
+        return flat[flat >= 0]
+
+    def row_counts(self, areas=None, year_range=None):
+        """每个区域在年份范围内的记录数（与 rows() 的区域顺序一致）"""
+        block = self.row_positions[:, self.year_slice(year_range)]
+        if areas is not None:
+            block = block[np.asarray(areas, dtype=int)]
+        return (block >= 0).sum(axis=1)
+
+    def take(self, areas=None, year_range=None):
+        """按区域位置和年份范围取出原始记录"""
+        return self.frame.take(self.rows(areas, year_range))
+
+
+def build_area_index(df):
+    """从数据框构建 Area × Year 索引"""
+    valid = df['Year'].notna().to_numpy().copy()
+    area_codes, areas = pd.factorize(df['Area'], sort=True)
+    years = np.sort(df.loc[valid, 'Year'].unique()).astype(int)
+    year_codes = np.full(len(df), -1)
+    year_codes[valid] = np.searchsorted(years, df.loc[valid, 'Year'].to_numpy())
+    valid &= area_codes >= 0
+
+    shape = (len(areas), len(years))
+    row_positions = np.full(shape, -1, dtype=np.int64)
+    row_positions[area_codes[valid], year_codes[valid]] = np.flatnonzero(valid)
+
+    matrices = {}
+    for col in df.columns:
+        if col == 'Year' or not pd.api.types.is_numeric_dtype(df[col]):
+            continue
+        matrix = np.full(shape, np.nan)
+        matrix[area_codes[valid], year_codes[valid]] = df[col].to_numpy(dtype=float)[valid]
+        matrices[col] = matrix
+
+    # 每个区域的静态属性取其第一条记录
+    codes, first_rows = np.unique(area_codes, return_index=True)
+    first_rows = first_rows[codes >= 0]
+    attributes = {
+        name: df[name].to_numpy(dtype=object)[first_rows]
+        for name in AREA_ATTRIBUTES if name in df.columns
+    }
+
+    return AreaYearIndex(df, np.asarray(areas), years, attributes, matrices, row_positions)
+
+
+def get_area_index():
+    """获取当前数据版本对应的共享索引"""
+    return get_store().derived('area_index', build_area_index)
@@ -0,0 +1,169 @@
+"""回调输出（图表、组件）的 LRU 缓存
+
+回调的输入空间很小（年份范围、图表类型、少量区域选择），同样的输入会反复出现。
+缓存键由回调名称、规范化后的输入和数据版本组成，数据文件变化后旧结果自动失效。
+容量同时受条目数和序列化后的字节数限制，按最近最少使用淘汰。
+
+缓存中保存的是回调返回值的纯 JSON 结构（dict/list），而不是 go.Figure 或组件对象：
+未命中时只序列化一次，同时得到大小；命中时 Dash 编码纯结构很快，不再重新转换图表对象。
+"""
+import functools
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import plotly.io.json
+import plotly.utils
+from dash import Patch
+from dash._callback import NoUpdate
+
+from .data_store import get_store
+
+DEFAULT_MAX_ENTRIES = int(os.environ.get("FIGURE_CACHE_MAX_ENTRIES", 1024))
+DEFAULT_MAX_BYTES = int(os.environ.get("FIGURE_CACHE_MAX_BYTES", 128 * 1024 * 1024))
+
+
+def estimate_size(value):
+    """按 Dash 返回给浏览器的 JSON 估算大小（字节）"""
+    try:
+        return len(json.dumps(value, cls=plotly.utils.PlotlyJSONEncoder))
+    except (TypeError, ValueError):
+        return 0
+
+
+def to_plain(value):
+    """回调返回值 -> (纯 JSON 结构, 序列化后的字节数)
+
+    多输出回调返回的元组逐个转换；no_update 和 Patch 需要 Dash 识别，保持原样。
+    """
+    if isinstance(value, (NoUpdate, Patch)):
+        return value, 0
+    if isinstance(value, tuple) or (isinstance(value, list) and any(
+            isinstance(v, (NoUpdate, Patch)) for v in value)):
+        converted = [to_plain(v) for v in value]
+        return type(value)(v for v, _ in converted), sum(size for _, size in converted)
+    try:
+        text = plotly.io.json.to_json_plotly(value)
+    except (TypeError, ValueError):
+        return value, 0
+    return json.loads(text), len(text)
+
+
+def normalise(value):
+    """把回调输入转换为可哈希、与表示方式无关的形式"""
+    if isinstance(value, (list, tuple)):
+        return tuple(normalise(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, normalise(v)) for k, v in value.items()))
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+class FigureCache:
+    """线程安全的 LRU 缓存，带命中/未命中计数和字节上限"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """返回 (是否命中, 值)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, key, value, size=None):
+        size = estimate_size(value) if size is None else size
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries
+                                     or self._bytes > self.max_bytes):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+figure_cache = FigureCache()
+
+# 缓存查找的监听函数 listener(hit, label)，例如 app.py 中注册的指标统计
+_lookup_listeners = []
+
+
+def add_lookup_listener(listener):
+    """注册在每次缓存查找后调用的函数"""
+    _lookup_listeners.append(listener)
+
+
+def cached_callback(func=None, *, name=None, key=None, cache=None):
+    """缓存回调函数的返回值
+
+    放在 @callback 下面使用；key 可以把原始输入转换为缓存键
+    （例如把 clickData 简化为区域名称），默认使用全部输入。
+    """
+    def decorator(func):
+        label = name or f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            target = cache if cache is not None else figure_cache
+            inputs = key(*args, **kwargs) if key else (args, kwargs)
+            cache_key = (label, get_store().version, normalise(inputs))
+            found, value = target.get(cache_key)
+            for listener in _lookup_listeners:
+                listener(found, label)
+            if found:
+                return value
+            value, size = to_plain(func(*args, **kwargs))
+            target.put(cache_key, value, size=size)
+            return value
+
+        wrapper.cache_label = label
+        wrapper.uncached = func
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
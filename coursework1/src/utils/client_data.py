@@ -0,0 +1,117 @@
+"""发送到浏览器的紧凑数据集，供客户端回调使用
+
+每个会话只传输一次（版本比较在浏览器端完成，会话中已有当前版本时不请求服务器）：Area × Year 矩阵编码为 base64 的 float32 数组（缺失值为 NaN），
+加上年份、区域名称和区域类型。年份范围筛选、统计卡片和简单的折线/柱状图
+由 assets/clientside.js 在浏览器中计算，服务器只处理热力图、排名等较重的回调。
+图表和卡片的结构不在 JS 中重写：页面用服务器端函数生成模板（register_client_template），
+随数据集一起发送，浏览器只填入数据。
+设置环境变量 CLIENTSIDE_CALLBACKS=0 可以回到全部在服务器端计算的模式。
+"""
+import base64
+import os
+
+import numpy as np
+from dash import ClientsideFunction, Input, Output, State, callback, clientside_callback, dcc, html
+from dash.exceptions import PreventUpdate
+
+from .area_index import get_area_index
+from .cache import to_plain
+from .data_store import get_store
+
+CLIENTSIDE_ENABLED = os.environ.get("CLIENTSIDE_CALLBACKS", "1") != "0"
+
+STORE_ID = 'recycling-data-store'
+VERSION_ID = 'recycling-data-version'
+REQUEST_ID = 'recycling-data-request'
+
+# 发送到浏览器的指标
+CLIENT_METRICS = ['Recycling_Rates']
+
+# 随数据集发送的模板：名称 -> builder()，由页面模块注册
+CLIENT_TEMPLATES = {}
+
+
+def encode_array(values, dtype='float32'):
+    """数组 -> {'dtype', 'shape', 'bdata'}，浏览器端解码为对应的 TypedArray（小端序）"""
+    values = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder('<'))
+    return {
+        'dtype': values.dtype.name,
+        'shape': list(values.shape),
+        'bdata': base64.b64encode(values.tobytes()).decode('ascii'),
+    }
+
+
+def register_client_template(name, builder):
+    """注册一个随数据集发送的模板，builder 无参数，返回图表或组件（通常由服务器端回调函数生成）
+
+    模板转换为纯 JSON，其中的数值数组置空，由浏览器填入。
+    """
+    CLIENT_TEMPLATES[name] = builder
+
+
+def _blank_arrays(value):
+    # plotly 的数组编码 {'dtype', 'bdata'} 置为空列表，由浏览器填入
+    if isinstance(value, dict):
+        if 'bdata' in value and 'dtype' in value:
+            return []
+        return {k: _blank_arrays(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_blank_arrays(v) for v in value]
+    return value
+
+
+def _template(value):
+    return _blank_arrays(to_plain(value)[0])
+
+
+def build_client_dataset(index, metrics=None):
+    """从 Area × Year 索引构建紧凑数据集"""
+    metrics = [m for m in (metrics or CLIENT_METRICS) if m in index.matrices]
+    return {
+        'version': get_store().digest,
+        'years': [int(y) for y in index.years],
+        'areas': [str(a) for a in index.areas],
+        'statuses': [s if isinstance(s, str) else None for s in index.attributes['London_Status']],
+        'metrics': {m: encode_array(index.matrices[m]) for m in metrics},
+        'templates': {name: _template(build()) for name, build in CLIENT_TEMPLATES.items()},
+    }
+
+
+def get_client_dataset():
+    """当前数据版本对应的紧凑数据集（随数据版本缓存）"""
+    return get_store().derived('client_dataset', lambda df: build_client_dataset(get_area_index()))
+
+
+def data_store_component():
+    """放在应用布局中的组件：数据 dcc.Store（sessionStorage）和当前数据版本
+
+    版本在每次生成布局时读取（应用布局需要是函数），浏览器端比较会话中数据的版本，
+    一致时不请求服务器；只有会话中没有数据或数据过期时才由 fill_data_store 发送数据集。
+    """
+    return html.Div([
+        dcc.Store(id=STORE_ID, storage_type='session'),
+        dcc.Store(id=VERSION_ID, data=get_store().digest),
+        dcc.Store(id=REQUEST_ID),
+    ])
+
+
+# 会话中的数据版本与布局中的版本一致时不触发服务器回调（见 assets/clientside.js）
+clientside_callback(
+    ClientsideFunction(namespace='dataStore', function_name='requestDataset'),
+    Output(REQUEST_ID, 'data'),
+    Input(STORE_ID, 'modified_timestamp'),
+    State(STORE_ID, 'data'),
+    State(VERSION_ID, 'data')
+)
+
+
+@callback(
+    Output(STORE_ID, 'data'),
+    Input(REQUEST_ID, 'data'),
+    prevent_initial_call=True
+)
+def fill_data_store(request):
+    # request 是会话中已有数据的版本（没有数据时为空）
+    if request and request.get('have') == get_store().digest:
+        raise PreventUpdate
+    return get_client_dataset()
@@ -0,0 +1,129 @@
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from .ingest import file_digest, load_frame
+
+logger = logging.getLogger(__name__)
+
+# 数据文件路径（coursework1/data）
+DATA_DIR = Path(__file__).parent.parent.parent / "data"
+DATA_PATH = DATA_DIR / "newdata.csv"
+
+REQUIRED_COLUMNS = ['Year', 'Area', 'Recycling_Rates', 'London_Status']
+
+
+def read_source(path):
+    """读取数据（优先使用二进制列式缓存）并校验必要的列"""
+    df = load_frame(path)
+
+    # 确保所有必要的列存在
+    missing_cols = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Missing required columns: {missing_cols}")
+
+    return df
+
+
+class DataStore:
+    """进程内共享的只读数据仓库
+
+    数据只在首次访问或源文件变化（mtime/大小变化且内容摘要不同）时重新加载；
+    派生结构（聚合、索引等）通过 derived() 按数据版本缓存，随数据一起失效。
+    """
+
+    def __init__(self, path=DATA_PATH, reader=read_source, check_interval=1.0):
+        self.path = Path(path)
+        self.reader = reader
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._frame = None
+        self._signature = None
+        self._digest = None
+        self._version = 0
+        self._last_check = 0.0
+        self._derived = {}
+
+    def _stat_signature(self):
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self, signature, digest):
+        df = self.reader(self.path)
+        self._frame = df
+        self._signature = signature
+        self._digest = digest
+        self._version += 1
+        self._derived.clear()
+
+        # 数据验证（只在真正加载时输出）
+        logger.info("Loaded %s: %d rows, years %s-%s, %d areas", self.path.name, len(df),
+                    df['Year'].min(), df['Year'].max(), df['Area'].nunique())
+        logger.debug("Columns: %s", df.columns.tolist())
+
+    def refresh(self, force=False):
+        """检查源文件是否变化，必要时重新加载；返回当前版本号"""
+        with self._lock:
+            now = time.monotonic()
+            if (not force and self._frame is not None
+                    and now - self._last_check < self.check_interval):
+                return self._version
+            self._last_check = now
+
+            signature = self._stat_signature()
+            if not force and self._frame is not None and signature == self._signature:
+                return self._version
+
+            # mtime 变化但内容相同（例如 touch）时不重新加载
+            digest = file_digest(self.path)
+            if not force and self._frame is not None and digest == self._digest:
+                self._signature = signature
+                return self._version
+
+            self._load(signature, digest)
+            return self._version
+
+    @property
+    def version(self):
+        """当前数据版本号，可用作缓存键的一部分"""
+        return self.refresh()
+
+    @property
+    def digest(self):
+        self.refresh()
+        return self._digest
+
+    def frame(self):
+        """返回数据的浅拷贝视图
+
+        列数据与仓库共享，不会复制底层数组；调用方可以增删列，
+        但不应原地修改已有列的值。
+        """
+        self.refresh()
+        return self._frame.copy(deep=False)
+
+    def derived(self, name, builder):
+        """按数据版本缓存派生结构，builder 接收完整数据框"""
+        version = self.refresh()
+        with self._lock:
+            entry = self._derived.get(name)
+            if entry is None or entry[0] != version:
+                entry = (version, builder(self._frame))
+                self._derived[name] = entry
+            return entry[1]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """获取全局数据仓库实例"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = DataStore()
+    return _store
@@ -0,0 +1,41 @@
+"""EDUCATION_STATS 表中的教育程度数据
+
+从 recycling_database.db 读取一次，按 Area × Year 索引的区域和年份顺序保存为二维数组，
+页面只做数组切片，结果是确定的，可以和其他图表一样缓存。
+"""
+import numpy as np
+
+from .area_index import get_area_index
+from .data_store import get_store
+from .queries import query_recycling
+
+# 图表中的教育程度名称 -> 查询层中的列名
+EDUCATION_LEVELS = {
+    'Higher Education': 'Higher_Education_Percentage',
+    'Secondary Education': 'Secondary_Education_Percentage',
+    'Basic Education': 'Basic_Education_Percentage',
+}
+
+
+def build_education_matrices(index):
+    """教育程度名称 -> (区域, 年份) 数组，与 index.matrices 对齐（缺失为 NaN）"""
+    df = query_recycling(['Area', 'Year'] + list(EDUCATION_LEVELS.values()), order_by=())
+    area_pos = np.array([index.area_pos.get(area, -1) for area in df['Area']], dtype=int)
+    years = df['Year'].to_numpy(dtype=int)
+    year_pos = np.searchsorted(index.years, years)
+    year_pos = np.minimum(year_pos, len(index.years) - 1)
+    valid = (area_pos >= 0) & (index.years[year_pos] == years)
+
+    shape = (len(index.areas), len(index.years))
+    matrices = {}
+    for level, column in EDUCATION_LEVELS.items():
+        matrix = np.full(shape, np.nan)
+        matrix[area_pos[valid], year_pos[valid]] = df[column].to_numpy(dtype=float)[valid]
+        matrices[level] = matrix
+    return matrices
+
+
+def get_education_matrices():
+    """获取当前数据版本对应的教育程度数组"""
+    return get_store().derived('education_matrices',
+                               lambda df: build_education_matrices(get_area_index()))
@@ -0,0 +1,382 @@
+"""从 newdata.csv 和 population.csv 重建 recycling_database.db
+
+在一个事务里写入 AREA、YEAR、RECYCLING_DATA、POPULATION_DATA、REUSE_ACTIVITY 和
+REUSE_METRICS：
+
+- 每个表的行由 CSV 按列向量化构建，用 executemany 批量写入
+- 每行内容的 64 位哈希（pandas.util.hash_pandas_object）保存在 ETL_ROW_HASH 中；
+  重新导入时只对哈希变化的行做 upsert，删除源数据中已经不存在的行
+- 全量导入（--full，或表中还没有哈希记录）时先清空表、删除二级索引，
+  写完后再统一建索引
+- 连接使用 WAL、synchronous=NORMAL、temp_store=MEMORY
+
+文本列保持 CSV 中的原样（例如 "6,684"、"Unknown"），数值解析由查询层完成，
+与原有数据库的内容一致。EDUCATION_STATS 和用户相关的表不受影响。
+
+用法（输出每个表的耗时和变化行数）：
+    python -m utils.etl [--full] [--db PATH]
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from .data_store import DATA_DIR, DATA_PATH
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = DATA_DIR / "recycling_database.db"
+POPULATION_PATH = DATA_DIR / "population.csv"
+JOURNAL_MODE = os.environ.get("ETL_JOURNAL_MODE", "WAL")
+
+PRAGMAS = [
+    f"PRAGMA journal_mode={JOURNAL_MODE}",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",  # 64 MB
+]
+
+HASH_TABLE = "ETL_ROW_HASH"
+KEY_SEPARATOR = "|"
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS AREA (
+            Code_recycling TEXT NOT NULL,
+            Area TEXT NOT NULL,
+            London_Status TEXT,
+            Region_and_Borough TEXT,
+            Postcode TEXT,
+            Area_km2 REAL,
+            CONSTRAINT pk_area PRIMARY KEY (Code_recycling)
+        )""",
+    """CREATE TABLE IF NOT EXISTS YEAR (
+            Year_ID INTEGER NOT NULL,
+            CONSTRAINT pk_year PRIMARY KEY (Year_ID)
+        )""",
+    """CREATE TABLE IF NOT EXISTS POPULATION_DATA (
+            Code_recycling TEXT NOT NULL,
+            Area TEXT,
+            Year_ID INTEGER NOT NULL,
+            Population INTEGER,
+            Population_Density REAL,
+            CONSTRAINT pk_population PRIMARY KEY (Code_recycling, Year_ID),
+            CONSTRAINT fk_population_area FOREIGN KEY (Code_recycling)
+                REFERENCES AREA (Code_recycling),
+            CONSTRAINT fk_population_year FOREIGN KEY (Year_ID)
+                REFERENCES YEAR (Year_ID)
+        )""",
+    """CREATE TABLE IF NOT EXISTS RECYCLING_DATA (
+            Code_recycling TEXT NOT NULL,
+            Year_ID INTEGER NOT NULL,
+            Recycling_Rates INTEGER,
+            Per_Capita_Recycling TEXT,
+            Environmental_Rating CHAR(1),
+            CONSTRAINT pk_recycling PRIMARY KEY (Code_recycling, Year_ID),
+            CONSTRAINT fk_recycling_area FOREIGN KEY (Code_recycling)
+                REFERENCES AREA (Code_recycling),
+            CONSTRAINT fk_recycling_year FOREIGN KEY (Year_ID)
+                REFERENCES YEAR (Year_ID)
+        )""",
+    """CREATE TABLE IF NOT EXISTS REUSE_ACTIVITY (
+            Code_recycling TEXT NOT NULL,
+            Year_ID INTEGER NOT NULL,
+            Num_Reuse_Orgs INTEGER,
+            Num_Charity_Shops INTEGER,
+            Reuse_Activity_Weight DECIMAL(10,2),
+            CONSTRAINT pk_reuse PRIMARY KEY (Code_recycling, Year_ID),
+            CONSTRAINT fk_reuse_area FOREIGN KEY (Code_recycling)
+                REFERENCES AREA (Code_recycling),
+            CONSTRAINT fk_reuse_year FOREIGN KEY (Year_ID)
+                REFERENCES YEAR (Year_ID)
+        )""",
+    """CREATE TABLE IF NOT EXISTS REUSE_METRICS (
+            Code_recycling TEXT NOT NULL,
+            Year_ID INTEGER NOT NULL,
+            Reuse_Facility_Density TEXT,
+            Resource_Recovery_Efficiency TEXT,
+            Reuse_Coverage TEXT,
+            Per_Capita_Reuse TEXT,
+            CONSTRAINT pk_metrics PRIMARY KEY (Code_recycling, Year_ID),
+            CONSTRAINT fk_metrics_area FOREIGN KEY (Code_recycling)
+                REFERENCES AREA (Code_recycling),
+            CONSTRAINT fk_metrics_year FOREIGN KEY (Year_ID)
+                REFERENCES YEAR (Year_ID)
+        )""",
+    f"""CREATE TABLE IF NOT EXISTS {HASH_TABLE} (
+            Table_Name TEXT NOT NULL,
+            Row_Key TEXT NOT NULL,
+            Row_Hash INTEGER NOT NULL,
+            PRIMARY KEY (Table_Name, Row_Key)
+        ) WITHOUT ROWID""",
+]
+
+# 查询层使用的二级索引：全量导入时在写完数据后才建立
+INDEXES = {
+    'idx_recycling_year': "RECYCLING_DATA (Year_ID)",
+    'idx_area_status': "AREA (London_Status)",
+    'idx_area_name': "AREA (Area)",
+}
+
+# 表名 -> (主键列, 其余列)；按外键依赖顺序排列
+TABLES = {
+    'AREA': (['Code_recycling'],
+             ['Area', 'London_Status', 'Region_and_Borough', 'Postcode', 'Area_km2']),
+    'YEAR': (['Year_ID'], []),
+    'RECYCLING_DATA': (['Code_recycling', 'Year_ID'],
+                       ['Recycling_Rates', 'Per_Capita_Recycling', 'Environmental_Rating']),
+    'POPULATION_DATA': (['Code_recycling', 'Year_ID'],
+                        ['Area', 'Population', 'Population_Density']),
+    'REUSE_ACTIVITY': (['Code_recycling', 'Year_ID'],
+                       ['Num_Reuse_Orgs', 'Num_Charity_Shops', 'Reuse_Activity_Weight']),
+    'REUSE_METRICS': (['Code_recycling', 'Year_ID'],
+                      ['Reuse_Facility_Density', 'Resource_Recovery_Efficiency',
+                       'Reuse_Coverage', 'Per_Capita_Reuse']),
+}
+
+
+def read_sources(data_path=DATA_PATH, population_path=POPULATION_PATH):
+    """读取 CSV：文本保持原样（只有空值和 "NaN" 视为缺失），键列和数值列单独转换"""
+    df = pd.read_csv(data_path, dtype=str)
+    df['Year'] = pd.to_numeric(df['Year'], errors='coerce').astype('Int64')
+    df = df[df['Code_recycling'].notna() & df['Year'].notna()]
+
+    # population.csv 中有的 (区域, 年份) 以其中的人口数为准
+    if population_path is not None and os.path.exists(population_path):
+        population = pd.read_csv(population_path, dtype={'GSS Code': str})
+        population = population.rename(columns={'GSS Code': 'Code_recycling'})
+        population['Year'] = population['Year'].astype('Int64')
+        df = df.merge(population[['Code_recycling', 'Year', 'Persons']],
+                      on=['Code_recycling', 'Year'], how='left')
+        df['Population'] = df['Persons'].astype('string').fillna(df['Population'])
+    return df.drop_duplicates(['Code_recycling', 'Year'], keep='last')
+
+
+def _integers(series):
+    return pd.to_numeric(series, errors='coerce').round().astype('Int64')
+
+
+def build_tables(df):
+    """CSV 数据 -> 每个表的数据框（列顺序与 TABLES 一致）"""
+    year = df['Year'].rename('Year_ID')
+    code = df['Code_recycling']
+    areas = df.drop_duplicates('Code_recycling')
+    tables = {
+        'AREA': pd.DataFrame({
+            'Code_recycling': areas['Code_recycling'],
+            'Area': areas['Area'],
+            'London_Status': areas['London_Status'],
+            'Region_and_Borough': areas['Region_and_Borough'],
+            'Postcode': areas['Postcode'],
+            'Area_km2': pd.to_numeric(areas['Area_km2'], errors='coerce'),
+        }),
+        'YEAR': pd.DataFrame({'Year_ID': np.sort(year.unique())}).astype('Int64'),
+        'RECYCLING_DATA': pd.DataFrame({
+            'Code_recycling': code,
+            'Year_ID': year,
+            'Recycling_Rates': _integers(df['Recycling_Rates']),
+            'Per_Capita_Recycling': df['Per_Capita_Recycling'],
+            'Environmental_Rating': df['recycling_ranking'],
+        }),
+        'POPULATION_DATA': pd.DataFrame({
+            'Code_recycling': code,
+            'Year_ID': year,
+            'Area': df['Area'],
+            'Population': _integers(df['Population']),
+            'Population_Density': df['Population_Density'],
+        }),
+        'REUSE_ACTIVITY': pd.DataFrame({
+            'Code_recycling': code,
+            'Year_ID': year,
+            'Num_Reuse_Orgs': df['Number of Reuse Organisations'],
+            'Num_Charity_Shops': df['Number of Charity Shops - 2007'],
+            'Reuse_Activity_Weight': df['Re-use Activity Weight (tonnes)'],
+        }),
+        'REUSE_METRICS': pd.DataFrame({
+            'Code_recycling': code,
+            'Year_ID': year,
+            'Reuse_Facility_Density': df['Reuse_Facility_Density'],
+            'Resource_Recovery_Efficiency': df['Resource_Recovery_Efficiency'],
+            'Reuse_Coverage': df['Reuse_Coverage'],
+            'Per_Capita_Reuse': df['Per_Capita_Reuse'],
+        }),
+    }
+    # 按主键排序：写入时 B 树只在末尾追加
+    return {name: frame[TABLES[name][0] + TABLES[name][1]]
+            .sort_values(TABLES[name][0], kind='stable').reset_index(drop=True)
+            for name, frame in tables.items()}
+
+
+def row_keys(frame, key_columns):
+    """主键列拼接成的文本键，例如 'E09000002|2003'
+
+    删除行时按分隔符拆回各列，因此键值中含有分隔符时报错（ValueError）。
+    """
+    keys = None
+    for col in key_columns:
+        values = frame[col].astype('string')
+        bad = values.str.contains(KEY_SEPARATOR, regex=False, na=False)
+        if bad.any():
+            raise ValueError(f"Key column {col} contains the key separator "
+                             f"{KEY_SEPARATOR!r}: {values[bad].iloc[0]!r}")
+        keys = values if keys is None else keys + KEY_SEPARATOR + values
+    return keys.to_numpy(dtype=object)
+
+
+def row_hashes(frame):
+    """每行内容的 64 位哈希（向量化），转换为 SQLite 可以保存的有符号整数"""
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy().view(np.int64)
+
+
+def _records(frame):
+    """数据框 -> executemany 使用的元组列表（缺失值为 None，numpy 标量转为 Python 类型）"""
+    columns = []
+    for col in frame.columns:
+        values = frame[col].astype(object)
+        columns.append(values.where(frame[col].notna(), None).tolist())
+    return list(zip(*columns))
+
+
+@contextmanager
+def _timer(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def connect(db_path=DB_PATH):
+    """ETL 使用的写连接：手动管理事务，设置 WAL 等参数"""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def load_table(conn, name, frame, full):
+    """写入一个表，返回 (插入或更新的行数, 删除的行数, 未变化的行数)"""
+    key_columns, value_columns = TABLES[name]
+    columns = key_columns + value_columns
+    keys = row_keys(frame, key_columns)
+    hashes = row_hashes(frame)
+
+    rows = conn.execute(
+        f"SELECT Row_Key, Row_Hash FROM {HASH_TABLE} WHERE Table_Name = ?", (name,)).fetchall()
+    stored_keys = pd.Index([key for key, _ in rows], dtype=object)
+    stored_hashes = np.fromiter((h for _, h in rows), dtype=np.int64, count=len(rows))
+    full = full or not rows
+    placeholders = ", ".join("?" for _ in columns)
+    column_list = ", ".join(columns)
+
+    if full:
+        conn.execute(f"DELETE FROM {name}")
+        conn.execute(f"DELETE FROM {HASH_TABLE} WHERE Table_Name = ?", (name,))
+        conn.executemany(f"INSERT INTO {name} ({column_list}) VALUES ({placeholders})",
+                         _records(frame))
+        conn.executemany(f"INSERT INTO {HASH_TABLE} VALUES (?, ?, ?)",
+                         [(name, key, int(h)) for key, h in zip(keys, hashes)])
+        return len(frame), 0, 0
+
+    # 与保存的哈希按键对齐（向量化）：新行或哈希不同的行需要写入
+    positions = stored_keys.get_indexer(keys)
+    changed = (positions < 0) | (stored_hashes[positions] != hashes)
+
+    if changed.any():
+        if value_columns:
+            updates = ", ".join(f"{col} = excluded.{col}" for col in value_columns)
+            conflict = f"DO UPDATE SET {updates}"
+        else:
+            conflict = "DO NOTHING"
+        conn.executemany(
+            f"INSERT INTO {name} ({column_list}) VALUES ({placeholders}) "
+            f"ON CONFLICT ({', '.join(key_columns)}) {conflict}",
+            _records(frame[changed]))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO {HASH_TABLE} VALUES (?, ?, ?)",
+            [(name, key, int(h)) for key, h in zip(keys[changed], hashes[changed])])
+
+    # 源数据中已经不存在的行
+    removed = stored_keys[~stored_keys.isin(keys)].tolist()
+    if removed:
+        condition = " AND ".join(f"{col} = ?" for col in key_columns)
+        removed_keys = [tuple(key.split(KEY_SEPARATOR)) for key in removed]
+        conn.executemany(f"DELETE FROM {name} WHERE {condition}", removed_keys)
+        conn.executemany(f"DELETE FROM {HASH_TABLE} WHERE Table_Name = ? AND Row_Key = ?",
+                         [(name, key) for key in removed])
+    return int(changed.sum()), len(removed), int((~changed).sum())
+
+
+def run_etl(db_path=DB_PATH, data_path=DATA_PATH, population_path=POPULATION_PATH, full=False):
+    """从 CSV 导入到数据库，返回报告（每个表的变化行数和各阶段耗时，单位秒）"""
+    timings = {}
+    report = {'tables': {}, 'timings': timings}
+    start = time.perf_counter()
+
+    with _timer(timings, 'read'):
+        df = read_sources(data_path, population_path)
+    with _timer(timings, 'transform'):
+        tables = build_tables(df)
+
+    conn = connect(db_path)
+    try:
+        with _timer(timings, 'schema'):
+            for statement in SCHEMA:
+                conn.execute(statement)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if full:
+                with _timer(timings, 'drop indexes'):
+                    for index in INDEXES:
+                        conn.execute(f"DROP INDEX IF EXISTS {index}")
+            for name, frame in tables.items():
+                with _timer(timings, name):
+                    written, deleted, unchanged = load_table(conn, name, frame, full)
+                report['tables'][name] = {'rows': len(frame), 'written': written,
+                                          'deleted': deleted, 'unchanged': unchanged}
+            with _timer(timings, 'build indexes'):
+                for index, target in INDEXES.items():
+                    conn.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {target}")
+            with _timer(timings, 'commit'):
+                conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        with _timer(timings, 'checkpoint'):
+            if JOURNAL_MODE.upper() == "WAL":
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+
+    report['total'] = time.perf_counter() - start
+    logger.info("ETL into %s finished in %.0f ms (%d rows written)", db_path,
+                report['total'] * 1000, sum(t['written'] for t in report['tables'].values()))
+    return report
+
+
+def format_report(report):
+    """文本形式的导入报告"""
+    lines = [f"{'Table':<18}{'rows':>8}{'written':>9}{'deleted':>9}{'unchanged':>11}{'ms':>9}"]
+    for name, counts in report['tables'].items():
+        lines.append(f"{name:<18}{counts['rows']:>8}{counts['written']:>9}{counts['deleted']:>9}"
+                     f"{counts['unchanged']:>11}{report['timings'].get(name, 0) * 1000:>9.1f}")
+    lines.append("")
+    for phase in ['read', 'transform', 'schema', 'drop indexes', 'build indexes', 'commit', 'checkpoint']:
+        if phase in report['timings']:
+            lines.append(f"{phase:<18}{report['timings'][phase] * 1000:>9.1f} ms")
+    lines.append(f"{'total':<18}{report['total'] * 1000:>9.1f} ms")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load newdata.csv and population.csv into the database")
+    parser.add_argument("--full", action="store_true", help="clear the tables and reload every row")
+    parser.add_argument("--db", default=str(DB_PATH), help="database path")
+    args = parser.parse_args()
+
+    print(format_report(run_etl(args.db, full=args.full)))
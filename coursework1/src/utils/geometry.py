@@ -0,0 +1,226 @@
+"""伦敦各区边界（data/london_boroughs.geojson）的几何处理
+
+GeoJSON 只在第一次使用时读取，然后：
+
+- 用 Douglas-Peucker 算法按容差简化多边形（容差单位为经纬度，GEO_SIMPLIFY_TOLERANCE）
+- 坐标量化到固定小数位（GEO_PRECISION），去掉量化后重复的点
+- 用原始坐标计算每个区的面积加权质心（分级统计图模式下的标记位置）
+- 序列化成紧凑的 JSON，按内容摘要缓存
+
+地图不把边界嵌在每次回调返回的图表里，而是引用 /geo/london_boroughs.json?m=<摘要>：
+浏览器只下载一次（gzip 压缩、长期缓存），之后每次切换年份只传输数值。
+缓存这类图表时要把 geometry_version() 放进缓存键。
+
+只有边界覆盖了要显示的所有区时（BoroughGeometry.covers）才画分级统计图；
+目前仓库中的 GeoJSON 只有少数几个区，地图仍使用背景图片。
+"""
+import functools
+import json
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+from flask import Response, request
+
+from .http_cache import IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, content_digest
+
+logger = logging.getLogger(__name__)
+
+GEOJSON_PATH = Path(__file__).parent.parent.parent / "data" / "london_boroughs.geojson"
+SIMPLIFY_TOLERANCE = float(os.environ.get("GEO_SIMPLIFY_TOLERANCE", 0.0005))  # 约 50 米
+COORD_PRECISION = int(os.environ.get("GEO_PRECISION", 4))  # 约 10 米
+GEOJSON_ROUTE = "/geo/london_boroughs.json"
+FEATURE_ID_KEY = "properties.name"
+
+_route_installed = False
+
+
+def simplify_ring(points, tolerance):
+    """Douglas-Peucker 简化一个闭合环，保留首尾点；点数太少时返回原环"""
+    points = np.asarray(points, dtype=float)
+    if tolerance <= 0 or len(points) <= 4:
+        return points
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    # 闭合环的首尾是同一个点，先用离起点最远的点把环分成两段
+    far = int(np.argmax(np.hypot(*(points - points[0]).T)))
+    keep[far] = True
+    stack = [(0, far), (far, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        segment = points[end] - points[start]
+        offsets = points[start + 1:end] - points[start]
+        length = np.hypot(*segment)
+        if length == 0:
+            distances = np.hypot(*offsets.T)
+        else:
+            distances = np.abs(segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]) / length
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            split = start + 1 + i
+            keep[split] = True
+            stack.append((start, split))
+            stack.append((split, end))
+    simplified = points[keep]
+    return simplified if len(simplified) >= 4 else points
+
+
+def quantise_ring(points, precision):
+    """坐标保留 precision 位小数，去掉量化后相邻重复的点"""
+    points = np.round(np.asarray(points, dtype=float), precision)
+    if len(points) > 1:
+        changed = np.any(points[1:] != points[:-1], axis=1)
+        points = points[np.concatenate([[True], changed])]
+    return points
+
+
+def _polygons(geometry):
+    """几何对象中的多边形列表（每个多边形是环的列表）"""
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    return []
+
+
+def _ring_area_centroid(ring):
+    """鞋带公式：环的有向面积和质心"""
+    x, y = np.asarray(ring, dtype=float)[:, :2].T
+    cross = x[:-1] * y[1:] - x[1:] * y[:-1]
+    area = cross.sum() / 2
+    if area == 0:
+        return 0.0, np.array([x.mean(), y.mean()])
+    cx = ((x[:-1] + x[1:]) * cross).sum() / (6 * area)
+    cy = ((y[:-1] + y[1:]) * cross).sum() / (6 * area)
+    return area, np.array([cx, cy])
+
+
+def polygon_centroid(geometry):
+    """面积加权质心 [经度, 纬度]（外环面积为正，内环（洞）为负）"""
+    total = 0.0
+    moment = np.zeros(2)
+    points = []
+    for polygon in _polygons(geometry):
+        for i, ring in enumerate(polygon):
+            area, centroid = _ring_area_centroid(ring)
+            area = abs(area) if i == 0 else -abs(area)
+            total += area
+            moment += area * centroid
+            points.extend(ring)
+    if total == 0:
+        return np.asarray(points, dtype=float)[:, :2].mean(axis=0) if points else None
+    return moment / total
+
+
+class BoroughGeometry:
+    """简化、量化后的区边界，以及每个区的质心"""
+
+    def __init__(self, geojson, tolerance=SIMPLIFY_TOLERANCE, precision=COORD_PRECISION):
+        self.tolerance = tolerance
+        self.precision = precision
+        self.centroids = {}
+        features = []
+        n_points = n_simplified = 0
+        for feature in geojson.get('features', []):
+            name = feature.get('properties', {}).get('name')
+            polygons = _polygons(feature.get('geometry') or {'type': None})
+            if not name or not polygons:
+                continue
+            self.centroids[name] = polygon_centroid(feature['geometry'])
+            simplified = []
+            for polygon in polygons:
+                rings = [quantise_ring(simplify_ring(ring, tolerance), precision) for ring in polygon]
+                n_points += sum(len(ring) for ring in polygon)
+                n_simplified += sum(len(ring) for ring in rings)
+                simplified.append([ring.tolist() for ring in rings])
+            features.append({
+                'type': 'Feature',
+                'properties': {'name': name},
+                'geometry': ({'type': 'Polygon', 'coordinates': simplified[0]} if len(simplified) == 1
+                             else {'type': 'MultiPolygon', 'coordinates': simplified}),
+            })
+        self.geojson = {'type': 'FeatureCollection', 'features': features}
+        self.payload = json.dumps(self.geojson, separators=(',', ':')).encode()
+        self.digest = content_digest(self.payload)
+        logger.info("Borough geometry: %d features, %d -> %d points, %d bytes",
+                    len(features), n_points, n_simplified, len(self.payload))
+
+    @property
+    def names(self):
+        return list(self.centroids)
+
+    def centroid(self, name):
+        return self.centroids.get(name)
+
+    def covers(self, areas):
+        """是否有所有这些区的边界（没有区时为 False）"""
+        areas = list(areas)
+        return bool(areas) and all(area in self.centroids for area in areas)
+
+    def source(self):
+        """Choropleth 的 geojson 参数：服务器路由已安装时用带摘要的 URL，否则直接嵌入"""
+        if _route_installed:
+            return f"{GEOJSON_ROUTE}?m={self.digest[:12]}"
+        return self.geojson
+
+
+def borough_coordinates(areas, fallback, geometry=None):
+    """区域的 [经度, 纬度] 数组：有边界数据时用质心，否则用 fallback 中的坐标（都没有为 NaN）"""
+    coords = np.full((len(areas), 2), np.nan)
+    for i, area in enumerate(areas):
+        centroid = geometry.centroid(area) if geometry is not None else None
+        if centroid is None:
+            centroid = fallback.get(area)
+        if centroid is not None:
+            coords[i] = centroid
+    return coords
+
+
+def _source_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+@functools.lru_cache(maxsize=8)
+def _load_geometry(path, signature, tolerance, precision):
+    with open(path, encoding='utf-8') as f:
+        geojson = json.load(f)
+    return BoroughGeometry(geojson, tolerance, precision)
+
+
+def get_borough_geometry(tolerance=SIMPLIFY_TOLERANCE, precision=COORD_PRECISION, path=GEOJSON_PATH):
+    """共享的区边界；文件不存在时返回 None（地图退回到只显示标记）"""
+    try:
+        signature = _source_signature(path)
+    except OSError:
+        logger.warning("Borough GeoJSON not found: %s", path)
+        return None
+    return _load_geometry(str(path), signature, tolerance, precision)
+
+
+def geometry_version():
+    """当前边界数据的摘要（没有边界文件时为 None），用于引用边界的图表的缓存键"""
+    geometry = get_borough_geometry()
+    return None if geometry is None else geometry.digest
+
+
+def install_geometry_route(app):
+    """注册 /geo/london_boroughs.json：返回紧凑的 GeoJSON，带 ?m= 摘要时长期缓存"""
+    global _route_installed
+
+    @app.server.route(GEOJSON_ROUTE)
+    def _borough_geojson():
+        geometry = get_borough_geometry()
+        if geometry is None:
+            return Response(status=404)
+        response = Response(geometry.payload, mimetype='application/json')
+        response.set_etag(geometry.digest)
+        response.headers['Cache-Control'] = (
+            IMMUTABLE_CACHE_CONTROL if 'm' in request.args else REVALIDATE_CACHE_CONTROL)
+        return response
+
+    _route_installed = True
+    return app.server
@@ -0,0 +1,119 @@
+"""区域分组索引
+
+在数据加载时由 Area × Year 索引和预计算排名构建一次：
+
+- 区域类型分组（'london_all'、'core_london' 等）-> 区域位置
+- 地区（Region_and_Borough）-> 区域位置
+- 每一年的排名类分组（'top_5_london' 等）-> 区域位置
+
+所有下拉框选项和选择解析都通过这里完成，解析 'london_all'、'top_5_london' 这样的选择
+只是查字典，不再访问数据框。
+"""
+import numpy as np
+
+from .area_index import LONDON_STATUSES, get_area_index
+from .data_store import get_store
+from .rankings import get_rankings
+
+# 区域类型分组 -> London_Status 集合（None 表示所有区域）
+STATUS_GROUPS = {
+    'all': None,
+    'london_all': LONDON_STATUSES,
+    'core_london': ['Core London'],
+    'outer_london': ['Outer London'],
+    'non_london': ['Non-London'],
+}
+
+# 排名类分组 -> (London_Status 集合, 数量, 是否取最高)
+RANKED_GROUPS = {
+    'top_5_london': (LONDON_STATUSES, 5, True),
+    'bottom_5_london': (LONDON_STATUSES, 5, False),
+    'top_5_non_london': (['Non-London'], 5, True),
+    'bottom_5_non_london': (['Non-London'], 5, False),
+}
+
+
+class AreaGroups:
+    """分组 -> 区域位置（按 index.areas 的顺序，即区域名称排序）"""
+
+    def __init__(self, index, rankings):
+        self.index = index
+        self.status_groups = {
+            group: (np.arange(len(index.areas)) if statuses is None
+                    else np.flatnonzero(index.status_mask(statuses)))
+            for group, statuses in STATUS_GROUPS.items()
+        }
+
+        regions = index.attributes.get('Region_and_Borough')
+        self.regions = {}
+        if regions is not None:
+            for pos, region in enumerate(regions):
+                if isinstance(region, str):
+                    self.regions.setdefault(region, []).append(pos)
+        self.regions = {region: np.array(pos, dtype=int) for region, pos in self.regions.items()}
+
+        # 排名类分组按每一年预先展开
+        self.ranked_groups = {
+            (group, int(year)): rankings.top(n, year=year, statuses=statuses, largest=largest)
+            for group, (statuses, n, largest) in RANKED_GROUPS.items()
+            for year in index.years
+        }
+        self.last_year = int(index.years[-1]) if len(index.years) else None
+
+    def __contains__(self, group):
+        return group in self.status_groups or group in RANKED_GROUPS
+
+    def positions(self, group, year_range=None):
+        """分组对应的区域位置；排名类分组使用范围内最新一年的排名，未知分组返回空数组"""
+        if group in self.status_groups:
+            return self.status_groups[group]
+        if group in RANKED_GROUPS:
+            return self.ranked_groups.get((group, self.rank_year(year_range)), np.empty(0, dtype=int))
+        return np.empty(0, dtype=int)
+
+    def rank_year(self, year_range=None):
+        """排名类分组使用的年份：年份范围的最后一年（不超过数据中的最新年份）"""
+        if year_range is None or self.last_year is None:
+            return self.last_year
+        return min(int(year_range[1]), self.last_year)
+
+    def areas(self, group, year_range=None):
+        """分组对应的区域名称"""
+        return self.index.areas[self.positions(group, year_range)]
+
+    def codes(self, group, year_range=None):
+        """分组对应的区域代码（Code_recycling）"""
+        return self.index.attributes['Code_recycling'][self.positions(group, year_range)]
+
+    def region_areas(self, region):
+        """某个地区（Region_and_Borough）的区域名称"""
+        return self.index.areas[self.regions.get(region, np.empty(0, dtype=int))]
+
+    def resolve(self, selections, year_range=None):
+        """下拉框选择（分组或单个区域名称/代码）-> 去重后的区域位置，保持选择顺序
+
+        以 '_header' 结尾的分隔项和未知的选择被忽略。
+        """
+        positions = []
+        seen = set()
+        for selection in selections or []:
+            if selection in self:
+                group_positions = self.positions(selection, year_range)
+            else:
+                pos = self.index.position(selection)
+                group_positions = [] if pos is None else [pos]
+            for pos in group_positions:
+                if pos not in seen:
+                    seen.add(pos)
+                    positions.append(pos)
+        return np.array(positions, dtype=int)
+
+    def area_options(self, group, label='{}'):
+        """分组内每个区域的下拉框选项"""
+        return [{'label': label.format(area), 'value': area} for area in self.areas(group)]
+
+
+def get_area_groups():
+    """获取当前数据版本对应的共享分组索引"""
+    return get_store().derived('area_groups',
+                               lambda df: AreaGroups(get_area_index(), get_rankings()))
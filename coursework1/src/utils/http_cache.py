@@ -0,0 +1,148 @@
+"""HTTP 响应压缩和缓存头
+
+- 压缩：回调返回的图表 JSON（热力图、条形图）往往有几百 KB，按 Accept-Encoding
+  使用 brotli（已安装时）或 gzip 压缩，小于阈值的响应不压缩。GET 响应的压缩结果
+  按内容摘要缓存，布局、依赖和组件脚本不会每次重新压缩。
+- _dash-layout、_dash-dependencies：使用内容摘要作为强 ETag，Cache-Control: no-cache，
+  浏览器每次验证，内容没有变化时返回 304。
+- assets：带 ?m= 指纹的 URL 内容不会变化，缓存一年（immutable）；不带指纹的每次验证。
+
+环境变量：HTTP_COMPRESSION=0 关闭压缩，HTTP_COMPRESSION_MIN_SIZE 设置最小字节数。
+"""
+import functools
+import gzip
+import hashlib
+import os
+from pathlib import Path
+
+import dash
+from flask import request
+
+from .cache import FigureCache
+
+try:
+    import brotli
+except ImportError:  # brotli 是可选依赖，没有时只使用 gzip
+    brotli = None
+
+COMPRESSION_ENABLED = os.environ.get("HTTP_COMPRESSION", "1") != "0"
+COMPRESSION_MIN_SIZE = int(os.environ.get("HTTP_COMPRESSION_MIN_SIZE", 1024))
+GZIP_LEVEL = int(os.environ.get("HTTP_GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.environ.get("HTTP_BROTLI_QUALITY", 5))
+
+COMPRESSIBLE_TYPES = {
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "text/css",
+    "text/html",
+    "text/plain",
+    "image/svg+xml",
+}
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+ASSETS_FOLDER = Path(__file__).parent.parent / "assets"
+
+# 压缩后的 GET 响应体，键为 (内容摘要, 编码)
+_compressed = FigureCache(max_entries=256, max_bytes=32 * 1024 * 1024)
+
+
+def content_digest(data):
+    """响应内容的摘要，用作强 ETag"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _asset_fingerprint(name):
+    return content_digest((ASSETS_FOLDER / name).read_bytes())[:12]
+
+
+def asset_url(name):
+    """带内容指纹的 assets URL（例如 /assets/london_map.png?m=...），可以长期缓存"""
+    try:
+        return f"{dash.get_asset_url(name)}?m={_asset_fingerprint(name)}"
+    except OSError:
+        return dash.get_asset_url(name)
+
+
+def _choose_encoding(response):
+    """根据请求头和响应内容选择压缩编码，不压缩时返回 None"""
+    if not COMPRESSION_ENABLED or response.status_code != 200:
+        return None
+    if response.headers.get("Content-Encoding") or "Content-Range" in response.headers:
+        return None
+    if response.mimetype not in COMPRESSIBLE_TYPES or "no-transform" in response.cache_control:
+        return None
+    length = response.content_length
+    if length is not None and length < COMPRESSION_MIN_SIZE:
+        return None
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def _compress_data(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _compress(response, encoding, cacheable):
+    """压缩响应体；内容小于阈值时保持原样"""
+    response.direct_passthrough = False
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_SIZE:
+        return
+    if cacheable:
+        key = (content_digest(data), encoding)
+        hit, body = _compressed.get(key)
+        if not hit:
+            body = _compress_data(data, encoding)
+            _compressed.put(key, body, size=len(body))
+    else:
+        body = _compress_data(data, encoding)
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+
+
+def install_http_caching(app):
+    """给 Dash 应用的 Flask 服务器添加压缩、ETag 和 Cache-Control 处理"""
+    prefix = app.config.routes_pathname_prefix
+    revalidate_paths = {prefix + "_dash-layout", prefix + "_dash-dependencies"}
+    assets_prefix = prefix + app.config.assets_url_path.strip("/") + "/"
+
+    @app.server.after_request
+    def _cache_and_compress(response):
+        path = request.path
+        is_get = request.method in ("GET", "HEAD")
+
+        if path in revalidate_paths and is_get and response.status_code == 200:
+            response.set_etag(content_digest(response.get_data()))
+            response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+        elif path.startswith(assets_prefix) and response.status_code in (200, 304):
+            response.headers["Cache-Control"] = (
+                IMMUTABLE_CACHE_CONTROL if "m" in request.args else REVALIDATE_CACHE_CONTROL)
+
+        encoding = _choose_encoding(response)
+        if response.mimetype in COMPRESSIBLE_TYPES:
+            response.vary.add("Accept-Encoding")
+
+        # 压缩后的表示使用不同的 ETag；先做条件判断，命中 304 时不需要压缩
+        etag, weak = response.get_etag()
+        if etag and encoding:
+            response.set_etag(f"{etag}-{encoding}", weak=weak)
+        if is_get and etag and response.status_code == 200:
+            response.make_conditional(request)
+            if response.status_code == 304:
+                return response
+
+        if encoding:
+            _compress(response, encoding, cacheable=is_get)
+        return response
+
+    return app.server
@@ -0,0 +1,298 @@
+"""newdata.csv 的导入步骤：清洗、压缩类型，并写入二进制列式缓存
+
+清洗和类型转换都是按列向量化完成的：
+
+- 缺失值标记（"Unknown"、"NaN%"、"N/A" 等）统一映射为缺失值
+- 字符串数值（"6,684"、"0.021 %/person"、"0.092 kg"）提取为数字
+- 重复较多的文本列（Area、London_Status、Region_and_Borough、Postcode 等）转为
+  Categorical，类别按字母排序，排序和比较结果与字符串相同
+- 整数列缩小到 int32（不再更小，避免 int8/int16 在运算中溢出），
+  浮点列在无损时缩小到 float32
+
+缓存目录中每列保存为一个 .npy 文件（数值列直接保存，文本列保存为整数编码，
+类别表写在 meta.json 中），读取时数值列使用 mmap，文本列直接由编码构建 Categorical，
+无需重新解析 CSV。
+
+用法（预先构建缓存，输出耗时和清洗前后的内存占用）：
+    python -m utils.ingest
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR_NAME = ".cache"
+CACHE_FORMAT = 2
+
+# 以字符串形式存储的数值列，例如 "6,684"、"0.021 %/person"、"NaN%"、"Unknown"
+STRING_NUMERIC_COLUMNS = [
+    'Per_Capita_Recycling',
+    'Per_Capita_Reuse',
+    'Population_Density',
+    'Reuse_Facility_Density',
+    'Resource_Recovery_Efficiency',
+    'Reuse_Coverage',
+    'Number of Reuse Organisations',
+    'Number of Charity Shops - 2007',
+    'Re-use Activity Weight (tonnes)',
+]
+
+_NUMBER_PATTERN = r'([-+]?\d[\d,]*(?:\.\d+)?)'
+
+# 原始数据中表示缺失的字符串（比较前去掉首尾空白）
+MISSING_VALUES = ['', 'Unknown', 'unknown', 'NaN', 'NaN%', 'nan', 'N/A', 'n/a', 'NA', '-', '--']
+
+# 不同取值数不超过行数的这个比例时，文本列转为 Categorical
+CATEGORY_MAX_RATIO = 0.5
+
+DOWNCAST_ENABLED = os.environ.get("INGEST_DOWNCAST", "1") != "0"
+
+
+def file_digest(path, chunk_size=1 << 16):
+    """计算文件内容的 SHA-1 摘要"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_signature(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def map_missing(series):
+    """把缺失值标记映射为缺失值（只处理文本列）"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    text = series.astype('string')
+    return series.mask(text.str.strip().isin(MISSING_VALUES))
+
+
+def parse_numeric_strings(series):
+    """向量化提取字符串中的第一个数字，去掉千位分隔符；无数字的值视为缺失"""
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    extracted = map_missing(series).astype('string').str.extract(_NUMBER_PATTERN, expand=False)
+    return pd.to_numeric(extracted.str.replace(',', '', regex=False), errors='coerce').astype(float)
+
+
+def to_category(series):
+    """文本列 -> Categorical（类别按字母排序）；取值太多的列保持原样"""
+    if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_numeric_dtype(series):
+        return series
+    n_unique = series.nunique(dropna=True)
+    if n_unique > max(1, CATEGORY_MAX_RATIO * len(series)):
+        return series
+    categories = np.sort(series.dropna().unique().astype(str))
+    return series.astype(pd.CategoricalDtype(categories))
+
+
+def downcast_numeric(series):
+    """缩小数值列的宽度：整数最小到 int32，浮点数只在无损时改为 float32"""
+    if pd.api.types.is_integer_dtype(series):
+        info = np.iinfo(np.int32)
+        if len(series) and series.min() >= info.min and series.max() <= info.max:
+            return series.astype(np.int32)
+        return series
+    if pd.api.types.is_float_dtype(series) and series.dtype != np.float32:
+        narrow = series.astype(np.float32)
+        values, narrow_values = series.to_numpy(), narrow.to_numpy(dtype=np.float64)
+        if np.array_equal(values, narrow_values, equal_nan=True):
+            return narrow
+    return series
+
+
+def parse_frame(df):
+    """对原始 CSV 数据做清洗和类型转换（全部按列向量化）"""
+    # 缺少的必要列留给调用方（DataStore 的 read_source）报告
+    for col in ('Year', 'Recycling_Rates'):
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    for col in df.columns:
+        if col in STRING_NUMERIC_COLUMNS:
+            df[col] = parse_numeric_strings(df[col])
+        elif not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = to_category(map_missing(df[col]))
+    if DOWNCAST_ENABLED:
+        for col in df.columns:
+            df[col] = downcast_numeric(df[col])
+    return df
+
+
+def memory_report(before, after):
+    """清洗前后每列的内存占用（字节，包括字符串对象本身）"""
+    report = pd.DataFrame({
+        'dtype_before': before.dtypes.astype(str),
+        'bytes_before': before.memory_usage(index=False, deep=True),
+        'dtype_after': after.dtypes.astype(str),
+        'bytes_after': after.memory_usage(index=False, deep=True),
+    })
+    report.loc['Total'] = ['', report['bytes_before'].sum(), '', report['bytes_after'].sum()]
+    return report
+
+
+def read_csv(path):
+    """从 CSV 读取并解析数据"""
+    return parse_frame(pd.read_csv(path))
+
+
+def cache_dir_for(source):
+    source = Path(source)
+    return source.parent / CACHE_DIR_NAME / source.stem
+
+
+def _read_meta(cache_dir):
+    try:
+        with open(cache_dir / "meta.json", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('format') != CACHE_FORMAT:
+        return None
+    return meta
+
+
+def _write_meta(cache_dir, meta):
+    tmp = cache_dir / f"meta.json.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp, cache_dir / "meta.json")
+
+
+def write_cache(df, source, digest=None):
+    """把解析后的数据写成列式缓存，返回 meta 信息"""
+    source = Path(source)
+    cache_dir = cache_dir_for(source)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    digest = digest or file_digest(source)
+    prefix = digest[:12]
+
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        filename = f"{prefix}_{i}.npy"
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, categories = series.cat.codes.to_numpy(), series.cat.categories
+            np.save(cache_dir / filename, codes)
+            columns.append({'name': col, 'kind': 'cat', 'file': filename,
+                            'categories': [str(c) for c in categories]})
+        elif pd.api.types.is_numeric_dtype(series):
+            np.save(cache_dir / filename, series.to_numpy())
+            columns.append({'name': col, 'kind': 'num', 'file': filename})
+        else:
+            codes, categories = pd.factorize(series, use_na_sentinel=True)
+            np.save(cache_dir / filename, codes.astype(np.int32))
+            columns.append({'name': col, 'kind': 'str', 'file': filename,
+                            'categories': [str(c) for c in categories]})
+
+    meta = {
+        'format': CACHE_FORMAT,
+        'source': source.name,
+        'signature': file_signature(source),
+        'digest': digest,
+        'rows': len(df),
+        'columns': columns,
+    }
+    # meta 最后写入，读取方只会看到完整的缓存
+    _write_meta(cache_dir, meta)
+
+    # 清理旧版本的列文件
+    keep = {c['file'] for c in columns}
+    for stale in cache_dir.glob("*.npy"):
+        if stale.name not in keep:
+            try:
+                stale.unlink()
+            except OSError:
+                pass
+    return meta
+
+
+def read_cache(cache_dir, meta, mmap=True):
+    """从列式缓存重建数据框
+
+    mmap=True 时数值列是只读映射文件的视图，不复制到内存：原地修改这些列会报错，
+    需要修改时先 copy()（DataStore.frame() 返回的浅拷贝在写入时自动复制）。
+    """
+    data = {}
+    for col in meta['columns']:
+        arr = np.load(cache_dir / col['file'], mmap_mode='r' if mmap else None)
+        if col['kind'] == 'num':
+            # 去掉 np.memmap 子类，列仍然是映射文件的视图
+            data[col['name']] = np.asarray(arr)
+        elif col['kind'] == 'cat':
+            # 编码直接构建 Categorical，不需要展开成字符串
+            data[col['name']] = pd.Categorical.from_codes(np.asarray(arr), col['categories'])
+        else:
+            categories = np.array(col['categories'] + [None], dtype=object)
+            # 编码 -1 对应最后一个位置的缺失值
+            data[col['name']] = categories[np.asarray(arr)]
+    # copy=False：数值列直接使用只读的 mmap 数组，不复制到合并的块中
+    return pd.DataFrame(data, copy=False)
+
+
+def load_frame(source, rebuild=True):
+    """优先读取二进制缓存；源文件变化时回退到 CSV 并重建缓存"""
+    source = Path(source)
+    cache_dir = cache_dir_for(source)
+    meta = _read_meta(cache_dir)
+
+    if meta is not None:
+        signature = file_signature(source)
+        if meta['signature'] == signature:
+            return read_cache(cache_dir, meta)
+        # mtime 变化但内容未变：只更新签名
+        digest = file_digest(source)
+        if meta['digest'] == digest:
+            meta['signature'] = signature
+            try:
+                _write_meta(cache_dir, meta)
+            except OSError:
+                pass
+            return read_cache(cache_dir, meta)
+    else:
+        digest = None
+
+    df = read_csv(source)
+    if rebuild:
+        try:
+            write_cache(df, source, digest)
+        except OSError as e:
+            logger.warning("Could not write data cache: %s", e)
+    return df
+
+
+if __name__ == "__main__":
+    from .data_store import DATA_PATH
+
+    raw = pd.read_csv(DATA_PATH)
+    start = time.perf_counter()
+    df_csv = read_csv(DATA_PATH)
+    csv_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    meta = write_cache(df_csv, DATA_PATH)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df_bin = read_cache(cache_dir_for(DATA_PATH), meta)
+    bin_time = time.perf_counter() - start
+
+    print(f"Rows: {meta['rows']}, columns: {len(meta['columns'])}")
+    print(f"CSV parse:    {csv_time * 1000:.1f} ms")
+    print(f"Cache build:  {build_time * 1000:.1f} ms")
+    print(f"Cache load:   {bin_time * 1000:.1f} ms")
+    print()
+    report = memory_report(raw, df_bin)
+    print(report.to_string())
+    total_before, total_after = report.loc['Total', 'bytes_before'], report.loc['Total', 'bytes_after']
+    print(f"Memory: {total_before / 1024:.1f} KB -> {total_after / 1024:.1f} KB "
+          f"({100 * (1 - total_after / total_before):.0f}% smaller)")
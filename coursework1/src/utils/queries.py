@@ -0,0 +1,144 @@
+"""recycling_database.db 的查询层
+
+年份范围、区域集合和区域类型的筛选都下推到 SQLite 执行，只返回页面需要的列。
+SQL 文本只取决于所选的列和启用的筛选条件（列表参数通过 json_each 传入），
+因此同一种查询在每个线程的连接上只会编译一次，之后复用 sqlite3 的语句缓存。
+"""
+import json
+import sqlite3
+import threading
+from functools import lru_cache
+
+import pandas as pd
+
+from . import phase
+from .data_store import DATA_DIR
+
+DB_PATH = DATA_DIR / "recycling_database.db"
+
+
+def _numeric(expr):
+    """把 '6,684'、'0.021 %/person'、'NaN%'、'Unknown' 之类的文本转换为 REAL（无数字时为 NULL）"""
+    return (f"CASE WHEN typeof({expr}) IN ('integer', 'real') THEN {expr} "
+            f"WHEN {expr} GLOB '*[0-9]*' THEN CAST(REPLACE({expr}, ',', '') AS REAL) END")
+
+
+# 各表的连接条件（RECYCLING_DATA r 与 AREA a 为基础表）
+JOINS = {
+    'p': "LEFT JOIN POPULATION_DATA p ON p.Code_recycling = r.Code_recycling AND p.Year_ID = r.Year_ID",
+    'e': "LEFT JOIN EDUCATION_STATS e ON e.Code_recycling = r.Code_recycling AND e.Year_ID = r.Year_ID",
+    'ra': "LEFT JOIN REUSE_ACTIVITY ra ON ra.Code_recycling = r.Code_recycling AND ra.Year_ID = r.Year_ID",
+    'rm': "LEFT JOIN REUSE_METRICS rm ON rm.Code_recycling = r.Code_recycling AND rm.Year_ID = r.Year_ID",
+}
+
+# 逻辑列名 -> (SQL 表达式, 需要的连接)，列名与 newdata.csv 保持一致
+COLUMNS = {
+    'Code_recycling': ("a.Code_recycling", None),
+    'Area': ("a.Area", None),
+    'London_Status': ("a.London_Status", None),
+    'Region_and_Borough': ("a.Region_and_Borough", None),
+    'Postcode': ("a.Postcode", None),
+    'Area_km2': ("a.Area_km2", None),
+    'Year': ("r.Year_ID", None),
+    'Recycling_Rates': ("r.Recycling_Rates", None),
+    'Per_Capita_Recycling': (_numeric("r.Per_Capita_Recycling"), None),
+    'recycling_ranking': ("r.Environmental_Rating", None),
+    'Population': ("p.Population", 'p'),
+    'Population_Density': (_numeric("p.Population_Density"), 'p'),
+    'Higher_Education_Percentage': ("e.Higher_Education_Percentage", 'e'),
+    'Secondary_Education_Percentage': ("e.Secondary_Education_Percentage", 'e'),
+    'Basic_Education_Percentage': ("e.Basic_Education_Percentage", 'e'),
+    'Number of Reuse Organisations': (_numeric("ra.Num_Reuse_Orgs"), 'ra'),
+    'Number of Charity Shops - 2007': (_numeric("ra.Num_Charity_Shops"), 'ra'),
+    'Re-use Activity Weight (tonnes)': (_numeric("ra.Reuse_Activity_Weight"), 'ra'),
+    'Reuse_Facility_Density': (_numeric("rm.Reuse_Facility_Density"), 'rm'),
+    'Resource_Recovery_Efficiency': (_numeric("rm.Resource_Recovery_Efficiency"), 'rm'),
+    'Reuse_Coverage': (_numeric("rm.Reuse_Coverage"), 'rm'),
+    'Per_Capita_Reuse': (_numeric("rm.Per_Capita_Reuse"), 'rm'),
+}
+
+# 其余列都按数值列处理
+TEXT_COLUMNS = {'Code_recycling', 'Area', 'London_Status', 'Region_and_Borough', 'Postcode',
+                'recycling_ranking'}
+
+DEFAULT_COLUMNS = ['Area', 'Year', 'London_Status', 'Recycling_Rates']
+
+_local = threading.local()
+
+
+def get_connection(db_path=DB_PATH):
+    """每个线程一个只读连接（sqlite3 连接不能跨线程共享）"""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+    key = str(db_path)
+    conn = connections.get(key)
+    if conn is None:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, cached_statements=256)
+        connections[key] = conn
+    return conn
+
+
+@lru_cache(maxsize=128)
+def build_query(columns, by_year, by_area, by_status, order_by):
+    """根据列和启用的筛选条件生成 SQL（结果缓存，同一组合得到相同的 SQL 文本）"""
+    unknown = [c for c in columns + order_by if c not in COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown columns: {unknown}")
+
+    select = ",\n       ".join(f'{COLUMNS[c][0]} AS "{c}"' for c in columns)
+    joins = []
+    for c in columns:
+        join = COLUMNS[c][1]
+        if join and JOINS[join] not in joins:
+            joins.append(JOINS[join])
+
+    where = []
+    if by_year:
+        where.append("r.Year_ID BETWEEN :year_from AND :year_to")
+    if by_area:
+        where.append("(a.Area IN (SELECT value FROM json_each(:areas)) "
+                     "OR a.Code_recycling IN (SELECT value FROM json_each(:areas)))")
+    if by_status:
+        where.append("a.London_Status IN (SELECT value FROM json_each(:statuses))")
+
+    sql = (f"SELECT {select}\n"
+           f"FROM RECYCLING_DATA r\n"
+           f"JOIN AREA a ON a.Code_recycling = r.Code_recycling\n")
+    if joins:
+        sql += "\n".join(joins) + "\n"
+    if where:
+        sql += "WHERE " + "\n  AND ".join(where) + "\n"
+    if order_by:
+        sql += "ORDER BY " + ", ".join(COLUMNS[c][0] for c in order_by)
+    return sql
+
+
+def query_recycling(columns=None, year_range=None, areas=None, statuses=None,
+                    order_by=('Area', 'Year'), db_path=DB_PATH):
+    """按条件查询记录，返回只包含所需列的数据框
+
+    Parameters
+    columns: 需要的列（逻辑列名，见 COLUMNS），默认 Area/Year/London_Status/Recycling_Rates
+    year_range: (起始年, 结束年)，包含两端
+    areas: 区域名称或代码的集合
+    statuses: London_Status 的集合，例如 ['Core London', 'Outer London']
+    """
+    columns = tuple(columns or DEFAULT_COLUMNS)
+    sql = build_query(columns, year_range is not None, areas is not None,
+                      statuses is not None, tuple(order_by or ()))
+    params = {}
+    if year_range is not None:
+        params['year_from'], params['year_to'] = int(year_range[0]), int(year_range[1])
+    if areas is not None:
+        params['areas'] = json.dumps(list(areas))
+    if statuses is not None:
+        params['statuses'] = json.dumps(list(statuses))
+
+    with phase("data"):
+        cursor = get_connection(db_path).execute(sql, params)
+        df = pd.DataFrame.from_records(cursor.fetchall(), columns=list(columns))
+    for col in columns:
+        if col not in TEXT_COLUMNS and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    return df
@@ -0,0 +1,69 @@
+"""基于前缀和的任意年份范围聚合
+
+对 Area × Year 矩阵沿年份轴计算累积和与累积计数（缺失值不计入），
+任意 [y0, y1] 范围内每个区域的和、计数、均值都只需两次数组相减，
+耗时与范围宽度无关。
+"""
+import numpy as np
+
+from .area_index import get_area_index
+from .data_store import get_store
+
+DEFAULT_METRICS = ['Recycling_Rates', 'Population', 'Population_Density', 'Per_Capita_Recycling']
+
+
+class RangeAggregator:
+    """每个指标保存形状为 (区域, 年份 + 1) 的累积和与累积计数"""
+
+    def __init__(self, index, metrics=None):
+        self.index = index
+        self.years = index.years
+        self._sums = {}
+        self._counts = {}
+        for metric in metrics or DEFAULT_METRICS:
+            if metric in index.matrices:
+                self._add_metric(metric, index.matrices[metric])
+
+    def _add_metric(self, metric, matrix):
+        present = ~np.isnan(matrix)
+        n_areas = matrix.shape[0]
+        sums = np.zeros((n_areas, matrix.shape[1] + 1))
+        counts = np.zeros((n_areas, matrix.shape[1] + 1), dtype=np.int64)
+        np.cumsum(np.where(present, matrix, 0.0), axis=1, out=sums[:, 1:])
+        np.cumsum(present, axis=1, out=counts[:, 1:])
+        self._sums[metric] = sums
+        self._counts[metric] = counts
+
+    def _ensure(self, metric):
+        if metric not in self._sums:
+            self._add_metric(metric, self.index.matrices[metric])
+
+    def bounds(self, year_range):
+        """年份范围 -> 前缀数组上的 [lo, hi)；范围内没有年份时 lo == hi"""
+        lo = np.searchsorted(self.years, year_range[0], side='left')
+        hi = np.searchsorted(self.years, year_range[1], side='right')
+        return lo, max(lo, hi)
+
+    def sum(self, metric, year_range):
+        self._ensure(metric)
+        lo, hi = self.bounds(year_range)
+        sums = self._sums[metric]
+        return sums[:, hi] - sums[:, lo]
+
+    def count(self, metric, year_range):
+        self._ensure(metric)
+        lo, hi = self.bounds(year_range)
+        counts = self._counts[metric]
+        return counts[:, hi] - counts[:, lo]
+
+    def mean(self, metric, year_range):
+        """范围内各区域的均值；没有有效数据的区域为 NaN"""
+        total = self.sum(metric, year_range)
+        count = self.count(metric, year_range)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+
+def get_range_aggregator():
+    """获取当前数据版本对应的共享前缀和聚合器"""
+    return get_store().derived('range_aggregator', lambda df: RangeAggregator(get_area_index()))
@@ -0,0 +1,82 @@
+"""预先计算的区域排名
+
+每一年的排名顺序是 Area × Year 矩阵按列 argsort 的结果，在数据加载时计算一次；
+年份范围的排名使用前缀和得到的范围均值，按范围缓存。取某个区域类型的前 N 名 /
+后 N 名只需按掩码过滤已排序的位置，与区域数量成线性关系。
+"""
+import threading
+
+import numpy as np
+
+from .area_index import get_area_index
+from .data_store import get_store
+from .range_agg import get_range_aggregator
+
+
+class Rankings:
+    """按指标值从高到低排列的区域位置（缺失值不参与排名）"""
+
+    def __init__(self, index, aggregator, metric='Recycling_Rates', max_cached_ranges=256):
+        self.index = index
+        self.aggregator = aggregator
+        self.metric = metric
+        matrix = index.matrices[metric]
+        # 每列降序排列；NaN 排在最后，valid_counts 记录每列有效值的个数
+        self._year_orders = np.argsort(-matrix, axis=0, kind='stable')
+        self._valid_counts = np.count_nonzero(~np.isnan(matrix), axis=0)
+        self._range_orders = {}
+        self._max_cached_ranges = max_cached_ranges
+        self._lock = threading.Lock()
+
+    def year_order(self, year):
+        """某一年的排名顺序（区域位置）"""
+        j = self.index.year_pos.get(int(year))
+        if j is None:
+            return np.empty(0, dtype=int)
+        return self._year_orders[:self._valid_counts[j], j]
+
+    def range_order(self, year_range):
+        """年份范围内按均值的排名顺序"""
+        key = (int(year_range[0]), int(year_range[1]))
+        with self._lock:
+            order = self._range_orders.get(key)
+        if order is None:
+            means = self.aggregator.mean(self.metric, key)
+            order = np.argsort(-means, kind='stable')[:np.count_nonzero(~np.isnan(means))]
+            with self._lock:
+                if len(self._range_orders) >= self._max_cached_ranges:
+                    self._range_orders.clear()
+                self._range_orders[key] = order
+        return order
+
+    def order(self, year=None, year_range=None):
+        """单一年份或年份范围的排名顺序（范围首尾相同时等同于单一年份）"""
+        if year_range is not None and int(year_range[0]) != int(year_range[1]):
+            return self.range_order(year_range)
+        return self.year_order(year if year is not None else year_range[0])
+
+    def values(self, year=None, year_range=None):
+        """与 order 对应的指标值（按 index.areas 顺序）"""
+        if year_range is not None and int(year_range[0]) != int(year_range[1]):
+            return self.aggregator.mean(self.metric, year_range)
+        return self.index.cross_section(self.metric, year if year is not None else year_range[0])
+
+    def top(self, n, year=None, year_range=None, statuses=None, largest=True):
+        """前 N 名（largest=False 时为后 N 名）的区域位置，可限定 London_Status"""
+        order = self.order(year, year_range)
+        if not largest:
+            # 升序重排；稳定排序让并列的区域与前 N 名一样按位置（区域名称）排列
+            values = self.values(year, year_range)
+            order = order[np.argsort(values[order], kind='stable')]
+        if statuses is not None:
+            order = order[self.index.status_mask(statuses)[order]]
+        return order[:n]
+
+    def bottom(self, n, year=None, year_range=None, statuses=None):
+        return self.top(n, year, year_range, statuses, largest=False)
+
+
+def get_rankings():
+    """获取当前数据版本对应的共享排名"""
+    return get_store().derived('rankings',
+                               lambda df: Rankings(get_area_index(), get_range_aggregator()))
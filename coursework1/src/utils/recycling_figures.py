@@ -1,51 +1,37 @@
+import logging
+
+import numpy as np
 import pandas as pd
-import plotly.express as px
 from pathlib import Path
 from dash import dash_table, html, dcc
+from dash.dash_table.Format import Format, Group, Scheme
 import plotly.graph_objects as go
-import os
 import dash_bootstrap_components as dbc
-import sqlite3
+
+from .aggregates import as_cube
+from .area_index import LONDON_STATUSES, get_area_index
+from .geometry import FEATURE_ID_KEY, borough_coordinates, get_borough_geometry
+from .groups import get_area_groups
+from .http_cache import asset_url
+
+logger = logging.getLogger(__name__)
 
 # 更新数据路径
 current_dir = Path(__file__).parent.parent.parent  # 返回到 coursework1 目录
 data_path = current_dir / "data" / "newdata.csv"
 
 def get_areas_by_type(area_type):
-    """根据区域类型获取对应的区域列表"""
-    df = pd.read_csv(data_path)
-    if area_type == 'london_all':
-        return df[df['London_Status'].isin(['Core London', 'Outer London'])]['Area'].unique().tolist()
-    elif area_type == 'non_london':
-        return df[df['London_Status'] == 'Non-London']['Area'].unique().tolist()
-    elif area_type == 'core_london':
-        return df[df['London_Status'] == 'Core London']['Area'].unique().tolist()
-    elif area_type == 'outer_london':
-        return df[df['London_Status'] == 'Outer London']['Area'].unique().tolist()
-    else:
-        return [area_type]  # 单个区域
+    """根据区域类型获取对应的区域列表（来自分组索引，不读取数据文件）"""
+    groups = get_area_groups()
+    if area_type in groups:
+        return groups.areas(area_type).tolist()
+    return [area_type]  # 单个区域
 
-def load_data():
-    """加载和预处理数据"""
+def recycling_line_chart(df=None):
+    """创建回收率趋势线图（df 可以是数据框或聚合立方体，默认使用共享立方体）"""
     try:
-        current_dir = Path(__file__).parent.parent.parent
-        db_path = current_dir / "data" / "paralympics.db"  # 数据库路径
-        connection = sqlite3.connect(db_path)
-
-        # 从数据库中读取数据
-        query = "SELECT * FROM paralympics_data"  # 假设你的表名为 paralympics_data
-        df = pd.read_sql(query, connection)
-
-        return df
-    except Exception as e:
-        print(f"Error loading data: {e}")
-        return pd.DataFrame()
-
-def recycling_line_chart(df):
-    """创建回收率趋势线图"""
-    try:
-        # 按年份和区域类型计算平均回收率
-        trend_data = df.groupby(['Year', 'London_Status'])['Recycling_Rates'].mean().reset_index()
+        # 按年份和区域类型的平均回收率直接来自聚合立方体
+        cube = as_cube(df)
         
         # 创建基础图形
         fig = go.Figure()
@@ -59,12 +45,12 @@ def recycling_line_chart(df):
         }
         
         # 为每个区域类型添加折线
-        for status in trend_data['London_Status'].unique():
-            status_data = trend_data[trend_data['London_Status'] == status]
+        for status in cube.groups:
+            years, rates = cube.series('Recycling_Rates', status)
             
             fig.add_trace(go.Scatter(
-                x=status_data['Year'],
-                y=status_data['Recycling_Rates'],
+                x=years,
+                y=rates,
                 name=status,
                 mode='lines+markers',
                 line=dict(
@@ -124,13 +110,13 @@ def recycling_line_chart(df):
         
         return fig
     except Exception as e:
-        print(f"Error in recycling_line_chart: {e}")
-        import traceback
-        print(f"Traceback:\n{traceback.format_exc()}")
+        logger.exception("Error in recycling_line_chart: %s", e)
         return {}
 
 def recycling_scatter_plot(df):
     """创建人口密度与回收率的散点图"""
+    # 延迟导入：plotly.express 导入较慢，只在第一次生成图表时加载
+    import plotly.express as px
     try:
         fig = px.scatter(
             df,
@@ -156,14 +142,16 @@ def recycling_scatter_plot(df):
         
         return fig
     except Exception as e:
-        print(f"Error in recycling_scatter_plot: {e}")
+        logger.error("Error in recycling_scatter_plot: %s", e)
         return {}
 
-def recycling_bar_chart(df):
-    """创建区域类型回收率柱状图"""
+def recycling_bar_chart(df=None, year=None):
+    """创建区域类型回收率柱状图（df 可以是数据框或聚合立方体）"""
     try:
-        # 计算各区域类型的平均回收率
-        avg_rates = df.groupby('London_Status')['Recycling_Rates'].mean().reset_index()
+        cube = as_cube(df)
+        # 未指定年份时与原先一致：对数据中所有年份的记录求平均，标题取第一年
+        year_range = [year, year] if year is not None else [cube.years[0], cube.years[-1]]
+        year = year if year is not None else int(cube.years[0])
         
         fig = go.Figure()
         
@@ -174,7 +162,7 @@ def recycling_bar_chart(df):
         }
         
         for status in ['Core London', 'Outer London', 'Non-London']:
-            rate = avg_rates[avg_rates['London_Status'] == status]['Recycling_Rates'].iloc[0]
+            rate = cube.range_stats('Recycling_Rates', status, year_range)['avg']
             
             fig.add_trace(go.Bar(
                 name=status,
@@ -186,7 +174,7 @@ def recycling_bar_chart(df):
             ))
         
         fig.update_layout(
-            title=f'Average Recycling Rates by Region Type ({df["Year"].iloc[0]})',
+            title=f'Average Recycling Rates by Region Type ({year})',
             yaxis_title='Recycling Rate (%)',
             plot_bgcolor='white',
             paper_bgcolor='white',
@@ -195,36 +183,36 @@ def recycling_bar_chart(df):
         
         return fig
     except Exception as e:
-        print(f"Error in recycling_bar_chart: {e}")
+        logger.error("Error in recycling_bar_chart: %s", e)
         return {}
 
-def recycling_bar_chart_range(df, comparison_type):
-    """创建区域范围对比柱状图"""
+def recycling_bar_chart_range(df, comparison_type, year=None):
+    """创建区域范围对比柱状图（df 可以是数据框或聚合立方体）"""
+    import plotly.express as px
     try:
+        cube = as_cube(df)
+        year_range = [year, year] if year is not None else [cube.years[0], cube.years[-1]]
+        year = year if year is not None else int(cube.years[0])
+
         if comparison_type == 'london_vs_non':
             # 伦敦与非伦敦对比
-            london_data = df[df['London_Status'].isin(['Core London', 'Outer London'])]
-            non_london_data = df[df['London_Status'] == 'Non-London']
-            
-            london_avg = london_data['Recycling_Rates'].mean()
-            non_london_avg = non_london_data['Recycling_Rates'].mean()
-            
-            data = pd.DataFrame({
-                'Region': ['London', 'Non-London'],
-                'Rate': [london_avg, non_london_avg]
-            })
-            
+            regions = [('London', 'London Overall'), ('Non-London', 'Non-London')]
         else:  # core_vs_outer
             # 核心伦敦与外伦敦对比
-            data = df[df['London_Status'].isin(['Core London', 'Outer London'])].groupby('London_Status')['Recycling_Rates'].mean().reset_index()
-            data.columns = ['Region', 'Rate']
+            regions = [('Core London', 'Core London'), ('Outer London', 'Outer London')]
+
+        data = pd.DataFrame({
+            'Region': [label for label, _ in regions],
+            'Rate': [cube.range_stats('Recycling_Rates', group, year_range)['avg']
+                     for _, group in regions]
+        })
         
         fig = px.bar(
             data,
             x='Region',
             y='Rate',
             text=data['Rate'].round(1).astype(str) + '%',
-            title=f'Recycling Rate Comparison ({df["Year"].iloc[0]})'
+            title=f'Recycling Rate Comparison ({year})'
         )
         
         fig.update_layout(
@@ -236,7 +224,7 @@ def recycling_bar_chart_range(df, comparison_type):
         
         return fig
     except Exception as e:
-        print(f"Error in recycling_bar_chart_range: {e}")
+        logger.error("Error in recycling_bar_chart_range: %s", e)
         return {}
 
 def recycling_borough_chart(df):
@@ -284,15 +272,34 @@ def recycling_borough_chart(df):
         
         return fig
     except Exception as e:
-        print(f"Error in recycling_borough_chart: {e}")
+        logger.error("Error in recycling_borough_chart: %s", e)
         return {}
 
+DATA_TABLE_ID = 'analysis-data-table'
+
+# 数值列保持原始数值（排序、数值筛选按真实数值进行），显示格式由列定义完成
+DATA_TABLE_COLUMNS = [
+    {'name': 'Borough', 'id': 'Borough'},
+    {'name': 'Year', 'id': 'Year', 'type': 'numeric'},
+    {'name': 'Recycling Rate (%)', 'id': 'Recycling Rate (%)', 'type': 'numeric',
+     'format': Format(precision=1, scheme=Scheme.fixed)},
+    {'name': 'Population', 'id': 'Population', 'type': 'numeric',
+     'format': Format(precision=0, scheme=Scheme.fixed).group(Group.yes)},
+    {'name': 'Population Density', 'id': 'Population Density', 'type': 'numeric',
+     'format': Format(precision=1, scheme=Scheme.fixed)},
+    {'name': 'Region', 'id': 'Region'},
+]
+
 def recycling_data_table(df):
-    """创建数据表格"""
+    """创建数据表格
+
+    表格内容随传入的数据变化，因此在浏览器端分页和排序；
+    student.table_backend 的服务器端表格只适用于内容固定的表格。
+    """
     try:
         # 获取最新年份的数据
         latest_year = df['Year'].max()
-        df_latest = df[df['Year'] == latest_year].copy()
+        df_latest = df[df['Year'] == latest_year]
         
         # 选择要显示的列并重命名
         columns_to_show = {
@@ -309,12 +316,11 @@ def recycling_data_table(df):
         
         # 格式化数值
         df_display['Recycling Rate (%)'] = df_display['Recycling Rate (%)'].round(1)
-        df_display['Population'] = df_display['Population'].apply(lambda x: f"{int(x):,}")
         df_display['Population Density'] = df_display['Population Density'].round(1)
         
         return dash_table.DataTable(
-            id='analysis-data-table',
-            columns=[{'name': col, 'id': col} for col in df_display.columns],
+            id=DATA_TABLE_ID,
+            columns=DATA_TABLE_COLUMNS,
             data=df_display.to_dict('records'),
             style_table={'overflowX': 'auto'},
             style_cell={
@@ -335,63 +341,188 @@ def recycling_data_table(df):
             filter_action='native'
         )
     except Exception as e:
-        print(f"Error in recycling_data_table: {e}")
+        logger.error("Error in recycling_data_table: %s", e)
         return html.Div("Error creating data table", className="text-danger")
 
-def create_uk_map():
-    # 英国区域数据
-    regions = [
-        'NORTH WEST', 'YORKSHIRE', 'EAST MIDLANDS', 'WEST MIDLANDS',
-        'EASTERN', 'LONDON', 'SOUTH EAST', 'SOUTH WEST', 'SOUTHERN'
-    ]
-    
-    # 创建示例数据（你可以替换成实际数据）
-    df = pd.DataFrame({
-        'region': regions,
-        'recycling_rate': [45, 42, 44, 43, 46, 48, 47, 41, 45]  # 示例回收率
-    })
-    
-    # 创建地图
-    fig = go.Figure()
-    
-    # 添加英国地图
-    fig.add_trace(go.Choropleth(
-        locations=df['region'],
-        z=df['recycling_rate'],
-        locationmode='country names',
-        colorscale='Viridis',
-        colorbar_title="Recycling Rate (%)",
-        text=df['region'],
-        hovertemplate="<b>%{text}</b><br>" +
-                      "Recycling Rate: %{z}%<br>" +
-                      "<extra></extra>",
-    ))
-    
-    # 更新布局
-    fig.update_layout(
-        title_text='England Recycling Rates by Region',
-        geo_scope='europe',  # 限制地图范围在欧洲
-        geo=dict(
-            center=dict(lon=-2, lat=54),  # 英国中心位置
-            projection_scale=4.5,  # 缩放级别
+def london_map_figure(year, title_text, coords, areas=None):
+    """伦敦各区回收率地图
+
+    london_boroughs.geojson 覆盖所有要显示的区时画分级统计图（边界通过带摘要的 URL 引用，
+    浏览器只下载一次），标记放在边界质心；否则保留背景图片 london_map.png 上的 xy 地图，
+    标记使用按图片校准的 coords（区域 -> [x, y]），没有坐标的区不显示。
+    areas 默认为 coords 中的区域。
+    """
+    index = get_area_index()
+    areas = list(coords) if areas is None else list(areas)
+    map_areas = np.array([area for area in areas if index.position(area) is not None],
+                         dtype=object)
+    positions = index.positions(map_areas)
+    map_rates = index.cross_section('Recycling_Rates', year)[positions]
+    map_statuses = index.attributes['London_Status'][positions]
+    has_rate = ~np.isnan(map_rates)
+
+    geometry = get_borough_geometry()
+    use_geometry = geometry is not None and geometry.covers(map_areas[has_rate])
+    if not use_geometry:
+        has_rate &= np.isin(map_areas, list(coords))
+    map_coords = borough_coordinates(map_areas, coords, geometry if use_geometry else None)
+
+    map_fig = go.Figure()
+
+    if use_geometry:
+        map_fig.add_trace(go.Choropleth(
+            geojson=geometry.source(),
+            featureidkey=FEATURE_ID_KEY,
+            locations=map_areas[has_rate],
+            z=map_rates[has_rate],
+            colorscale='Greens',
+            marker_line=dict(color='white', width=1),
+            colorbar=dict(title="Recycling Rate (%)", thickness=12, len=0.6),
+            customdata=map_areas[has_rate],
+            hovertemplate="<b>%{customdata}</b><br>Recycling Rate: %{z:.1f}%<extra></extra>",
+            name="Recycling Rate"
+        ))
+    else:
+        # 添加背景地图图片
+        map_fig.add_layout_image(
+            dict(
+                source=asset_url("london_map.png"),
+                xref="x",
+                yref="y",
+                x=-0.52,
+                y=51.72,
+                sizex=0.82,
+                sizey=0.42,
+                sizing="contain",
+                opacity=1,
+                layer="below"
+            )
+        )
+
+    # 每种区域类型一条标记轨迹（取所选时间段第一年的数据，直接从 Area × Year 索引查找）
+    for london_status in pd.unique(map_statuses[has_rate]):
+        selected = has_rate & (map_statuses == london_status)
+
+        # 根据区域类型设置颜色
+        color = '#4e79a7' if london_status == 'Core London' else '#f28e2b'
+
+        marker_trace = dict(
+            mode='markers',
+            marker=dict(
+                size=12 if use_geometry else 15,
+                color=color,
+                line=dict(
+                    color='white',
+                    width=1.5
+                )
+            ),
+            name=london_status,
+            text=[f"<b>{area}</b><br>Recycling Rate: {rate:.1f}%<br>{london_status}"
+                  for area, rate in zip(map_areas[selected], map_rates[selected])],
+            customdata=map_areas[selected],  # 区域名称作为自定义数据，点击时取出
+            hoverinfo='text',
+            hovertemplate="%{text}<extra></extra>"
+        )
+        if use_geometry:
+            map_fig.add_trace(go.Scattergeo(lon=map_coords[selected, 0],
+                                            lat=map_coords[selected, 1], **marker_trace))
+        else:
+            map_fig.add_trace(go.Scatter(x=map_coords[selected, 0],
+                                         y=map_coords[selected, 1], **marker_trace))
+
+    if use_geometry:
+        map_fig.update_layout(geo=dict(
+            projection_type='mercator',
+            fitbounds='locations',
             showland=True,
-            landcolor='rgb(243, 243, 243)',
-            showcoastlines=True,
-            coastlinecolor='rgb(80, 80, 80)',
+            landcolor='#f5f5f5',
+            showcountries=False,
+            showcoastlines=False,
             showframe=False,
-            showcountries=True,
-            countrycolor='rgb(80, 80, 80)',
-            resolution=50
+            bgcolor='rgba(0,0,0,0)'
+        ))
+    else:
+        map_fig.update_layout(
+            xaxis=dict(
+                range=[-0.52, 0.30],
+                showgrid=False,
+                zeroline=False,
+                visible=False,
+                fixedrange=True,  # 锁定X轴
+                constrain='domain'  # 确保比例固定
+            ),
+            yaxis=dict(
+                range=[51.30, 51.72],
+                showgrid=False,
+                zeroline=False,
+                visible=False,
+                fixedrange=True,  # 锁定Y轴
+                scaleanchor="x",
+                scaleratio=1.2,
+                constrain='domain'  # 确保比例固定
+            ),
+            plot_bgcolor='rgba(0,0,0,0)'
+        )
+
+    # 更新地图布局
+    map_fig.update_layout(
+        title=dict(
+            text=title_text,
+            x=0.5,
+            y=0.98,
+            xanchor='center',
+            yanchor='top',
+            font=dict(size=20)
+        ),
+        height=600,
+        margin=dict(l=0, r=0, t=40, b=0),
+        paper_bgcolor='rgba(0,0,0,0)',
+        dragmode=False,  # 禁用拖动
+        hovermode='closest',
+        showlegend=True,
+        legend=dict(
+            yanchor="top",
+            y=0.99,
+            xanchor="left",
+            x=0.01,
+            bgcolor='rgba(255,255,255,0.8)',
+            bordercolor='rgba(0,0,0,0.1)',
+            borderwidth=1,
+            itemsizing='constant'
+        ),
+        modebar=dict(
+            remove=[
+                "zoom",
+                "pan",
+                "select",
+                "lasso",
+                "zoomIn",
+                "zoomOut",
+                "autoScale",
+                "resetScale",
+                "toImage",
+                "resetViews",
+                "toggleSpikelines"
+            ],
+            orientation='v'
         ),
-        margin=dict(l=0, r=0, t=30, b=0),
-        height=700
+        clickmode='event'  # 只允许点击事件
     )
-    
-    # 添加区域边界
-    # 这里需要添加英国各区域的边界坐标
-    # 可以使用 GeoJSON 数据或者手动添加边界线
-    
-    return fig
+    return map_fig
+
+def create_uk_map(year=None, coords=None):
+    """伦敦各区回收率地图（默认最新一年）
+
+    原来的示例用英格兰大区名称配合 locationmode='country names'，无法匹配任何位置。
+    现在显示所有伦敦区：区边界完整时为分级统计图，否则为背景图片上的标记地图，
+    标记位置来自 coords（区域 -> [x, y]，按背景图片校准）。
+    """
+    index = get_area_index()
+    if year is None:
+        year = int(index.years[-1])
+    areas = index.areas[index.status_mask(LONDON_STATUSES)]
+    return london_map_figure(year, f'London Recycling Rates by Borough ({year})',
+                             coords or {}, areas=areas)
 
 def add_region_boundaries(fig):
     """添加区域边界线"""
@@ -0,0 +1,186 @@
+"""批量趋势统计
+
+对 (序列, 年份) 矩阵一次性计算所有序列的趋势统计：起止值、变化、均值、最高/最低及其年份、
+年均变化、最小二乘斜率、年复合增长率（CAGR）和波动率（逐年变化的标准差）。
+缺失值（NaN）不参与计算。
+
+TrendEngine 在 Area × Year 索引的回收率矩阵后面追加区域类型分组的逐年均值，
+每个年份范围的统计表只计算一次并缓存，统计卡片只做查表。
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .area_index import get_area_index
+from .data_store import get_store
+from .groups import STATUS_GROUPS, get_area_groups
+
+STAT_NAMES = ['start_rate', 'end_rate', 'change', 'avg_rate', 'max_rate', 'min_rate',
+              'max_year', 'min_year', 'annual_growth', 'slope', 'cagr', 'volatility']
+
+
+def compute_trend_statistics(matrix, years, year_range):
+    """矩阵每一行的趋势统计，返回 名称 -> 数组 的字典
+
+    matrix 的列与 years 对应（已限定在年份范围内）；起止值取 year_range 两端的年份，
+    不在 years 中时为 NaN。
+    """
+    matrix = np.asarray(matrix, dtype=float)
+    years = np.asarray(years)
+    n_rows = matrix.shape[0]
+    if matrix.shape[1] == 0:
+        return {name: np.full(n_rows, np.nan) for name in STAT_NAMES}
+    present = ~np.isnan(matrix)
+    count = present.sum(axis=1)
+    has_data = count > 0
+    filled = np.where(present, matrix, 0.0)
+
+    def column(year):
+        j = np.flatnonzero(years == year)
+        return matrix[:, j[0]] if len(j) else np.full(n_rows, np.nan)
+
+    start = column(year_range[0])
+    end = column(year_range[1])
+    change = end - start
+    years_diff = year_range[1] - year_range[0]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg = np.where(has_data, filled.sum(axis=1) / np.maximum(count, 1), np.nan)
+
+        # 最高/最低值及其年份（第一次出现的年份）
+        max_pos = np.where(present, matrix, -np.inf).argmax(axis=1)
+        min_pos = np.where(present, matrix, np.inf).argmin(axis=1)
+        rows = np.arange(n_rows)
+        max_rate = np.where(has_data, matrix[rows, max_pos], np.nan)
+        min_rate = np.where(has_data, matrix[rows, min_pos], np.nan)
+        max_year = np.where(has_data, years[max_pos], np.nan)
+        min_year = np.where(has_data, years[min_pos], np.nan)
+
+        annual_growth = change / years_diff if years_diff > 0 else np.zeros(n_rows)
+
+        # 最小二乘斜率（每年变化的百分点），至少需要两个不同年份
+        x = np.broadcast_to(years.astype(float), matrix.shape)
+        x_mean = np.where(present, x, 0.0).sum(axis=1) / np.maximum(count, 1)
+        dx = np.where(present, x - x_mean[:, None], 0.0)
+        dy = np.where(present, matrix - avg[:, None], 0.0)
+        sxx = (dx * dx).sum(axis=1)
+        slope = np.where(sxx > 0, (dx * dy).sum(axis=1) / np.where(sxx > 0, sxx, 1.0), np.nan)
+
+        # 年复合增长率（%），起止值都为正时才有意义
+        positive = (start > 0) & (end > 0) & (years_diff > 0)
+        cagr = np.where(positive,
+                        (np.power(end / np.where(positive, start, 1.0),
+                                  1.0 / max(years_diff, 1)) - 1.0) * 100,
+                        np.nan)
+
+        # 波动率：逐年变化的样本标准差，至少需要两个逐年变化
+        diffs = np.diff(matrix, axis=1)
+        diff_present = ~np.isnan(diffs)
+        n_diffs = diff_present.sum(axis=1)
+        diff_filled = np.where(diff_present, diffs, 0.0)
+        diff_mean = diff_filled.sum(axis=1) / np.maximum(n_diffs, 1)
+        squares = np.where(diff_present, (diffs - diff_mean[:, None]) ** 2, 0.0).sum(axis=1)
+        volatility = np.where(n_diffs > 1, np.sqrt(squares / np.maximum(n_diffs - 1, 1)), np.nan)
+
+    return {
+        'start_rate': start,
+        'end_rate': end,
+        'change': change,
+        'avg_rate': avg,
+        'max_rate': max_rate,
+        'min_rate': min_rate,
+        'max_year': max_year,
+        'min_year': min_year,
+        'annual_growth': annual_growth,
+        'slope': slope,
+        'cagr': cagr,
+        'volatility': volatility,
+    }
+
+
+class TrendTable:
+    """某个年份范围内所有序列的统计表，按标签查找"""
+
+    def __init__(self, labels, stats):
+        self.labels = list(labels)
+        self.stats = stats
+        self._pos = {label: i for i, label in enumerate(self.labels)}
+
+    def __contains__(self, label):
+        return label in self._pos
+
+    def row(self, label):
+        """单个序列的统计（字典）；没有起止年份数据时返回 None"""
+        i = self._pos.get(label)
+        if i is None or np.isnan(self.stats['start_rate'][i]) or np.isnan(self.stats['end_rate'][i]):
+            return None
+        result = {name: float(values[i]) for name, values in self.stats.items()}
+        result['max_year'] = int(result['max_year'])
+        result['min_year'] = int(result['min_year'])
+        return result
+
+    def to_frame(self):
+        return pd.DataFrame(self.stats, index=pd.Index(self.labels, name='Area'))
+
+
+class TrendEngine:
+    """区域和区域类型分组的回收率趋势统计，按年份范围缓存"""
+
+    def __init__(self, index, groups, metric='Recycling_Rates', max_cached_ranges=256):
+        self.index = index
+        self.metric = metric
+        matrix = index.matrices[metric]
+        # 分组的逐年均值（与按年份 groupby 求均值相同）
+        group_names = [group for group in STATUS_GROUPS if len(groups.positions(group))]
+        group_rows = [self._mean_rows(matrix[groups.positions(group)]) for group in group_names]
+        self.matrix = np.vstack([matrix] + group_rows) if group_rows else matrix
+        self.group_rows = {group: len(index.areas) + i for i, group in enumerate(group_names)}
+        self.labels = list(index.areas) + [('group', group) for group in group_names]
+        self._tables = {}
+        self._max_cached_ranges = max_cached_ranges
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _mean_rows(block):
+        present = ~np.isnan(block)
+        count = present.sum(axis=0)
+        total = np.where(present, block, 0.0).sum(axis=0)
+        return np.where(count > 0, total / np.maximum(count, 1), np.nan)
+
+    def group_series(self, group, year_range=None):
+        """区域类型分组的逐年均值 (年份, 值)，去掉没有数据的年份"""
+        ys = self.index.year_slice(year_range)
+        row = self.group_rows.get(group)
+        if row is None:
+            return self.index.years[ys][:0], np.empty(0)
+        years, values = self.index.years[ys], self.matrix[row, ys]
+        valid = ~np.isnan(values)
+        return years[valid], values[valid]
+
+    def table(self, year_range):
+        """年份范围内所有区域和分组的统计表（缓存）"""
+        key = (int(year_range[0]), int(year_range[1]))
+        with self._lock:
+            table = self._tables.get(key)
+        if table is None:
+            ys = self.index.year_slice(key)
+            stats = compute_trend_statistics(self.matrix[:, ys], self.index.years[ys], key)
+            table = TrendTable(self.labels, stats)
+            with self._lock:
+                if len(self._tables) >= self._max_cached_ranges:
+                    self._tables.clear()
+                self._tables[key] = table
+        return table
+
+    def area_stats(self, area, year_range):
+        return self.table(year_range).row(area)
+
+    def group_stats(self, group, year_range):
+        return self.table(year_range).row(('group', group))
+
+
+def get_trend_engine():
+    """获取当前数据版本对应的共享趋势统计"""
+    return get_store().derived('trend_engine',
+                               lambda df: TrendEngine(get_area_index(), get_area_groups()))
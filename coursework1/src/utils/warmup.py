@@ -0,0 +1,124 @@
+"""启动时在后台预先计算常用的仪表盘状态
+
+各页面通过 register_warmup() 登记需要预热的回调和参数组合（参数可以是延迟计算的函数），
+start_warmup() 在后台守护线程中用线程池逐个调用这些回调，结果写入 utils.cache 的图表缓存
+（缓存中保存的是序列化后的 JSON 结构，预热后的第一次请求不再需要编码图表）。
+线程池与服务器共享同一进程的缓存，因此不使用进程池；服务器可以在预热期间正常接收请求。
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+
+def register_warmup(func, args_list, label=None):
+    """登记一个需要预热的回调
+
+    args_list: 参数元组的列表，或返回该列表的无参函数（在预热开始时才计算）
+    """
+    with _registry_lock:
+        _registry.append((label or func.__name__, func, args_list))
+
+
+def year_ranges(single_years=True, full_range=True):
+    """常用的年份范围：每个单独年份 [y, y] 以及完整范围 [最早, 最新]"""
+    from .area_index import get_area_index
+
+    years = [int(y) for y in get_area_index().years]
+    ranges = [[y, y] for y in years] if single_years else []
+    if full_range and years:
+        ranges.append([years[0], years[-1]])
+    return ranges
+
+
+def warmup_tasks():
+    """展开所有登记项，得到 (标签, 函数, 参数) 列表"""
+    with _registry_lock:
+        entries = list(_registry)
+    tasks = []
+    for label, func, args_list in entries:
+        if callable(args_list):
+            args_list = args_list()
+        tasks.extend((label, func, tuple(args)) for args in args_list)
+    return tasks
+
+
+class WarmupJob:
+    """后台预热任务，progress 可随时读取"""
+
+    def __init__(self, max_workers=2, report_every=20):
+        self.max_workers = max_workers
+        self.report_every = report_every
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.elapsed = None
+        self.finished = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="cache-warmup", daemon=True)
+
+    @property
+    def progress(self):
+        return {'total': self.total, 'done': self.done, 'failed': self.failed,
+                'finished': self.finished.is_set(), 'elapsed': self.elapsed}
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _call(self, label, func, args):
+        try:
+            func(*args)
+            return None
+        except Exception as e:
+            return f"{label}{args}: {e}"
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            tasks = warmup_tasks()
+        except Exception as e:
+            logger.warning("Cache warmup could not start: %s", e)
+            self.finished.set()
+            return
+
+        self.total = len(tasks)
+        logger.info("Cache warmup: %d states queued", self.total)
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="cache-warmup") as pool:
+            futures = [pool.submit(self._call, *task) for task in tasks]
+            for future in as_completed(futures):
+                error = future.result()
+                self.done += 1
+                if error:
+                    self.failed += 1
+                    logger.warning("Cache warmup failed: %s", error)
+                if self.done % self.report_every == 0 or self.done == self.total:
+                    logger.debug("Cache warmup: %d/%d done", self.done, self.total)
+
+        self.elapsed = time.perf_counter() - start
+        logger.info("Cache warmup finished in %.1fs (%d ok, %d failed)",
+                    self.elapsed, self.done - self.failed, self.failed)
+        self.finished.set()
+
+
+def is_reloader_watcher(use_reloader):
+    """是否是 Werkzeug 重载器的监视进程（只负责重启子进程，不处理请求）"""
+    return use_reloader and os.environ.get("WERKZEUG_RUN_MAIN") != "true"
+
+
+def start_warmup(max_workers=None, use_reloader=False):
+    """启动后台预热（设置环境变量 CACHE_WARMUP=0 可关闭），返回 WarmupJob
+
+    use_reloader: 服务器是否带重载器运行（app.run(debug=True)）；此时只在处理请求的子进程中预热
+    """
+    if os.environ.get("CACHE_WARMUP", "1") == "0" or is_reloader_watcher(use_reloader):
+        return None
+    if max_workers is None:
+        max_workers = int(os.environ.get("CACHE_WARMUP_WORKERS", 2))
+    return WarmupJob(max_workers=max_workers).start()
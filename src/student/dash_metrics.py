@@ -0,0 +1,334 @@
+"""Per-callback timing, payload size and cache-hit metrics for Dash apps.
+
+Shared by the coursework1 dashboard and the student dash_single / dash_multi apps.
+Metrics are off unless the environment variable DASH_METRICS=1 is set (or
+``instrument_app(app, enabled=True)`` is called). When off, ``instrument_app`` does
+nothing and ``phase()`` returns a shared no-op context manager, so the apps run
+exactly as before.
+
+When on, every server-side callback registered with ``app.callback`` or
+``dash.callback`` is wrapped and the following are recorded in memory:
+
+- total wall time of the callback request
+- time spent in the callback function itself, split into ``data`` (code inside
+  ``with phase("data"):``) and ``figure`` (the rest of the function)
+- ``serialise``: time spent turning the return value into JSON
+- response size in bytes
+- cache hits / misses reported with ``note_cache()``
+
+The histograms are exposed as Prometheus-style text at ``/metrics``.
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+import dash
+from dash import _callback
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+SIZE_BUCKETS_BYTES = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+PHASES = ("total", "data", "figure", "serialise")
+
+_local = threading.local()
+_null_phase = nullcontext()
+
+
+def metrics_enabled():
+    """True if DASH_METRICS=1 is set in the environment."""
+    return os.environ.get("DASH_METRICS", "0") == "1"
+
+
+class Histogram:
+    """Fixed-bucket histogram (counts per bucket, plus sum and count)."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """(upper bound, cumulative count) pairs, ending with ('+Inf', count)."""
+        total = 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            yield bound, total
+
+
+class CallbackStats:
+    """Everything recorded for one callback."""
+
+    def __init__(self):
+        self.phases = {name: Histogram(LATENCY_BUCKETS_MS) for name in PHASES}
+        self.response_bytes = Histogram(SIZE_BUCKETS_BYTES)
+        self.calls = 0
+        self.errors = 0
+        self.prevented = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+class _Record:
+    """Timings collected while one callback request is running (thread-local)."""
+
+    __slots__ = ("data", "function", "serialise", "cache_hits", "cache_misses")
+
+    def __init__(self):
+        self.data = 0.0
+        self.function = 0.0
+        self.serialise = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+@contextmanager
+def _timed_phase():
+    record = getattr(_local, "record", None)
+    if record is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record.data += time.perf_counter() - start
+
+
+def phase(name="data"):
+    """Context manager that marks data access inside a callback.
+
+    Only the ``data`` phase is recorded explicitly; ``figure`` is derived as the rest
+    of the callback function. Returns a no-op context manager when metrics are off.
+    """
+    if name != "data" or not _state["enabled"]:
+        return _null_phase
+    return _timed_phase()
+
+
+def note_cache(hit, label=None):
+    """Report a cache lookup made while handling the current callback.
+
+    ``label`` is accepted so this can be used directly as a cache lookup listener.
+    """
+    record = getattr(_local, "record", None)
+    if record is None:
+        return
+    if hit:
+        record.cache_hits += 1
+    else:
+        record.cache_misses += 1
+
+
+class MetricsRegistry:
+    """Thread-safe store of CallbackStats keyed by callback name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self.started = time.time()
+
+    def record(self, name, total, record, size, error=False, prevented=False):
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = CallbackStats()
+            stats.calls += 1
+            stats.errors += int(error)
+            stats.prevented += int(prevented)
+            stats.cache_hits += record.cache_hits
+            stats.cache_misses += record.cache_misses
+            stats.phases["total"].observe(total * 1000)
+            stats.phases["data"].observe(record.data * 1000)
+            stats.phases["figure"].observe(max(record.function - record.data, 0.0) * 1000)
+            stats.phases["serialise"].observe(record.serialise * 1000)
+            if size is not None:
+                stats.response_bytes.observe(size)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def render(self):
+        """Prometheus text exposition format."""
+        lines = [
+            "# HELP dash_callback_duration_ms Callback time per phase in milliseconds.",
+            "# TYPE dash_callback_duration_ms histogram",
+        ]
+        stats = sorted(self.snapshot().items())
+        for name, s in stats:
+            for phase_name, hist in s.phases.items():
+                labels = f'callback="{_escape(name)}",phase="{phase_name}"'
+                lines.extend(_histogram_lines("dash_callback_duration_ms", labels, hist))
+        lines += [
+            "# HELP dash_callback_response_bytes Size of the JSON response in bytes.",
+            "# TYPE dash_callback_response_bytes histogram",
+        ]
+        for name, s in stats:
+            lines.extend(_histogram_lines("dash_callback_response_bytes",
+                                          f'callback="{_escape(name)}"', s.response_bytes))
+        lines += [
+            "# HELP dash_callback_calls_total Callback requests by outcome.",
+            "# TYPE dash_callback_calls_total counter",
+        ]
+        for name, s in stats:
+            label = _escape(name)
+            ok = s.calls - s.errors - s.prevented
+            lines.append(f'dash_callback_calls_total{{callback="{label}",outcome="ok"}} {ok}')
+            lines.append(f'dash_callback_calls_total{{callback="{label}",outcome="error"}} {s.errors}')
+            lines.append(f'dash_callback_calls_total{{callback="{label}",outcome="prevented"}} {s.prevented}')
+        lines += [
+            "# HELP dash_callback_cache_total Cache lookups made by callbacks.",
+            "# TYPE dash_callback_cache_total counter",
+        ]
+        for name, s in stats:
+            label = _escape(name)
+            lines.append(f'dash_callback_cache_total{{callback="{label}",result="hit"}} {s.cache_hits}')
+            lines.append(f'dash_callback_cache_total{{callback="{label}",result="miss"}} {s.cache_misses}')
+        lines += [
+            "# HELP dash_metrics_uptime_seconds Seconds since metrics collection started.",
+            "# TYPE dash_metrics_uptime_seconds gauge",
+            f"dash_metrics_uptime_seconds {time.time() - self.started:.0f}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _histogram_lines(metric, labels, hist):
+    for bound, count in hist.cumulative():
+        yield f'{metric}_bucket{{{labels},le="{bound}"}} {count}'
+    yield f"{metric}_sum{{{labels}}} {hist.sum:.3f}"
+    yield f"{metric}_count{{{labels}}} {hist.count}"
+
+
+_state = {"enabled": False, "patched": False}
+registry = MetricsRegistry()
+
+
+def _patch_dash_internals():
+    """Time the user function and the JSON serialisation inside Dash's callback wrapper.
+
+    Dash calls ``_invoke_callback`` and ``to_json`` through module globals of
+    ``dash._callback``; both are replaced once with timing versions.
+    """
+    if _state["patched"]:
+        return
+    invoke = getattr(_callback, "_invoke_callback", None)
+    to_json = getattr(_callback, "to_json", None)
+
+    if invoke is not None:
+        @functools.wraps(invoke)
+        def timed_invoke(*args, **kwargs):
+            record = getattr(_local, "record", None)
+            if record is None:
+                return invoke(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return invoke(*args, **kwargs)
+            finally:
+                record.function += time.perf_counter() - start
+
+        _callback._invoke_callback = timed_invoke
+
+    if to_json is not None:
+        @functools.wraps(to_json)
+        def timed_to_json(*args, **kwargs):
+            record = getattr(_local, "record", None)
+            if record is None:
+                return to_json(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return to_json(*args, **kwargs)
+            finally:
+                record.serialise += time.perf_counter() - start
+
+        _callback.to_json = timed_to_json
+
+    _state["patched"] = True
+
+
+def _callback_name(func, output_id):
+    name = getattr(func, "__name__", None)
+    module = getattr(func, "__module__", None)
+    if name and module:
+        return f"{module}.{name}"
+    return output_id
+
+
+def _wrap_callback(func, name):
+    @functools.wraps(func)
+    def instrumented(*args, **kwargs):
+        record = _Record()
+        _local.record = record
+        start = time.perf_counter()
+        response = None
+        error = prevented = False
+        try:
+            response = func(*args, **kwargs)
+            return response
+        except dash.exceptions.PreventUpdate:
+            prevented = True
+            raise
+        except Exception:
+            error = True
+            raise
+        finally:
+            total = time.perf_counter() - start
+            _local.record = None
+            size = len(response.encode("utf-8")) if isinstance(response, str) else None
+            registry.record(name, total, record, size, error=error, prevented=prevented)
+
+    instrumented.metrics_name = name
+    return instrumented
+
+
+def _instrument_callbacks(app):
+    """Wrap any callbacks in app.callback_map that are not wrapped yet."""
+    for output_id, entry in list(app.callback_map.items()):
+        func = entry.get("callback")
+        if func is None or hasattr(func, "metrics_name") or entry.get("background"):
+            continue
+        entry["callback"] = _wrap_callback(func, _callback_name(func, output_id))
+
+
+def instrument_app(app, enabled=None, endpoint="/metrics"):
+    """Instrument all server-side callbacks of ``app`` and serve metrics at ``endpoint``.
+
+    Call after the app (and its pages) are created. Callbacks registered with
+    ``dash.callback`` are only copied into ``app.callback_map`` on the first request,
+    so wrapping happens in a before_request hook. Returns the registry, or None when
+    metrics are disabled.
+    """
+    if enabled is None:
+        enabled = metrics_enabled()
+    if not enabled:
+        return None
+
+    _state["enabled"] = True
+    _patch_dash_internals()
+    server = app.server
+    seen = {"count": -1}
+
+    @server.before_request
+    def _instrument_new_callbacks():
+        if len(app.callback_map) != seen["count"]:
+            _instrument_callbacks(app)
+            seen["count"] = len(app.callback_map)
+
+    def metrics_view():
+        return registry.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+
+    server.add_url_rule(endpoint, "dash_metrics", metrics_view)
+    return registry
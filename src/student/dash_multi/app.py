@@ -6,6 +6,8 @@ from dash import Dash, html, dcc, page_container
 import dash
 import dash_bootstrap_components as dbc
 from dash.dependencies import Input, Output, State
+from student.dash_metrics import instrument_app
+from student.logging_config import configure_logging
 
 # 创建应用实例
 app = Dash(__name__, 
@@ -31,5 +33,9 @@ app.layout = html.Div([
     dash.page_container  # 页面内容容器
 ])
 
+# 回调指标统计（设置 DASH_METRICS=1 开启，访问 /metrics 查看）
+configure_logging()
+instrument_app(app)
+
 if __name__ == '__main__':
     app.run(debug=True, port=5050)
\ No newline at end of file
@@ -2,12 +2,16 @@ import pandas as pd
 import plotly.express as px
 from pathlib import Path
 import sqlite3
+
+from student.dash_metrics import phase
+from student.table_backend import server_side_table
 import dash
 import dash_bootstrap_components as dbc
 from dash import html
 
 current_dir = Path(__file__).parent
 CSV_PATH = current_dir.parent.parent / "tutor" / "data" / "paralympics.csv"
+DATA_TABLE_ID = "paralympics-data-table"
 
 def line_chart(feature, types=None):
     """
@@ -23,7 +27,8 @@ def line_chart(feature, types=None):
             'Invalid value for "feature". Must be one of ["sports", "participants", "events", "countries"]')
     
     # 读取数据
-    df = pd.read_csv(CSV_PATH)
+    with phase("data"):
+        df = pd.read_csv(CSV_PATH)
     
     # 如果指定了类型，就过滤数据
     if types and len(types) > 0:
@@ -50,7 +55,8 @@ def bar_gender(event_type):
     """Creates a stacked bar chart showing change in the ratio of male and female competitors."""
     # 读取需要的列
     cols = ['type', 'year', 'host', 'participants_m', 'participants_f', 'participants']
-    df_events = pd.read_csv(CSV_PATH, usecols=cols)
+    with phase("data"):
+        df_events = pd.read_csv(CSV_PATH, usecols=cols)
     
     # 数据清理和准备
     df_events = df_events.dropna(subset=['participants_m', 'participants_f'])
@@ -104,7 +110,8 @@ def scatter_geo():
     '''
     
     # 使用pandas读取SQL查询结果
-    df_locs = pd.read_sql(sql=sql, con=connection, index_col=None)
+    with phase("data"):
+        df_locs = pd.read_sql(sql=sql, con=connection, index_col=None)
     
     # 将经纬度转换为浮点数
     df_locs['longitude'] = df_locs['longitude'].astype(float)
@@ -138,7 +145,8 @@ def scatter_geo():
 def get_event_details(host, year):
     """Get the details for a specific Paralympic event."""
     # 读取数据
-    df = pd.read_csv(CSV_PATH)
+    with phase("data"):
+        df = pd.read_csv(CSV_PATH)
     
     # 查找特定事件的数据
     event_data = df[(df['host'] == host) & (df['year'] == year)].iloc[0]
@@ -165,7 +173,8 @@ def create_card(host_year):
     year = int(year)
     
     # 读取数据
-    df = pd.read_csv(CSV_PATH)
+    with phase("data"):
+        df = pd.read_csv(CSV_PATH)
     
     # 获取特定事件的数据
     event_data = df[(df['host'] == host) & (df['year'] == year)].iloc[0]
@@ -198,7 +207,8 @@ def create_card(host_year):
 def create_bubble_chart():
     """Creates a bubble chart showing participants vs events, with bubble size representing countries."""
     # 读取数据
-    df = pd.read_csv(CSV_PATH)
+    with phase("data"):
+        df = pd.read_csv(CSV_PATH)
     
     # 创建气泡图
     fig = px.scatter(df, 
@@ -224,7 +234,8 @@ def create_bubble_chart():
 def create_data_table():
     """Creates a table showing key statistics for each Paralympic Games."""
     # 读取数据
-    df = pd.read_csv(CSV_PATH)
+    with phase("data"):
+        df = pd.read_csv(CSV_PATH)
     
     # 选择要显示的列并重命名
     table_df = df[[
@@ -244,10 +255,13 @@ def create_data_table():
     # 按年份排序
     table_df = table_df.sort_values('Year', ascending=False)
     
-    # 创建表格
-    table = dash.dash_table.DataTable(
-        data=table_df.to_dict('records'),
-        columns=[{"name": i, "id": i} for i in table_df.columns],
+    # 创建表格：分页、排序和筛选在服务器端完成，每次只返回一页
+    table = server_side_table(
+        DATA_TABLE_ID,
+        table_df,
+        columns=[{"name": i, "id": i, "type": "text" if i in ("Host City", "Type") else "numeric"}
+                 for i in table_df.columns],
+        page_size=10,  # 每页显示10行
         style_table={'overflowX': 'auto'},
         style_cell={
             'textAlign': 'left',
@@ -263,10 +277,7 @@ def create_data_table():
                 'if': {'row_index': 'odd'},
                 'backgroundColor': 'rgb(248, 248, 248)'
             }
-        ],
-        page_size=10,  # 每页显示10行
-        sort_action='native',  # 启用排序
-        filter_action='native'  # 启用筛选
+        ]
     )
     
-    return table 
\ No newline at end of file
+    return table
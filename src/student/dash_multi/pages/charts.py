@@ -6,11 +6,15 @@ from dash.dependencies import Input, Output
 import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
-from figure import line_chart, bar_gender, create_bubble_chart, create_data_table
+from figure import line_chart, bar_gender, create_bubble_chart, create_data_table, DATA_TABLE_ID
+from student.table_backend import register_table_callback
 
 # register the page in the app
 register_page(__name__, path='/charts', name='Charts', title='Charts')
 
+# 数据表的分页、排序和筛选回调（需要在创建表格之前注册）
+register_table_callback(DATA_TABLE_ID)
+
 layout = dbc.Container([
     # Row 1: App name and intro text
     dbc.Row([
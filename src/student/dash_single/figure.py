@@ -1,8 +1,14 @@
+import logging
+
 import pandas as pd
 import plotly.express as px
 from pathlib import Path
 import sqlite3
 
+from student.dash_metrics import phase
+
+logger = logging.getLogger(__name__)
+
 # 使用pathlib构建绝对路径
 current_dir = Path(__file__).parent
 CSV_PATH = current_dir.parent.parent / "tutor" / "data" / "paralympics.csv"
@@ -23,7 +29,8 @@ def line_chart(feature, types=None):
     # 读取数据
     db_path = current_dir.parent.parent / "tutor" / "data" / "paralympics.db"
     connection = sqlite3.connect(db_path)
-    df = pd.read_sql("SELECT * FROM paralympics_data", connection)  # 从数据库读取数据
+    with phase("data"):
+        df = pd.read_sql("SELECT * FROM paralympics_data", connection)  # 从数据库读取数据
     
     # 如果指定了类型，就过滤数据
     if types and len(types) > 0:
@@ -58,10 +65,11 @@ def bar_gender(event_type):
     """
     # 读取需要的列
     cols = ['type', 'year', 'host', 'participants_m', 'participants_f', 'participants']
-    df_events = pd.read_csv(CSV_PATH, usecols=cols)
+    with phase("data"):
+        df_events = pd.read_csv(CSV_PATH, usecols=cols)
     
-    # 打印一下数据检查
-    print("Unique types in data:", df_events['type'].unique())
+    # 数据检查
+    logger.debug("Unique types in data: %s", df_events['type'].unique())
     
     # 数据清理和准备
     df_events = df_events.dropna(subset=['participants_m', 'participants_f'])
@@ -81,11 +89,11 @@ def bar_gender(event_type):
     # 筛选数据并创建图表
     df_filtered = df_events.loc[df_events['type'] == event_type]
     
-    # 打印筛选后的数据检查
-    print(f"Number of rows for {event_type}:", len(df_filtered))
+    # 筛选后的数据检查
+    logger.debug("Number of rows for %s: %d", event_type, len(df_filtered))
     
     if len(df_filtered) == 0:
-        print(f"No data found for event type: {event_type}")
+        logger.warning("No data found for event type: %s", event_type)
         return px.bar(title="No data available")
         
     fig = px.bar(df_filtered,
@@ -119,7 +127,8 @@ def scatter_geo():
     '''
     
     # 使用pandas读取SQL查询结果
-    df_locs = pd.read_sql(sql=sql, con=connection, index_col=None)
+    with phase("data"):
+        df_locs = pd.read_sql(sql=sql, con=connection, index_col=None)
     
     # 将经纬度转换为浮点数
     df_locs['longitude'] = df_locs['longitude'].astype(float)
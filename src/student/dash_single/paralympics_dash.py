@@ -1,5 +1,11 @@
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent.parent))  # 添加项目 src 目录到路径
+
 from dash import Dash, html, dcc
 import dash_bootstrap_components as dbc
+from student.dash_metrics import instrument_app
+from student.logging_config import configure_logging
 from figure import line_chart, bar_gender, scatter_geo  # Import from figure.py instead of figures
 from dash.dependencies import Input, Output
 
@@ -107,6 +113,10 @@ def update_charts(selected_feature, selected_types):
     """Update the line chart based on user selection"""
     return line_chart(selected_feature, selected_types)
 
+# Callback metrics at /metrics (set DASH_METRICS=1 to enable)
+configure_logging()
+instrument_app(app)
+
 # Run the app
 if __name__ == '__main__':
     app.run(debug=True, port=5050)
\ No newline at end of file
@@ -0,0 +1,63 @@
+"""Shared logging set-up for the coursework1 dashboard and the student Dash apps.
+
+Modules only ever do ``logger = logging.getLogger(__name__)`` and log with %-style
+arguments, e.g. ``logger.debug("Sample data:\\n%s", df.head())``. The message (and
+the DataFrame's string form) is only built if a handler will actually emit it, so
+debug dumps cost nothing when the level is INFO or higher.
+
+The application entry point calls ``configure_logging()`` once. Levels come from
+the environment:
+
+- ``LOG_LEVEL``: level of the root logger, default ``INFO``
+- ``LOG_LEVELS``: per-module overrides, e.g.
+  ``LOG_LEVELS="pages.recycling.comparison=DEBUG,utils.warmup=WARNING"``
+"""
+import logging
+import os
+
+LOG_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+DATE_FORMAT = "%H:%M:%S"
+
+# Chatty third-party loggers kept quiet unless configured otherwise
+DEFAULT_MODULE_LEVELS = {
+    "werkzeug": "WARNING",
+}
+
+
+def parse_module_levels(spec):
+    """Parse "name=LEVEL,other=LEVEL" into a dict; malformed entries are ignored."""
+    levels = {}
+    for item in (spec or "").split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(level=None, module_levels=None, force=False):
+    """Configure the root logger once and apply per-module levels.
+
+    Args:
+        level: root level name or number; defaults to $LOG_LEVEL or INFO
+        module_levels: dict of logger name -> level, applied after $LOG_LEVELS
+        force: replace handlers installed by an earlier call
+    """
+    root = logging.getLogger()
+    if getattr(root, "_shared_config", False) and not force:
+        return root
+
+    level = level or os.environ.get("LOG_LEVEL", "INFO")
+    logging.basicConfig(level=level.upper() if isinstance(level, str) else level,
+                        format=LOG_FORMAT, datefmt=DATE_FORMAT, force=True)
+
+    levels = dict(DEFAULT_MODULE_LEVELS)
+    levels.update(parse_module_levels(os.environ.get("LOG_LEVELS")))
+    levels.update(module_levels or {})
+    for name, module_level in levels.items():
+        try:
+            logging.getLogger(name).setLevel(module_level)
+        except ValueError:
+            logging.getLogger(__name__).warning("Unknown log level %r for %s", module_level, name)
+
+    root._shared_config = True
+    return root
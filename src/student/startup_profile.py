@@ -0,0 +1,203 @@
+"""Startup-time measurement for the Dash apps.
+
+``StartupProfile`` records the time between named marks in the entry point
+(imports, creating the app and importing the pages, building the layout, ...)
+and logs a summary once start-up has finished.
+
+With STARTUP_PROFILE=1 it also times every module imported while start-up is
+running, including the page modules that Dash imports from ``pages_folder``,
+and the first render of each page layout. The report lists the slowest modules
+with their inclusive time (the module and everything it imported) and self time
+(the module's own top-level code), so import-time work shows up per module.
+
+Only the standard library is used, so the profile can start before dash,
+pandas and plotly are imported.
+"""
+import functools
+import importlib.abc
+import importlib.util
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+def profile_enabled():
+    """True if STARTUP_PROFILE=1 is set in the environment."""
+    return os.environ.get("STARTUP_PROFILE", "0") == "1"
+
+
+class _TimedLoader:
+    """Wraps a loader so that exec_module (running the module's code) is timed."""
+
+    def __init__(self, loader, profile):
+        self._loader = loader
+        self._profile = profile
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # The module keeps its real loader (pkgutil.get_data etc. use it later)
+        if getattr(module, "__spec__", None) is not None:
+            module.__spec__.loader = self._loader
+        module.__loader__ = self._loader
+        with self._profile._time_module(module.__name__):
+            self._loader.exec_module(module)
+
+
+class _ImportFinder(importlib.abc.MetaPathFinder):
+    """Meta path finder that asks the other finders and wraps the loader they return."""
+
+    def __init__(self, profile):
+        self._profile = profile
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self._profile)
+                return spec
+        return None
+
+
+class StartupProfile:
+    """Phase marks for an application entry point, plus optional per-module import timing.
+
+    Usage::
+
+        startup = StartupProfile()      # as early as possible
+        ...imports...
+        startup.mark("imports")
+        app = Dash(...)
+        startup.mark("app and pages")
+        startup.finish(dash.page_registry)  # logs the report
+    """
+
+    def __init__(self, name="startup", enabled=None, top=15):
+        self.name = name
+        self.enabled = profile_enabled() if enabled is None else enabled
+        self.top = top
+        self.started = time.perf_counter()
+        self.phases = []
+        self.modules = {}  # module name -> [inclusive seconds, self seconds]
+        self.first_renders = {}
+        self._last_mark = self.started
+        self._stack = []
+        self._thread = threading.get_ident()
+        self._finder = None
+        self._spec_from_file_location = None
+        if self.enabled:
+            self._install()
+
+    def _install(self):
+        self._finder = _ImportFinder(self)
+        sys.meta_path.insert(0, self._finder)
+
+        # Dash imports page modules with spec_from_file_location + exec_module,
+        # which bypasses sys.meta_path; wrap their loaders too while profiling.
+        original = importlib.util.spec_from_file_location
+        self._spec_from_file_location = original
+
+        @functools.wraps(original)
+        def timed_spec_from_file_location(*args, **kwargs):
+            spec = original(*args, **kwargs)
+            if spec is not None and spec.loader is not None:
+                spec.loader = _TimedLoader(spec.loader, self)
+            return spec
+
+        importlib.util.spec_from_file_location = timed_spec_from_file_location
+
+    def _uninstall(self):
+        if self._finder is not None and self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        if self._spec_from_file_location is not None:
+            importlib.util.spec_from_file_location = self._spec_from_file_location
+        self._finder = None
+        self._spec_from_file_location = None
+
+    @contextmanager
+    def _time_module(self, name):
+        if threading.get_ident() != self._thread:
+            yield
+            return
+        self._stack.append(0.0)  # time spent in nested imports
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            entry = self.modules.setdefault(name, [0.0, 0.0])
+            entry[0] += elapsed
+            entry[1] += elapsed - children
+
+    def mark(self, phase):
+        """Record the time since the previous mark under ``phase``."""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last_mark))
+        self._last_mark = now
+
+    def wrap_page_layouts(self, page_registry):
+        """Time the first call of each callable page layout (the deferred part of start-up)."""
+        for module, page in page_registry.items():
+            layout = page.get("layout")
+            if callable(layout) and not hasattr(layout, "startup_timed"):
+                page["layout"] = self._timed_layout(page.get("path", module), layout)
+
+    def _timed_layout(self, path, layout):
+        @functools.wraps(layout)
+        def timed_layout(*args, **kwargs):
+            if path in self.first_renders:
+                return layout(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return layout(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.first_renders[path] = elapsed
+                logger.info("First render of %s: %.1f ms", path, elapsed * 1000)
+
+        timed_layout.startup_timed = True
+        return timed_layout
+
+    def finish(self, page_registry=None):
+        """Stop timing imports and log the report; returns the total start-up time in seconds.
+
+        Pass ``dash.page_registry`` to also time the first render of each page.
+        """
+        total = time.perf_counter() - self.started
+        self._uninstall()
+        if self.enabled and page_registry is not None:
+            self.wrap_page_layouts(page_registry)
+        logger.info("%s finished in %.0f ms (%s)", self.name, total * 1000,
+                    ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in self.phases))
+        if self.enabled:
+            logger.info("%s", self.report())
+        return total
+
+    def report(self):
+        """Text table of the slowest imported modules and the page modules."""
+        lines = [f"Slowest imports (inclusive / self ms, top {self.top}):"]
+        slowest = sorted(self.modules.items(), key=lambda item: item[1][0], reverse=True)
+        for name, (inclusive, own) in slowest[:self.top]:
+            lines.append(f"  {name:<45} {inclusive * 1000:8.1f} {own * 1000:8.1f}")
+        pages = [(name, times) for name, times in self.modules.items()
+                 if name.startswith("pages.")]
+        if pages:
+            lines.append("Page modules (inclusive / self ms):")
+            for name, (inclusive, own) in sorted(pages, key=lambda item: item[1][0], reverse=True):
+                lines.append(f"  {name:<45} {inclusive * 1000:8.1f} {own * 1000:8.1f}")
+        return "\n".join(lines)
@@ -0,0 +1,288 @@
+"""Server-side paging, sorting and filtering for Dash DataTables.
+
+With ``sort_action='native'``/``filter_action='native'`` the whole table is
+serialised into the page and sorted/filtered in the browser. That stops scaling
+once the tables hold every authority and monthly rows. ``TableBackend`` keeps the
+frame on the server instead:
+
+- one sort permutation per column and direction is computed when the backend is
+  built (multi-column sorts use ``np.lexsort`` over precomputed rank keys)
+- ``filter_query`` strings from the table's filter row are parsed once and
+  evaluated as vectorised column comparisons, then applied to the permutation
+- each request returns only ``page_size`` rows
+
+``server_side_table()`` builds a DataTable with ``page_action``, ``sort_action``
+and ``filter_action`` set to ``'custom'`` and stores its backend under the table
+id; ``register_table_callback(table_id)`` (called once, at import time, like any
+other callback) answers the table's page/sort/filter requests.
+
+Only static tables are supported: the callback sees nothing but the table id, so
+every session shares the one backend stored for that id. Building the table
+again with the same content reuses the backend; building it with different
+content raises ``ValueError`` rather than serving one session's rows to another.
+Tables whose rows depend on user input should stay native.
+
+Set TABLE_SERVER_SIDE=0 to fall back to native (browser-side) tables.
+"""
+import hashlib
+import logging
+import math
+import os
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+from dash import Input, Output, callback, dash_table
+
+logger = logging.getLogger(__name__)
+
+SERVER_SIDE_ENABLED = os.environ.get("TABLE_SERVER_SIDE", "1") != "0"
+
+# Operators produced by the DataTable filter row, normalised to one spelling
+OPERATORS = {
+    "=": "eq", "eq": "eq",
+    "!=": "ne", "ne": "ne",
+    "<": "lt", "lt": "lt",
+    "<=": "le", "le": "le",
+    ">": "gt", "gt": "gt",
+    ">=": "ge", "ge": "ge",
+    "contains": "contains",
+    "datestartswith": "datestartswith",
+}
+
+_TERM = re.compile(
+    r"^\{(?P<column>[^}]+)\}\s+"
+    r"(?:(?P<blank>is blank)|(?P<case>[si]?)(?P<op>!=|<=|>=|=|<|>|eq|ne|lt|le|gt|ge|contains|datestartswith)"
+    r"\s+(?P<value>.+))$"
+)
+
+_backends = {}  # table id -> (content digest, TableBackend)
+_registered = set()
+_backends_lock = threading.Lock()
+
+
+def _unquote(value):
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'`":
+        return value[1:-1].replace("\\" + value[0], value[0]), True
+    return value, False
+
+
+def parse_filter_query(query):
+    """Parse a DataTable ``filter_query`` into (column, operator, value, case_sensitive) terms.
+
+    Only ``&&`` conjunctions are supported (which is what the filter row
+    produces); terms that cannot be parsed are logged and ignored.
+    """
+    terms = []
+    for part in (query or "").split(" && "):
+        part = part.strip()
+        if not part:
+            continue
+        match = _TERM.match(part)
+        if match is None:
+            logger.warning("Ignoring unsupported filter expression %r", part)
+            continue
+        column = match.group("column")
+        if match.group("blank"):
+            terms.append((column, "blank", None, True))
+            continue
+        value, quoted = _unquote(match.group("value"))
+        if not quoted:
+            try:
+                value = float(value)
+            except ValueError:
+                pass
+        terms.append((column, OPERATORS[match.group("op")], value, match.group("case") != "i"))
+    return terms
+
+
+class TableBackend:
+    """A table held on the server, with precomputed sort orders and vectorised filters."""
+
+    def __init__(self, frame, page_size=10, max_cached_filters=128):
+        self.frame = frame.reset_index(drop=True)
+        self.page_size = page_size
+        self._numeric = {column: pd.api.types.is_numeric_dtype(self.frame[column])
+                         for column in self.frame.columns}
+        self._text = {}
+        self._sort_keys = {}
+        self._orders = {}
+        for column in self.frame.columns:
+            codes, uniques = pd.factorize(self.frame[column], sort=True)
+            missing = codes < 0
+            n = len(uniques)
+            # Missing values sort last in both directions
+            ascending = np.where(missing, n, codes)
+            descending = np.where(missing, n, n - 1 - codes)
+            self._sort_keys[column] = {"asc": ascending, "desc": descending}
+            for direction, key in self._sort_keys[column].items():
+                self._orders[(column, direction)] = np.argsort(key, kind="stable")
+        self._identity = np.arange(len(self.frame))
+        self._masks = {}
+        self._max_cached_filters = max_cached_filters
+        self._lock = threading.Lock()
+
+    @property
+    def columns(self):
+        return list(self.frame.columns)
+
+    def _text_values(self, column):
+        values = self._text.get(column)
+        if values is None:
+            values = self.frame[column].astype("string")
+            self._text[column] = values
+        return values
+
+    def _term_mask(self, column, op, value, case_sensitive):
+        series = self.frame[column]
+        if op == "blank":
+            return (series.isna() | (self._text_values(column).str.strip() == "")).to_numpy(dtype=bool)
+        if op in ("contains", "datestartswith") or not (
+                self._numeric[column] and isinstance(value, float)):
+            text = self._text_values(column)
+            if isinstance(value, float):
+                value = str(int(value)) if value.is_integer() else str(value)
+            if not case_sensitive:
+                text, value = text.str.lower(), value.lower()
+            if op == "contains":
+                result = text.str.contains(value, regex=False)
+            elif op == "datestartswith":
+                result = text.str.startswith(value)
+            else:
+                result = getattr(text, f"__{op}__")(value)
+        else:
+            result = getattr(series, f"__{op}__")(value)
+        return pd.Series(result).fillna(False).to_numpy(dtype=bool)
+
+    def filter_mask(self, filter_query):
+        """Boolean row mask for a ``filter_query`` (None if nothing is filtered)."""
+        terms = parse_filter_query(filter_query)
+        terms = [term for term in terms if term[0] in self._numeric]
+        if not terms:
+            return None
+        key = tuple(terms)
+        with self._lock:
+            mask = self._masks.get(key)
+        if mask is None:
+            mask = np.ones(len(self.frame), dtype=bool)
+            for term in terms:
+                mask &= self._term_mask(*term)
+            with self._lock:
+                if len(self._masks) >= self._max_cached_filters:
+                    self._masks.clear()
+                self._masks[key] = mask
+        return mask
+
+    def order(self, sort_by=None):
+        """Row positions in display order for a DataTable ``sort_by`` list."""
+        sort_by = [item for item in (sort_by or []) if item.get("column_id") in self._sort_keys]
+        if not sort_by:
+            return self._identity
+        if len(sort_by) == 1:
+            item = sort_by[0]
+            return self._orders[(item["column_id"], item.get("direction", "asc"))]
+        keys = [self._sort_keys[item["column_id"]][item.get("direction", "asc")]
+                for item in reversed(sort_by)]
+        return np.lexsort(keys)
+
+    def query(self, sort_by=None, filter_query=""):
+        """Row positions after filtering and sorting."""
+        order = self.order(sort_by)
+        mask = self.filter_mask(filter_query)
+        return order if mask is None else order[mask[order]]
+
+    def page(self, page_current=0, page_size=None, sort_by=None, filter_query=""):
+        """One page of records plus the page count for the current sort and filter."""
+        page_size = page_size or self.page_size
+        rows = self.query(sort_by, filter_query)
+        page_count = max(1, math.ceil(len(rows) / page_size))
+        page_current = min(max(page_current or 0, 0), page_count - 1)
+        start = page_current * page_size
+        records = self.frame.iloc[rows[start:start + page_size]].to_dict("records")
+        return records, page_count
+
+
+def frame_digest(frame):
+    """Digest of a frame's column names, dtypes and values."""
+    digest = hashlib.sha1()
+    digest.update(repr([(str(name), str(dtype)) for name, dtype in frame.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def get_table_backend(table_id):
+    entry = _backends.get(table_id)
+    return None if entry is None else entry[1]
+
+
+def _static_backend(table_id, frame, page_size):
+    """The backend for ``table_id``, built once; a table's content must not change."""
+    digest = frame_digest(frame)
+    with _backends_lock:
+        entry = _backends.get(table_id)
+        if entry is not None:
+            if entry[0] != digest:
+                raise ValueError(
+                    f"Server-side table {table_id!r} was built again with different rows; "
+                    "only static tables are supported (use a native table for per-session data)")
+            if entry[1].page_size == page_size:
+                return entry[1]
+        backend = TableBackend(frame, page_size=page_size)
+        _backends[table_id] = (digest, backend)
+        return backend
+
+
+def server_side_table(table_id, frame, columns=None, page_size=10, **table_kwargs):
+    """DataTable whose paging, sorting and filtering run on the server.
+
+    ``frame`` keeps raw (numeric) values; display formatting belongs in the
+    column definitions (``dash_table.Format``), so sorting and numeric filters
+    work on the real values. ``frame`` must be the same every time the table
+    is built (see the module docstring). Falls back to a native table when
+    TABLE_SERVER_SIDE=0.
+    """
+    columns = columns or [{"name": column, "id": column} for column in frame.columns]
+    if not SERVER_SIDE_ENABLED:
+        return dash_table.DataTable(
+            id=table_id, columns=columns, data=frame.to_dict("records"), page_size=page_size,
+            sort_action="native", filter_action="native", **table_kwargs)
+
+    backend = _static_backend(table_id, frame, page_size)
+    if table_id not in _registered:
+        logger.warning("No callback registered for server-side table %r", table_id)
+    data, page_count = backend.page(0)
+    return dash_table.DataTable(
+        id=table_id, columns=columns, data=data,
+        page_current=0, page_size=page_size, page_count=page_count,
+        page_action="custom", sort_action="custom", sort_by=[],
+        filter_action="custom", filter_query="", **table_kwargs)
+
+
+def register_table_callback(table_id):
+    """Register the callback serving pages of the server-side table ``table_id``.
+
+    Call at import time (next to the module's other callbacks); calling it again
+    for the same id does nothing.
+    """
+    if table_id in _registered or not SERVER_SIDE_ENABLED:
+        return
+    _registered.add(table_id)
+
+    @callback(
+        Output(table_id, "data"),
+        Output(table_id, "page_count"),
+        Input(table_id, "page_current"),
+        Input(table_id, "page_size"),
+        Input(table_id, "sort_by"),
+        Input(table_id, "filter_query"),
+        prevent_initial_call=True,
+    )
+    def update_table_page(page_current, page_size, sort_by, filter_query):
+        backend = get_table_backend(table_id)
+        if backend is None:
+            return [], 1
+        return backend.page(page_current, page_size, sort_by, filter_query)
+
+    return update_table_page
@@ -1 +1,19 @@
-# Placeholder
\ No newline at end of file
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# coursework1's Dash app imports its helpers as top-level ``utils``
+COURSEWORK1_SRC = Path(__file__).resolve().parent.parent / "coursework1" / "src"
+if str(COURSEWORK1_SRC) not in sys.path:
+    sys.path.insert(0, str(COURSEWORK1_SRC))
+
+
+@pytest.fixture(scope="session")
+def dash_app():
+    """The coursework1 Dash app with its pages registered (no cache warm-up thread)"""
+    os.environ.setdefault("CACHE_WARMUP", "0")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    import app
+    return app.app
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.aggregates import GROUP_MEMBERS, build_cube
+
+STATUSES = ['Core London', 'Outer London', 'Non-London']
+
+
+@pytest.fixture(scope='module')
+def frame():
+    rng = np.random.default_rng(3)
+    rows = pd.DataFrame({
+        'Area': np.repeat([f"Area {i}" for i in range(12)], 6),
+        'Year': np.tile(np.arange(2010, 2016), 12),
+        'London_Status': np.repeat([STATUSES[i % 3] for i in range(12)], 6),
+        'Recycling_Rates': rng.uniform(10, 60, 72).round(1),
+        'Population_Density': rng.uniform(100, 9000, 72),
+    })
+    rows.loc[rng.random(72) < 0.15, 'Recycling_Rates'] = np.nan
+    rows.loc[rows['London_Status'] == 'Non-London', 'Population_Density'] = np.nan
+    return rows.sample(frac=1, random_state=5)
+
+
+def group_rows(frame, group):
+    return frame[frame['London_Status'].isin(GROUP_MEMBERS[group])]
+
+
+@pytest.mark.parametrize('group', list(GROUP_MEMBERS))
+@pytest.mark.parametrize('metric', ['Recycling_Rates', 'Population_Density'])
+def test_cube_matches_groupby(frame, group, metric):
+    cube = build_cube(frame)
+    expected = group_rows(frame, group).groupby('Year')[metric].agg(['mean', 'min', 'max', 'count', 'sum'])
+    for stat in expected.columns:
+        assert cube.get(metric, stat, group).tolist() == pytest.approx(
+            expected[stat].tolist(), nan_ok=True), stat
+    years, means = cube.series(metric, group, year_range=(2011, 2013))
+    assert years.tolist() == [2011, 2012, 2013]
+    assert means.tolist() == pytest.approx(expected['mean'].loc[2011:2013].tolist(), nan_ok=True)
+
+
+@pytest.mark.parametrize('year_range', [(2010, 2015), (2012, 2013), (2014, 2014), (2020, 2021)])
+def test_range_stats_weight_by_records(frame, year_range):
+    cube = build_cube(frame)
+    for group in GROUP_MEMBERS:
+        values = group_rows(frame, group)
+        values = values.loc[values['Year'].between(*year_range), 'Recycling_Rates'].dropna()
+        stats = cube.range_stats('Recycling_Rates', group, year_range)
+        assert stats['count'] == len(values)
+        if len(values):
+            assert stats['avg'] == pytest.approx(values.mean())
+            assert (stats['min'], stats['max']) == (values.min(), values.max())
+        else:
+            assert np.isnan(stats['avg'])
+
+
+def test_lookups_and_long_table(frame):
+    cube = build_cube(frame)
+    assert cube.metrics == ['Recycling_Rates', 'Population_Density']  # Per_Capita_Recycling is absent
+    assert np.isnan(cube.get('Recycling_Rates', group='Core London', year=1999))
+    table = cube.to_frame('Population_Density', year_range=(2012, 2012))
+    # Non-London has no density values, so it has no rows
+    assert table['London_Status'].tolist() == ['Core London', 'Outer London', 'London Overall']
+    expected = frame[frame['Year'] == 2012].groupby('London_Status')['Population_Density'].mean()
+    assert table['Population_Density'][0] == pytest.approx(expected['Core London'])
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.area_index import build_area_index
+
+AREAS = {'E09000007': ('Camden', 'Core London'), 'E09000003': ('Barnet', 'Outer London'),
+         'E08000035': ('Leeds', 'Non-London'), 'E09000001': ('City of London', 'Core London')}
+YEARS = range(2010, 2016)
+
+
+@pytest.fixture(scope='module')
+def frame():
+    rng = np.random.default_rng(11)
+    rows = [{'Code_recycling': code, 'Area': area, 'London_Status': status, 'Year': year,
+             'Recycling_Rates': round(rng.uniform(10, 60), 1), 'Population': int(rng.integers(1000, 9000))}
+            for code, (area, status) in AREAS.items() for year in YEARS
+            if not (area == 'Leeds' and year in (2011, 2014))]  # Leeds has gaps
+    return pd.DataFrame(rows).sample(frac=1, random_state=2).reset_index(drop=True)
+
+
+@pytest.fixture(scope='module')
+def index(frame):
+    return build_area_index(frame)
+
+
+def test_layout(index):
+    assert index.areas.tolist() == ['Barnet', 'Camden', 'City of London', 'Leeds']
+    assert index.years.tolist() == list(YEARS)
+    assert index.position('E08000035') == index.position('Leeds') == 3
+    assert index.position('Nowhere') is None
+    assert index.attribute('Camden', 'London_Status') == 'Core London'
+    assert index.status_mask(['Core London']).tolist() == [False, True, True, False]
+
+
+def test_lookups_match_pandas(frame, index):
+    for area in index.areas:
+        rows = frame[frame['Area'] == area].sort_values('Year')
+        years, values = index.series(area, 'Recycling_Rates', (2011, 2014))
+        assert years.tolist() == [2011, 2012, 2013, 2014]
+        expected = rows.set_index('Year')['Recycling_Rates'].reindex(years)
+        np.testing.assert_array_equal(values, expected.to_numpy())
+        for year, value in zip(rows['Year'], rows['Population']):
+            assert index.value(area, 'Population', year) == value
+    cross = frame[frame['Year'] == 2014].set_index('Area')['Recycling_Rates'].reindex(index.areas)
+    np.testing.assert_array_equal(index.cross_section('Recycling_Rates', 2014), cross.to_numpy())
+    assert np.isnan(index.value('Leeds', 'Recycling_Rates', 2011))
+    assert np.isnan(index.cross_section('Recycling_Rates', 1999)).all()
+
+
+@pytest.mark.parametrize('areas, year_range', [
+    (None, None),
+    (['Leeds', 'Camden'], (2011, 2014)),
+    (['E09000001'], (2013, 2013)),
+    (['Barnet'], (2020, 2021)),
+    ([], None),
+])
+def test_take_matches_boolean_filtering(frame, index, areas, year_range):
+    positions = None if areas is None else index.positions(areas)
+    result = index.take(positions, year_range)
+
+    order = index.areas if areas is None else index.areas[positions]
+    expected = pd.concat([frame[frame['Area'] == area] for area in order]) if len(order) else frame.iloc[:0]
+    if year_range is not None:
+        expected = expected[expected['Year'].between(*year_range)]
+    expected = expected.sort_values('Year', kind='stable').sort_values(
+        'Area', key=lambda s: s.map({a: i for i, a in enumerate(order)}), kind='stable')
+    pd.testing.assert_frame_equal(result, expected)
+    counts = index.row_counts(positions, year_range)
+    assert counts.sum() == len(result)
+    assert counts.tolist() == [int((expected['Area'] == area).sum()) for area in order]
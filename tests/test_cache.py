@@ -0,0 +1,51 @@
+import plotly.graph_objects as go
+
+from utils.cache import FigureCache, cached_callback, normalise, to_plain
+
+
+def test_evicts_least_recently_used_entries():
+    cache = FigureCache(max_entries=2, max_bytes=1000)
+    cache.put('a', 1, size=10)
+    cache.put('b', 2, size=10)
+    assert cache.get('a') == (True, 1)      # 'a' is now the most recently used
+    cache.put('c', 3, size=10)
+    assert 'b' not in cache and 'a' in cache and 'c' in cache
+    assert cache.get('b') == (False, None)
+    assert cache.stats() == {'entries': 2, 'bytes': 20, 'hits': 1, 'misses': 1,
+                             'evictions': 1, 'hit_rate': 0.5}
+
+
+def test_evicts_by_size_and_skips_oversized_values():
+    cache = FigureCache(max_entries=10, max_bytes=100)
+    for key in 'abc':
+        cache.put(key, key, size=40)
+    assert 'a' not in cache and len(cache) == 2 and cache.stats()['bytes'] == 80
+    cache.put('b', 'bigger', size=70)     # replacing an entry updates the byte count
+    assert 'c' not in cache and cache.stats()['bytes'] == 70
+    cache.put('huge', 'x', size=101)
+    assert 'huge' not in cache and 'b' in cache
+    cache.clear()
+    assert len(cache) == 0 and cache.stats()['bytes'] == 0
+
+
+def test_inputs_are_normalised():
+    assert normalise(([2010, 2012.0], {'b': 1, 'a': [1]})) == normalise(((2010, 2012), {'a': (1,), 'b': 1}))
+    assert normalise(2010.5) == 2010.5
+
+
+def test_cached_callback_stores_plain_values():
+    calls = []
+    cache = FigureCache()
+
+    @cached_callback(cache=cache, key=lambda year_range, title: tuple(year_range))
+    def figure(year_range, title):
+        calls.append(title)
+        return go.Figure(go.Bar(x=[1, 2], y=[3, 4]), layout={'title': {'text': title}})
+
+    first = figure([2010, 2012], 'first')
+    assert figure([2010.0, 2012], 'ignored by the key') == first
+    assert calls == ['first'] and len(cache) == 1
+    assert isinstance(first, dict) and first['layout']['title']['text'] == 'first'
+    assert first == to_plain(figure.uncached([2010, 2012], 'first'))[0]
+    figure([2011, 2012], 'second')
+    assert calls == ['first', 'first', 'second']
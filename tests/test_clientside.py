@@ -0,0 +1,65 @@
+import base64
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from utils.cache import to_plain
+
+CLIENTSIDE_JS = Path(__file__).resolve().parent.parent / "coursework1" / "src" / "assets" / "clientside.js"
+
+# Runs clientside.js in node: reads {"function", "args"} on stdin, prints the result
+RUNNER = """
+global.window = {dash_clientside: {PreventUpdate: {}}};
+require(process.argv[1]);
+const request = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const result = window.dash_clientside.recycling[request.function](...request.args);
+process.stdout.write(JSON.stringify(result));
+"""
+
+pytestmark = pytest.mark.skipif(shutil.which('node') is None, reason="node is not installed")
+
+
+@pytest.fixture(scope='module')
+def pages(dash_app):
+    return sys.modules['pages.recycling.overview'], sys.modules['pages.recycling.area_analysis']
+
+
+def run_clientside(function, *args):
+    output = subprocess.run(['node', '-e', RUNNER, str(CLIENTSIDE_JS)], check=True, capture_output=True,
+                            input=json.dumps({'function': function, 'args': args}), text=True).stdout
+    return json.loads(output)
+
+
+def comparable(value):
+    """Decode plotly typed arrays and round floats (the browser works from float32 values)"""
+    if isinstance(value, dict):
+        if 'bdata' in value and 'dtype' in value:
+            return comparable(np.frombuffer(base64.b64decode(value['bdata']),
+                                            dtype=value['dtype']).tolist())
+        return {key: comparable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [comparable(item) for item in value]
+    if isinstance(value, float):
+        return round(value, 4)
+    return value
+
+
+@pytest.mark.parametrize('year_range', [[2010, 2010], [2008, 2012]])
+def test_overview_summary_matches_server(pages, year_range):
+    overview, _ = pages
+    from utils.client_data import get_client_dataset
+    server = to_plain(overview.update_overview_summary(year_range))[0]
+    client = run_clientside('overviewSummary', year_range, get_client_dataset())
+    assert comparable(client) == comparable(server)
+
+
+def test_area_kpis_match_server(pages):
+    _, area_analysis = pages
+    from utils.client_data import get_client_dataset
+    server = list(area_analysis.update_kpis([2008, 2012]))
+    assert run_clientside('areaKpis', [2008, 2012], get_client_dataset()) == server
@@ -0,0 +1,85 @@
+import os
+
+import pandas as pd
+import pytest
+
+from utils.data_store import DataStore, read_source
+
+
+class CountingReader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, path):
+        self.calls += 1
+        return pd.read_csv(path)
+
+
+def write(path, rates, mtime_ns=None):
+    pd.DataFrame({'Area': ['Camden', 'Barnet'], 'Year': [2010, 2010],
+                  'Recycling_Rates': rates, 'London_Status': ['Core London', 'Outer London']}
+                 ).to_csv(path, index=False)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'newdata.csv'
+    write(path, [30.0, 40.0], mtime_ns=10**18)
+    return path
+
+
+def test_loads_once_and_hands_out_shallow_copies(source):
+    reader = CountingReader()
+    store = DataStore(source, reader=reader, check_interval=0)
+    first = store.frame()
+    first['Extra'] = 1
+    second = store.frame()
+    assert reader.calls == 1 and store.version == 1
+    assert 'Extra' not in second.columns
+    assert second['Recycling_Rates'].tolist() == [30.0, 40.0]
+
+
+def test_derived_structures_follow_the_data_version(source):
+    reader = CountingReader()
+    store = DataStore(source, reader=reader, check_interval=0)
+    builds = []
+
+    def build(df):
+        builds.append(store.version)
+        return df['Recycling_Rates'].sum()
+
+    assert store.derived('total', build) == 70.0
+    assert store.derived('total', build) == 70.0
+    assert builds == [1]
+
+    # A new mtime with the same content is not a new version
+    digest = store.digest
+    os.utime(source, ns=(2 * 10**18, 2 * 10**18))
+    assert store.derived('total', build) == 70.0
+    assert (reader.calls, store.version, store.digest) == (1, 1, digest)
+
+    write(source, [50.0, 40.0], mtime_ns=3 * 10**18)
+    assert store.derived('total', build) == 90.0
+    assert builds == [1, 2] and reader.calls == 2
+    assert store.digest != digest
+
+
+def test_checks_for_changes_at_most_once_per_interval(source):
+    store = DataStore(source, check_interval=3600)
+    assert store.version == 1
+    write(source, [50.0, 40.0], mtime_ns=2 * 10**18)
+    assert store.frame()['Recycling_Rates'][0] == 30.0
+    assert store.refresh(force=True) == 2
+    assert store.frame()['Recycling_Rates'][0] == 50.0
+
+
+def test_missing_required_columns_are_rejected(tmp_path):
+    path = tmp_path / 'newdata.csv'
+    pd.DataFrame({'Area': ['Camden'], 'Year': [2010], 'Recycling_Rates': [30.0]}).to_csv(path, index=False)
+    with pytest.raises(ValueError, match='London_Status'):
+        DataStore(path).frame()
+    pd.DataFrame({'Area': ['Camden'], 'Year': [2010]}).to_csv(path, index=False)
+    with pytest.raises(ValueError, match='Recycling_Rates'):
+        read_source(path)
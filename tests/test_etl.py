@@ -0,0 +1,87 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from utils.etl import TABLES, run_etl
+
+AREAS = {
+    'E09000001': ('City of London', 'Core London'),
+    'E09000002': ('Barking and Dagenham', 'Outer London'),
+    'E07000008': ('Cambridge', 'Non-London'),
+}
+
+
+def source_frame(areas=AREAS, years=(2003, 2004)):
+    rows = []
+    for i, (code, (area, status)) in enumerate(areas.items()):
+        for year in years:
+            rows.append({
+                'Code_recycling': code, 'Area': area, 'Year': year,
+                'Recycling_Rates': 20 + i + year - 2003, 'Per_Capita_Recycling': '0.25',
+                'recycling_ranking': 'B', 'Population': '6684', 'Population_Density': '2.3',
+                'London_Status': status, 'Region_and_Borough': 'London', 'Postcode': 'EC',
+                'Area_km2': 2.9, 'Number of Reuse Organisations': '', 'Number of Charity Shops - 2007': '',
+                'Re-use Activity Weight (tonnes)': '', 'Reuse_Facility_Density': '',
+                'Resource_Recovery_Efficiency': '', 'Reuse_Coverage': '', 'Per_Capita_Reuse': '',
+            })
+    return pd.DataFrame(rows)
+
+
+def load(tmp_path, frame, db_name='recycling.db', full=False):
+    csv_path = tmp_path / 'newdata.csv'
+    frame.to_csv(csv_path, index=False)
+    return run_etl(tmp_path / db_name, csv_path, population_path=None, full=full)
+
+
+def contents(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return {name: conn.execute(
+                    f"SELECT * FROM {name} ORDER BY {', '.join(TABLES[name][0])}").fetchall()
+                for name in TABLES}
+
+
+def test_first_load_writes_every_row(tmp_path):
+    report = load(tmp_path, source_frame())
+    tables = report['tables']
+    assert tables['AREA'] == {'rows': 3, 'written': 3, 'deleted': 0, 'unchanged': 0}
+    assert tables['YEAR']['rows'] == 2
+    assert tables['RECYCLING_DATA']['written'] == 6
+    stored = contents(tmp_path / 'recycling.db')
+    assert stored['RECYCLING_DATA'][0] == ('E07000008', 2003, 22, '0.25', 'B')
+    assert stored['POPULATION_DATA'][0][3] == 6684
+
+
+def test_reload_only_writes_changes(tmp_path):
+    load(tmp_path, source_frame())
+    assert load(tmp_path, source_frame())['tables']['RECYCLING_DATA'] == {
+        'rows': 6, 'written': 0, 'deleted': 0, 'unchanged': 6}
+
+    areas = dict(AREAS)
+    del areas['E07000008']                                  # removed area
+    areas['E06000001'] = ('Hartlepool', 'Non-London')       # new area
+    frame = source_frame(areas)
+    frame.loc[(frame['Code_recycling'] == 'E09000001') & (frame['Year'] == 2004),
+              'Recycling_Rates'] = 99                        # changed row
+    report = load(tmp_path, frame)['tables']
+
+    assert report['RECYCLING_DATA'] == {'rows': 6, 'written': 3, 'deleted': 2, 'unchanged': 3}
+    assert report['AREA'] == {'rows': 3, 'written': 1, 'deleted': 1, 'unchanged': 2}
+    assert report['YEAR'] == {'rows': 2, 'written': 0, 'deleted': 0, 'unchanged': 2}
+
+    stored = contents(tmp_path / 'recycling.db')
+    assert ('E09000001', 2004, 99, '0.25', 'B') in stored['RECYCLING_DATA']
+    assert not any(row[0] == 'E07000008' for rows in stored.values() for row in rows)
+    # The incremental result matches a full load of the same source into a new database
+    load(tmp_path, frame, db_name='full.db', full=True)
+    assert stored == contents(tmp_path / 'full.db')
+
+
+def test_key_separator_in_key_column_is_rejected(tmp_path):
+    load(tmp_path, source_frame())
+    before = contents(tmp_path / 'recycling.db')
+    frame = source_frame()
+    frame.loc[0, 'Code_recycling'] = 'E09|000001'
+    with pytest.raises(ValueError, match='separator'):
+        load(tmp_path, frame)
+    assert contents(tmp_path / 'recycling.db') == before
@@ -0,0 +1,45 @@
+import json
+
+import numpy as np
+import pytest
+
+from utils.geometry import BoroughGeometry, borough_coordinates, simplify_ring
+
+
+def square(x0, y0, size=1.0):
+    return [[x0, y0], [x0 + size, y0], [x0 + size, y0 + size], [x0, y0 + size], [x0, y0]]
+
+
+def geojson(*names):
+    return {'type': 'FeatureCollection', 'features': [
+        {'type': 'Feature', 'properties': {'name': name},
+         'geometry': {'type': 'Polygon', 'coordinates': [square(i * 2.0, 0.0)]}}
+        for i, name in enumerate(names)]}
+
+
+def test_covers_only_when_every_area_has_a_boundary():
+    geometry = BoroughGeometry(geojson('Camden', 'City of London'), tolerance=0, precision=4)
+    assert geometry.covers(['Camden', 'City of London'])
+    assert not geometry.covers(['Camden', 'Barnet'])
+    assert not geometry.covers([])
+
+
+def test_centroids_and_fallback_coordinates():
+    geometry = BoroughGeometry(geojson('Camden', 'City of London'), tolerance=0, precision=4)
+    assert geometry.centroid('City of London') == pytest.approx([2.5, 0.5])
+    coords = borough_coordinates(['Camden', 'Barnet', 'Nowhere'], {'Barnet': [9.0, 9.0]}, geometry)
+    assert coords[:2].tolist() == [[0.5, 0.5], [9.0, 9.0]]
+    assert np.isnan(coords[2]).all()
+
+
+def test_payload_digest_changes_with_content():
+    first = BoroughGeometry(geojson('Camden'), tolerance=0, precision=4)
+    second = BoroughGeometry(geojson('Camden', 'Barnet'), tolerance=0, precision=4)
+    assert json.loads(first.payload) == first.geojson
+    assert first.digest != second.digest
+
+
+def test_simplify_ring_drops_collinear_points_and_stays_closed():
+    ring = [[0, 0], [0.5, 0], [1, 0], [1, 1], [0, 1], [0, 0]]
+    simplified = simplify_ring(ring, tolerance=0.01)
+    assert simplified.tolist() == [[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.area_index import build_area_index
+from utils.groups import AreaGroups
+from utils.range_agg import RangeAggregator
+from utils.rankings import Rankings
+
+STATUSES = ['Core London', 'Outer London', 'Non-London']
+YEARS = [2019, 2020, 2021]
+
+
+@pytest.fixture(scope='module')
+def frame():
+    rng = np.random.default_rng(8)
+    areas = [(f"E0{i:07d}", f"Area {i:02d}", STATUSES[i % 3], 'London' if i % 3 < 2 else f"Region {i % 2}")
+             for i in range(18)]
+    return pd.DataFrame([
+        {'Code_recycling': code, 'Area': area, 'London_Status': status, 'Region_and_Borough': region,
+         'Year': year, 'Recycling_Rates': round(rng.uniform(10, 60), 1)}
+        for code, area, status, region in areas for year in YEARS])
+
+
+@pytest.fixture(scope='module')
+def groups(frame):
+    index = build_area_index(frame)
+    return AreaGroups(index, Rankings(index, RangeAggregator(index)))
+
+
+def test_status_groups_and_regions_match_pandas(frame, groups):
+    for group, statuses in [('london_all', ['Core London', 'Outer London']), ('non_london', ['Non-London'])]:
+        expected = sorted(frame.loc[frame['London_Status'].isin(statuses), 'Area'].unique())
+        assert groups.areas(group).tolist() == expected
+    assert len(groups.areas('all')) == 18
+    expected = sorted(frame.loc[frame['Region_and_Borough'] == 'Region 1', 'Area'].unique())
+    assert groups.region_areas('Region 1').tolist() == expected
+    assert len(groups.region_areas('Nowhere')) == 0
+
+
+@pytest.mark.parametrize('year_range, rank_year', [(None, 2021), ((2019, 2020), 2020), ((2019, 2030), 2021)])
+def test_ranked_groups_use_the_last_year_of_the_range(frame, groups, year_range, rank_year):
+    rows = frame[(frame['Year'] == rank_year) & frame['London_Status'].isin(['Core London', 'Outer London'])]
+    assert groups.areas('top_5_london', year_range).tolist() == \
+        rows.nlargest(5, 'Recycling_Rates')['Area'].tolist()
+    assert groups.areas('bottom_5_london', year_range).tolist() == \
+        rows.nsmallest(5, 'Recycling_Rates')['Area'].tolist()
+
+
+def test_resolve_keeps_selection_order_and_drops_duplicates(groups):
+    index = groups.index
+    selections = ['Area 05', 'london_header', 'core_london', 'E00000003', 'Nowhere', 'Area 05', 'non_london']
+    resolved = index.areas[groups.resolve(selections)].tolist()
+
+    expected = []
+    for selection in selections:
+        if selection in groups:
+            names = groups.areas(selection).tolist()
+        else:
+            position = index.position(selection)
+            names = [] if position is None else [index.areas[position]]
+        expected += [name for name in names if name not in expected]
+    assert resolved == expected
+    assert resolved[:3] == ['Area 05', 'Area 00', 'Area 03']
+    assert groups.resolve(None).tolist() == [] and groups.resolve(None).dtype == int
@@ -0,0 +1,27 @@
+import hashlib
+
+from utils.http_cache import ASSETS_FOLDER, IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, asset_url
+from utils.recycling_figures import london_map_figure
+
+
+def test_asset_url_carries_content_fingerprint(dash_app):
+    data = (ASSETS_FOLDER / 'london_map.png').read_bytes()
+    fingerprint = hashlib.blake2b(data, digest_size=16).hexdigest()[:12]
+    assert asset_url('london_map.png') == f"/assets/london_map.png?m={fingerprint}"
+    # Missing files fall back to the plain URL
+    assert asset_url('missing.png') == '/assets/missing.png'
+
+
+def test_fingerprinted_assets_are_cached_for_good(dash_app):
+    client = dash_app.server.test_client()
+    fingerprinted = client.get(asset_url('london_map.png'))
+    plain = client.get('/assets/london_map.png')
+    assert fingerprinted.status_code == plain.status_code == 200
+    assert fingerprinted.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+    assert plain.headers['Cache-Control'] == REVALIDATE_CACHE_CONTROL
+
+
+def test_image_map_uses_fingerprinted_background(dash_app):
+    figure = london_map_figure(2020, 'Map', {'Camden': [-0.14, 51.53], 'Barnet': [-0.2, 51.65]})
+    sources = [image.source for image in figure.layout.images]
+    assert sources == [asset_url('london_map.png')]
@@ -0,0 +1,124 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.ingest import (cache_dir_for, downcast_numeric, load_frame, parse_frame,
+                          parse_numeric_strings, read_csv, to_category)
+
+
+def source_frame():
+    return pd.DataFrame({
+        'Area': ['Camden', 'Barnet', 'Camden', 'Barnet'],
+        'Year': [2003, 2003, 2004, 2004],
+        'Recycling_Rates': [21.5, 30.0, 23.25, 31.0],
+        'Population': [6684, 7000, 6700, 7100],
+        'Area_km2': [21.8, 86.7, 21.8, 86.7],
+        'London_Status': ['Core London', 'Outer London', 'Core London', 'Outer London'],
+        'Postcode': ['NW1', 'EN4', 'NW1', None],
+        'Notes': ['a', 'b', 'c', 'd'],
+        'Population_Density': ['1,001.5', 'Unknown', '990', 'NaN%'],
+    })
+
+
+def memmapped(values):
+    while values is not None:
+        if isinstance(values, np.memmap):
+            return True
+        values = values.base
+    return False
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'newdata.csv'
+    source_frame().to_csv(path, index=False)
+    return path
+
+
+def test_cache_round_trip_keeps_values_and_dtypes(source):
+    parsed = load_frame(source)
+    assert (cache_dir_for(source) / 'meta.json').exists()
+    cached = load_frame(source)
+    pd.testing.assert_frame_equal(cached, parsed)
+    pd.testing.assert_frame_equal(cached, read_csv(source))
+    assert cached['Year'].dtype == np.int32
+    assert cached['Recycling_Rates'].dtype == np.float32
+    assert cached['Area_km2'].dtype == np.float64  # not exactly representable as float32
+    assert isinstance(cached['Area'].dtype, pd.CategoricalDtype)
+    assert list(cached['Area'].cat.categories) == ['Barnet', 'Camden']
+    assert cached['Postcode'].isna().tolist() == [False, False, False, True]
+    assert cached['Notes'].tolist() == ['a', 'b', 'c', 'd']
+
+
+def test_cached_numeric_columns_stay_memory_mapped(source):
+    load_frame(source)
+    cached = load_frame(source)
+    for column in ['Year', 'Recycling_Rates', 'Population', 'Population_Density']:
+        assert memmapped(cached[column].to_numpy()), column
+    # The mapped columns are read-only; a shallow copy copies on write and leaves the cache alone
+    with pytest.raises(ValueError):
+        cached.loc[0, 'Recycling_Rates'] = 99.0
+    view = cached.copy(deep=False)
+    view.loc[0, 'Recycling_Rates'] = 99.0
+    assert cached['Recycling_Rates'][0] == 21.5
+    assert load_frame(source)['Recycling_Rates'][0] == 21.5
+
+
+def test_cache_follows_source_changes(source):
+    load_frame(source)
+    # A new mtime with the same content keeps the cache
+    os.utime(source, ns=(0, 10**9))
+    assert load_frame(source)['Recycling_Rates'].tolist() == [21.5, 30.0, 23.25, 31.0]
+
+    changed = source_frame()
+    changed.loc[0, 'Recycling_Rates'] = 50.0
+    changed.to_csv(source, index=False)
+    assert load_frame(source)['Recycling_Rates'][0] == 50.0
+    assert load_frame(source)['Recycling_Rates'][0] == 50.0
+
+
+def test_numeric_strings_are_parsed_and_missing_markers_dropped():
+    raw = pd.Series(['6,684', '0.021 %/person', ' 0.092 kg', 'NaN%', 'Unknown', ' N/A ', '-1.5', None, 'text'])
+    expected = [6684.0, 0.021, 0.092, np.nan, np.nan, np.nan, -1.5, np.nan, np.nan]
+    np.testing.assert_array_equal(parse_numeric_strings(raw).to_numpy(), expected)
+    assert parse_numeric_strings(pd.Series([1, 2])).dtype == float
+
+
+def test_text_columns_become_sorted_categories_when_repetitive():
+    status = to_category(pd.Series(['Outer', 'Core', 'Outer', 'Core', None, 'Core']))
+    assert list(status.cat.categories) == ['Core', 'Outer']
+    assert status.isna().tolist() == [False] * 4 + [True, False]
+    assert (status.sort_values(na_position='last').tolist()
+            == pd.Series(['Outer', 'Core', 'Outer', 'Core', None, 'Core']).sort_values().tolist())
+    unique = pd.Series(['a', 'b', 'c', 'd'])
+    assert to_category(unique) is unique
+
+
+def test_downcast_only_when_lossless():
+    assert downcast_numeric(pd.Series([1, 2, 3], dtype='int64')).dtype == np.int32
+    assert downcast_numeric(pd.Series([1, 2**40])).dtype == np.int64
+    assert downcast_numeric(pd.Series([0.5, np.nan, 21.25])).dtype == np.float32
+    assert downcast_numeric(pd.Series([0.1, 21.8])).dtype == np.float64
+
+
+def test_parse_frame_matches_row_by_row_cleaning():
+    raw = source_frame()
+    parsed = parse_frame(raw.copy())
+    for column, value in raw['Population_Density'].items():
+        text = str(value).replace(',', '')
+        try:
+            expected = float(text)
+        except ValueError:
+            expected = np.nan
+        assert parsed['Population_Density'][column] == pytest.approx(expected, nan_ok=True)
+    assert parsed['Recycling_Rates'].astype(float).tolist() == raw['Recycling_Rates'].tolist()
+    assert parsed['Postcode'].isna().tolist() == raw['Postcode'].isna().tolist()
+    assert parsed['Postcode'].dropna().astype(str).tolist() == raw['Postcode'].dropna().tolist()
+    assert parsed.memory_usage(deep=True).sum() < raw.memory_usage(deep=True).sum()
+
+
+def test_missing_required_column_is_left_for_the_caller():
+    parsed = parse_frame(source_frame().drop(columns=['Recycling_Rates']))
+    assert 'Recycling_Rates' not in parsed.columns
@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.etl import run_etl
+from utils.queries import build_query, query_recycling
+
+AREAS = [
+    ('E09000007', 'Camden', 'Core London'),
+    ('E09000002', 'Barking and Dagenham', 'Outer London'),
+    ('E09000003', 'Barnet', 'Outer London'),
+    ('E07000008', 'Cambridge', 'Non-London'),
+]
+YEARS = range(2003, 2008)
+
+
+@pytest.fixture(scope='module')
+def source(tmp_path_factory):
+    rows = []
+    for i, (code, area, status) in enumerate(AREAS):
+        for year in YEARS:
+            density = 'Unknown' if (i, year) == (3, 2004) else f"{1000 + 100 * i + year - 2003:,}.5"
+            rows.append({
+                'Code_recycling': code, 'Area': area, 'Year': year, 'London_Status': status,
+                'Recycling_Rates': 10 * i + year - 2003, 'Per_Capita_Recycling': '0.1',
+                'recycling_ranking': 'B', 'Population': str(5000 + i), 'Population_Density': density,
+                'Region_and_Borough': '', 'Postcode': '', 'Area_km2': 1.0,
+                'Number of Reuse Organisations': '', 'Number of Charity Shops - 2007': '',
+                'Re-use Activity Weight (tonnes)': '', 'Reuse_Facility_Density': '',
+                'Resource_Recovery_Efficiency': '', 'Per_Capita_Reuse': '',
+                'Reuse_Coverage': '27.7' if year == 2007 else '',
+            })
+    frame = pd.DataFrame(rows)
+    directory = tmp_path_factory.mktemp('queries')
+    frame.to_csv(directory / 'newdata.csv', index=False)
+    run_etl(directory / 'recycling.db', directory / 'newdata.csv', population_path=None)
+
+    expected = frame[['Area', 'Year', 'London_Status', 'Recycling_Rates']].copy()
+    expected['Population_Density'] = pd.to_numeric(
+        frame['Population_Density'].str.replace(',', ''), errors='coerce')
+    expected['Reuse_Coverage'] = pd.to_numeric(frame['Reuse_Coverage'], errors='coerce')
+    return directory / 'recycling.db', expected.sort_values(['Area', 'Year']).reset_index(drop=True)
+
+
+COLUMNS = ['Area', 'Year', 'London_Status', 'Recycling_Rates', 'Population_Density', 'Reuse_Coverage']
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'year_range': (2004, 2006)},
+    {'areas': ['Camden', 'E07000008']},
+    {'statuses': ['Outer London']},
+    {'year_range': (2005, 2005), 'areas': ['Barnet', 'Camden'], 'statuses': ['Outer London']},
+    {'areas': []},
+])
+def test_query_matches_pandas_filtering(source, filters):
+    db_path, frame = source
+    mask = np.ones(len(frame), dtype=bool)
+    if 'year_range' in filters:
+        mask &= frame['Year'].between(*filters['year_range']).to_numpy()
+    if 'areas' in filters:
+        codes = {code for code, area, _ in AREAS if code in filters['areas'] or area in filters['areas']}
+        names = {area for code, area, _ in AREAS if code in codes}
+        mask &= frame['Area'].isin(names).to_numpy()
+    if 'statuses' in filters:
+        mask &= frame['London_Status'].isin(filters['statuses']).to_numpy()
+
+    result = query_recycling(COLUMNS, db_path=db_path, **filters)
+    expected = frame[mask].reset_index(drop=True)
+    assert list(result.columns) == COLUMNS
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_query_parses_text_numbers(source):
+    db_path, _ = source
+    result = query_recycling(['Area', 'Year', 'Population_Density'], year_range=(2004, 2004),
+                             areas=['Cambridge', 'Camden'], db_path=db_path)
+    assert result['Area'].tolist() == ['Cambridge', 'Camden']
+    assert np.isnan(result['Population_Density'][0])  # 'Unknown'
+    assert result['Population_Density'][1] == 1001.5  # '1,001.5'
+
+
+def test_query_text_depends_only_on_columns_and_enabled_filters():
+    first = build_query(('Area', 'Reuse_Coverage'), True, False, True, ('Area',))
+    assert first == build_query(('Area', 'Reuse_Coverage'), True, False, True, ('Area',))
+    assert 'REUSE_METRICS' in first and 'POPULATION_DATA' not in first
+    with pytest.raises(ValueError):
+        build_query(('Nope',), False, False, False, ())
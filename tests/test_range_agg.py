@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.area_index import build_area_index
+from utils.range_agg import RangeAggregator
+
+YEARS = np.arange(2003, 2023)
+
+
+@pytest.fixture(scope='module')
+def frame():
+    rng = np.random.default_rng(5)
+    rows = pd.DataFrame({
+        'Area': np.repeat([f"Area {i:02d}" for i in range(15)], len(YEARS)),
+        'Year': np.tile(YEARS, 15),
+        'Recycling_Rates': rng.uniform(5, 65, 15 * len(YEARS)),
+        'Per_Capita_Reuse': rng.uniform(0, 1, 15 * len(YEARS)),
+    })
+    rows.loc[rng.random(len(rows)) < 0.25, 'Recycling_Rates'] = np.nan
+    rows.loc[rows['Area'] == 'Area 03', 'Recycling_Rates'] = np.nan
+    return rows
+
+
+@pytest.fixture(scope='module')
+def aggregator(frame):
+    return RangeAggregator(build_area_index(frame))
+
+
+@pytest.mark.parametrize('year_range', [(2003, 2022), (2005, 2011), (2010, 2010), (1990, 2004), (2030, 2031)])
+@pytest.mark.parametrize('metric', ['Recycling_Rates', 'Per_Capita_Reuse'])  # the second is added lazily
+def test_range_sums_match_groupby(frame, aggregator, year_range, metric):
+    rows = frame[frame['Year'].between(*year_range)]
+    grouped = rows.groupby('Area')[metric].agg(['sum', 'count', 'mean']).reindex(
+        aggregator.index.areas, fill_value=0)
+    np.testing.assert_allclose(aggregator.sum(metric, year_range), grouped['sum'])
+    np.testing.assert_array_equal(aggregator.count(metric, year_range), grouped['count'])
+    expected_mean = grouped['mean'].where(grouped['count'] > 0)
+    np.testing.assert_allclose(aggregator.mean(metric, year_range), expected_mean.astype(float))
+
+
+def test_area_without_data_has_no_mean(aggregator):
+    means = aggregator.mean('Recycling_Rates', (2003, 2022))
+    assert np.isnan(means[aggregator.index.position('Area 03')])
+    assert np.count_nonzero(np.isnan(means)) == 1
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.area_index import build_area_index
+from utils.range_agg import RangeAggregator
+from utils.rankings import Rankings
+
+AREAS = ['Barnet', 'Brent', 'Camden', 'Ealing', 'Hackney', 'Harrow', 'Leeds', 'York']
+STATUSES = ['Outer London', 'Outer London', 'Core London', 'Outer London',
+            'Core London', 'Outer London', 'Non-London', 'Non-London']
+YEARS = [2010, 2011, 2012]
+
+
+@pytest.fixture(scope='module')
+def frame():
+    rates = np.array([
+        [30.0, 40.0, 35.0],
+        [25.0, 40.0, 35.0],       # ties with Barnet in 2011 and 2012
+        [30.0, np.nan, 20.0],     # tie in 2010, missing in 2011
+        [np.nan, np.nan, np.nan],  # never ranked
+        [25.0, 10.0, 50.0],
+        [30.0, 45.0, 20.0],
+        [30.0, 40.0, 35.0],
+        [12.0, 40.0, 35.0],
+    ])
+    return pd.DataFrame({
+        'Area': np.repeat(AREAS, len(YEARS)),
+        'Year': np.tile(YEARS, len(AREAS)),
+        'London_Status': np.repeat(STATUSES, len(YEARS)),
+        'Recycling_Rates': rates.ravel(),
+    }).sample(frac=1, random_state=1)
+
+
+@pytest.fixture(scope='module')
+def rankings(frame):
+    index = build_area_index(frame)
+    return Rankings(index, RangeAggregator(index))
+
+
+def expected_ranking(frame, year_range, statuses, largest):
+    """Reference: mean rate per area over the range, sorted with ties broken by area name"""
+    rows = frame[frame['Year'].between(*year_range)]
+    if statuses is not None:
+        rows = rows[rows['London_Status'].isin(statuses)]
+    means = rows.groupby('Area')['Recycling_Rates'].mean().dropna().reset_index()
+    means = means.sort_values(['Recycling_Rates', 'Area'], ascending=[not largest, True])
+    return means['Area'].tolist()
+
+
+@pytest.mark.parametrize('year_range', [(2010, 2010), (2011, 2011), (2012, 2012), (2010, 2012), (2011, 2012)])
+@pytest.mark.parametrize('statuses', [None, ['Core London', 'Outer London'], ['Non-London']])
+@pytest.mark.parametrize('largest', [True, False])
+def test_top_and_bottom_match_pandas(frame, rankings, year_range, statuses, largest):
+    expected = expected_ranking(frame, year_range, statuses, largest)
+    for n in (1, 3, len(AREAS)):
+        positions = rankings.top(n, year_range=year_range, statuses=statuses, largest=largest)
+        assert rankings.index.areas[positions].tolist() == expected[:n]
+
+
+def test_bottom_orders_ties_like_top(rankings):
+    # 2011: Barnet, Brent, Leeds and York tie on 40.0
+    top = rankings.index.areas[rankings.top(6, year=2011)].tolist()
+    bottom = rankings.index.areas[rankings.bottom(6, year=2011)].tolist()
+    assert top == ['Harrow', 'Barnet', 'Brent', 'Leeds', 'York', 'Hackney']
+    assert bottom == ['Hackney', 'Barnet', 'Brent', 'Leeds', 'York', 'Harrow']
+
+
+def test_unknown_year_ranks_nothing(rankings):
+    assert len(rankings.top(5, year=1999)) == 0
+    assert len(rankings.bottom(5, year=1999)) == 0
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from student.table_backend import TableBackend, parse_filter_query, server_side_table
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({
+        'Area': ['Camden', 'barnet', 'Ealing', 'Brent', 'Camden', 'Hackney', 'Ealing'],
+        'Year': [2010, 2010, 2011, 2011, 2012, 2012, 2012],
+        'Rate': [30.5, 41.0, np.nan, 25.0, 33.0, 25.0, 40.0],
+    })
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("", []),
+    (None, []),
+    ("{Year} = 2010", [("Year", "eq", 2010.0, True)]),
+    ("{Rate} >= 30 && {Year} lt 2012", [("Rate", "ge", 30.0, True), ("Year", "lt", 2012.0, True)]),
+    ('{Area} contains "Cam"', [("Area", "contains", "Cam", True)]),
+    ('{Area} icontains "cam"', [("Area", "contains", "cam", False)]),
+    ('{Area} s= "Ealing"', [("Area", "eq", "Ealing", True)]),
+    ("{Area} = '2010'", [("Area", "eq", "2010", True)]),
+    ('{Area} = "say \\"hi\\""', [("Area", "eq", 'say "hi"', True)]),
+    ("{Rate} is blank", [("Rate", "blank", None, True)]),
+    ("{Area} datestartswith 20", [("Area", "datestartswith", 20.0, True)]),
+])
+def test_parse_filter_query(query, expected):
+    assert parse_filter_query(query) == expected
+
+
+def test_parse_filter_query_skips_unsupported_terms():
+    assert parse_filter_query("{Year} = 2010 && Area ~ foo && {Rate} > 1") == [
+        ("Year", "eq", 2010.0, True), ("Rate", "gt", 1.0, True)]
+
+
+def rows(records, column='Area'):
+    return [record[column] for record in records]
+
+
+def assert_records(records, expected):
+    pd.testing.assert_frame_equal(pd.DataFrame(records), expected.reset_index(drop=True))
+
+
+def test_page_slices_and_counts(frame):
+    backend = TableBackend(frame, page_size=3)
+    records, page_count = backend.page(0)
+    assert page_count == 3
+    assert_records(records, frame.iloc[:3])
+    assert rows(backend.page(2)[0]) == ['Ealing']
+    # Out-of-range pages are clamped
+    assert backend.page(9)[0] == backend.page(2)[0]
+    assert rows(backend.page(-1)[0]) == rows(records)
+    assert len(backend.page(0, page_size=5)[0]) == 5
+
+
+def test_page_sorts_single_column_with_missing_last(frame):
+    backend = TableBackend(frame, page_size=10)
+    ascending = backend.page(0, sort_by=[{'column_id': 'Rate', 'direction': 'asc'}])[0]
+    descending = backend.page(0, sort_by=[{'column_id': 'Rate', 'direction': 'desc'}])[0]
+    assert rows(ascending, 'Rate')[:-1] == [25.0, 25.0, 30.5, 33.0, 40.0, 41.0]
+    assert rows(descending, 'Rate')[:-1] == [41.0, 40.0, 33.0, 30.5, 25.0, 25.0]
+    assert np.isnan(ascending[-1]['Rate']) and np.isnan(descending[-1]['Rate'])
+    # Ties keep the original row order
+    assert rows(ascending)[:2] == ['Brent', 'Hackney']
+
+
+def test_page_sorts_multiple_columns(frame):
+    backend = TableBackend(frame, page_size=10)
+    sort_by = [{'column_id': 'Year', 'direction': 'desc'}, {'column_id': 'Area', 'direction': 'asc'}]
+    expected = frame.sort_values(['Year', 'Area'], ascending=[False, True], kind='stable')
+    assert_records(backend.page(0, sort_by=sort_by)[0], expected)
+
+
+def test_page_filters_then_sorts_then_pages(frame):
+    backend = TableBackend(frame, page_size=2)
+    query = '{Rate} > 26 && {Area} icontains "e"'
+    sort_by = [{'column_id': 'Rate', 'direction': 'desc'}]
+    first, page_count = backend.page(0, sort_by=sort_by, filter_query=query)
+    second, _ = backend.page(1, sort_by=sort_by, filter_query=query)
+    assert page_count == 2
+    assert rows(first, 'Rate') + rows(second, 'Rate') == [41.0, 40.0, 33.0, 30.5]
+    assert rows(first) + rows(second) == ['barnet', 'Ealing', 'Camden', 'Camden']
+
+
+def test_page_filters_case_and_text_on_numbers(frame):
+    backend = TableBackend(frame)
+    assert rows(backend.page(0, filter_query='{Area} = "camden"')[0]) == []
+    assert rows(backend.page(0, filter_query='{Area} ieq "camden"')[0]) == ['Camden', 'Camden']
+    assert rows(backend.page(0, filter_query='{Year} contains "201"')[0]) == list(frame['Area'])
+    assert rows(backend.page(0, filter_query='{Rate} is blank')[0]) == ['Ealing']
+    assert rows(backend.page(0, filter_query='{Missing} = 1')[0]) == list(frame['Area'])
+
+
+def test_page_with_no_matches_returns_one_empty_page(frame):
+    records, page_count = TableBackend(frame).page(0, filter_query='{Year} > 2050')
+    assert records == [] and page_count == 1
+
+
+def test_server_side_table_is_static(frame):
+    first = server_side_table('test-static-table', frame, page_size=4)
+    again = server_side_table('test-static-table', frame.copy(), page_size=4)
+    assert first.page_count == again.page_count == 2
+    with pytest.raises(ValueError):
+        server_side_table('test-static-table', frame.iloc[:3], page_size=4)
@@ -0,0 +1,117 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.area_index import build_area_index
+from utils.groups import AreaGroups
+from utils.range_agg import RangeAggregator
+from utils.rankings import Rankings
+from utils.trend_stats import STAT_NAMES, TrendEngine, compute_trend_statistics
+
+YEARS = np.arange(2003, 2023)
+
+
+def naive_row_statistics(values, years, year_range):
+    """Reference: the statistics for one series, computed value by value."""
+    points = [(int(y), float(v)) for y, v in zip(years, values) if not math.isnan(v)]
+    by_year = dict(points)
+    start = by_year.get(year_range[0], math.nan)
+    end = by_year.get(year_range[1], math.nan)
+    years_diff = year_range[1] - year_range[0]
+    stats = dict.fromkeys(STAT_NAMES, math.nan)
+    stats.update(start_rate=start, end_rate=end, change=end - start,
+                 annual_growth=(end - start) / years_diff if years_diff > 0 else 0.0)
+    if points:
+        rates = [v for _, v in points]
+        stats['avg_rate'] = sum(rates) / len(rates)
+        max_year, max_rate = max(points, key=lambda p: (p[1], -p[0]))
+        min_year, min_rate = min(points, key=lambda p: (p[1], p[0]))
+        stats.update(max_rate=max_rate, max_year=max_year, min_rate=min_rate, min_year=min_year)
+    if len({y for y, _ in points}) > 1:
+        x_mean = sum(y for y, _ in points) / len(points)
+        y_mean = stats['avg_rate']
+        sxy = sum((y - x_mean) * (v - y_mean) for y, v in points)
+        sxx = sum((y - x_mean) ** 2 for y, _ in points)
+        stats['slope'] = sxy / sxx
+    if start > 0 and end > 0 and years_diff > 0:
+        stats['cagr'] = ((end / start) ** (1 / years_diff) - 1) * 100
+    diffs = [b - a for a, b in zip(values[:-1], values[1:]) if not (math.isnan(a) or math.isnan(b))]
+    if len(diffs) > 1:
+        mean = sum(diffs) / len(diffs)
+        stats['volatility'] = math.sqrt(sum((d - mean) ** 2 for d in diffs) / (len(diffs) - 1))
+    return stats
+
+
+def sample_matrix():
+    rng = np.random.default_rng(7)
+    matrix = rng.uniform(5, 60, size=(8, len(YEARS))).round(1)
+    matrix[rng.random(matrix.shape) < 0.2] = np.nan
+    matrix[1] = np.nan                      # no data at all
+    matrix[2, :] = np.nan
+    matrix[2, 5] = 30.0                     # a single value
+    matrix[3, 4:8] = [20.0, 20.0, 25.0, 25.0]  # ties for max/min
+    matrix[4, 0] = 0.0                      # zero start: no CAGR
+    matrix[5, [0, -1]] = [np.nan, 40.0]     # missing start year
+    return matrix
+
+
+def assert_matches_naive(matrix, years, year_range):
+    stats = compute_trend_statistics(matrix, years, year_range)
+    assert set(stats) == set(STAT_NAMES)
+    for i, row in enumerate(matrix):
+        expected = naive_row_statistics(row, years, year_range)
+        for name in STAT_NAMES:
+            assert stats[name][i] == pytest.approx(expected[name], rel=1e-9, abs=1e-9, nan_ok=True), \
+                f"row {i}, {name}"
+
+
+@pytest.mark.parametrize("year_range", [(2003, 2022), (2008, 2015), (2010, 2011), (2012, 2012)])
+def test_matches_per_row_computation(year_range):
+    matrix = sample_matrix()
+    columns = (YEARS >= year_range[0]) & (YEARS <= year_range[1])
+    assert_matches_naive(matrix[:, columns], YEARS[columns], year_range)
+
+
+def test_range_ends_missing_from_years():
+    matrix = sample_matrix()[:, 2:10]
+    assert_matches_naive(matrix, YEARS[2:10], (2001, 2030))
+
+
+def test_empty_year_range_gives_nan():
+    stats = compute_trend_statistics(np.empty((3, 0)), np.empty(0, dtype=int), (2030, 2031))
+    for name in STAT_NAMES:
+        assert stats[name].shape == (3,)
+        assert np.isnan(stats[name]).all(), name
+
+
+def test_engine_matches_per_area_and_group_computation():
+    matrix = sample_matrix()
+    statuses = ['Core London', 'Core London', 'Outer London', 'Outer London',
+                'Non-London', 'Non-London', 'Non-London', 'Outer London']
+    frame = pd.DataFrame({
+        'Area': np.repeat([f"Area {i}" for i in range(len(matrix))], len(YEARS)),
+        'Year': np.tile(YEARS, len(matrix)),
+        'London_Status': np.repeat(statuses, len(YEARS)),
+        'Recycling_Rates': matrix.ravel(),
+    }).sample(frac=1, random_state=3)
+    index = build_area_index(frame)
+    engine = TrendEngine(index, AreaGroups(index, Rankings(index, RangeAggregator(index))))
+
+    year_range = (2005, 2020)
+    columns = (YEARS >= year_range[0]) & (YEARS <= year_range[1])
+    for i, row in enumerate(matrix):
+        expected = naive_row_statistics(row[columns], YEARS[columns], year_range)
+        stats = engine.area_stats(f"Area {i}", year_range)
+        if math.isnan(expected['start_rate']) or math.isnan(expected['end_rate']):
+            assert stats is None
+        else:
+            assert stats == pytest.approx(expected, nan_ok=True)
+
+    # Group series are the yearly means over the member areas, as a groupby would give
+    outer = frame[frame['London_Status'] == 'Outer London'].groupby('Year')['Recycling_Rates'].mean()
+    outer = outer[outer.index.to_series().between(*year_range)].dropna()
+    years, values = engine.group_series('outer_london', year_range)
+    assert years.tolist() == outer.index.tolist()
+    assert values == pytest.approx(outer.to_numpy())